@@ -0,0 +1,221 @@
+"""
+BracketsTV API Data Access
+==========================
+
+supabase-py's client is synchronous: every .execute() blocks until Supabase
+answers. Calling it directly from an async endpoint would stall the whole
+event loop, so the API runs every query through run_query(), which executes
+it in a bounded pool of worker threads.
+
+All queries share a single Supabase client from get_client(). It is created
+on first use rather than at import time: importing supabase-py and building
+the client is the largest part of a cold start, and requests served from the
+cache or the read mirror never need it. Its PostgREST session is one
+httpx.Client with HTTP/2 enabled, so connections to Supabase stay pooled and
+are reused across worker threads.
+
+Every call is timed and recorded in the bracketstv_db_query_duration_seconds
+histogram (see metrics.py), labelled with an operation name.
+
+Admission control: at most DB_MAX_PENDING timed queries may be running or
+queued for a worker thread at once. Past that, run_blocking() raises
+DatabaseOverloaded straight away instead of letting the queue (and every
+request's latency) grow without bound; the API turns it into a 503 with
+Retry-After.
+
+Environment Variables Required:
+    - SUPABASE_URL: Your Supabase project URL
+    - SUPABASE_KEY: Your Supabase service role key (or anon key with proper RLS)
+
+Optional Environment Variables:
+    - DB_MAX_CONCURRENCY: Maximum number of Supabase queries in flight per worker (default: 16)
+    - DB_MAX_PENDING: Maximum number of Supabase queries running or waiting for a slot per worker;
+      further queries are refused with DatabaseOverloaded (default: 64)
+    - DB_RETRY_AFTER_SECONDS: Retry-After suggested to clients whose query was refused (default: 1)
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Optional
+
+import anyio
+import anyio.to_thread
+
+from metrics import DB_ERRORS, DB_QUERY_SECONDS, DB_SHED
+
+DB_MAX_CONCURRENCY = int(os.getenv("DB_MAX_CONCURRENCY", "16"))
+DB_MAX_PENDING = int(os.getenv("DB_MAX_PENDING", "64"))
+DB_RETRY_AFTER_SECONDS = float(os.getenv("DB_RETRY_AFTER_SECONDS", "1"))
+
+logger = logging.getLogger("bracketstv.api.db")
+
+_client: Optional[Any] = None
+_client_ready = False
+_client_lock = threading.Lock()
+
+# Monotonic time of the last Supabase call that succeeded (used by readiness checks)
+_last_success: Optional[float] = None
+
+# Timed queries currently running or waiting for a worker thread
+_pending = 0
+
+# Created lazily: anyio needs a running event loop to pick its backend
+_limiter: Optional[anyio.CapacityLimiter] = None
+
+
+class DatabaseOverloaded(Exception):
+    """
+    Raised instead of queueing a query when DB_MAX_PENDING queries are already pending.
+
+    Args:
+        operation: Operation name of the refused query
+        retry_after: Seconds the client should wait before retrying
+    """
+
+    def __init__(self, operation: str, retry_after: float = DB_RETRY_AFTER_SECONDS):
+        super().__init__(f"Too many pending Supabase queries (refused '{operation}')")
+        self.operation = operation
+        self.retry_after = retry_after
+
+
+def _create_client() -> Optional[Any]:
+    try:
+        from supabase import create_client
+    except ImportError:
+        logger.error("supabase-py not installed. Run: pip install supabase")
+        return None
+
+    url = os.getenv("SUPABASE_URL")
+    key = os.getenv("SUPABASE_KEY")
+    if not url or not key:
+        logger.error("SUPABASE_URL and SUPABASE_KEY environment variables are required")
+        return None
+
+    try:
+        client = create_client(url, key)
+    except Exception as e:
+        logger.error(f"Failed to initialize Supabase client: {e}")
+        return None
+
+    logger.info("✅ Supabase client initialized successfully")
+    return client
+
+
+def get_client() -> Optional[Any]:
+    """
+    Return the shared Supabase client, creating it on first call.
+
+    Returns:
+        supabase-py Client, or None if it is not configured or could not be created
+    """
+    global _client, _client_ready
+
+    if not _client_ready:
+        with _client_lock:
+            if not _client_ready:
+                _client = _create_client()
+                _client_ready = True
+
+    return _client
+
+
+def client_configured() -> bool:
+    """True if a client exists or can be created, without creating it."""
+    if _client_ready:
+        return _client is not None
+    return bool(os.getenv("SUPABASE_URL") and os.getenv("SUPABASE_KEY"))
+
+
+def set_client(client: Optional[Any]) -> None:
+    """Replace the shared client (e.g. with a stand-in backend for benchmarks)."""
+    global _client, _client_ready
+
+    with _client_lock:
+        _client = client
+        _client_ready = True
+
+
+def get_limiter() -> anyio.CapacityLimiter:
+    """Return the capacity limiter that bounds concurrent Supabase queries."""
+    global _limiter
+
+    if _limiter is None:
+        _limiter = anyio.CapacityLimiter(DB_MAX_CONCURRENCY)
+
+    return _limiter
+
+
+async def run_blocking(fn: Callable[..., Any], *args: Any, operation: Optional[str] = None) -> Any:
+    """
+    Run a blocking function that talks to Supabase in the bounded worker pool.
+
+    Args:
+        fn: Function to call in a worker thread
+        *args: Positional arguments for fn
+        operation: Name the call is recorded under in the DB metrics. Only named
+            calls count towards DB_MAX_PENDING (unnamed ones are not queries,
+            e.g. creating the client).
+
+    Returns:
+        Whatever fn returns
+
+    Raises:
+        DatabaseOverloaded: If DB_MAX_PENDING named calls are already pending
+    """
+    global _pending
+
+    if operation is None:
+        return await anyio.to_thread.run_sync(fn, *args, limiter=get_limiter())
+
+    if _pending >= DB_MAX_PENDING:
+        DB_SHED.inc(operation)
+        raise DatabaseOverloaded(operation)
+
+    def timed() -> Any:
+        global _last_success
+
+        # Timed inside the worker so waiting for a free slot is not counted as query time
+        started = time.perf_counter()
+        try:
+            result = fn(*args)
+            _last_success = time.monotonic()
+            return result
+        except Exception:
+            DB_ERRORS.inc(operation)
+            raise
+        finally:
+            DB_QUERY_SECONDS.observe(time.perf_counter() - started, operation)
+
+    _pending += 1
+    try:
+        return await anyio.to_thread.run_sync(timed, limiter=get_limiter())
+    finally:
+        _pending -= 1
+
+
+def pending_queries() -> int:
+    """Number of timed queries currently running or waiting for a worker thread."""
+    return _pending
+
+
+def seconds_since_last_success() -> Optional[float]:
+    """Seconds since a Supabase call last succeeded, or None if none has yet."""
+    if _last_success is None:
+        return None
+    return time.monotonic() - _last_success
+
+
+async def run_query(query: Any, operation: str = 'query') -> Any:
+    """
+    Execute a PostgREST query builder without blocking the event loop.
+
+    Args:
+        query: A supabase-py query builder (anything with an .execute() method)
+        operation: Name the query is recorded under in the DB metrics
+
+    Returns:
+        The APIResponse returned by query.execute()
+    """
+    return await run_blocking(query.execute, operation=operation)
@@ -8,21 +8,227 @@ This API serves data to the frontend without making any YouTube API calls.
 
 Endpoints:
     - GET /?type=subcategories&category=<category> - Get subcategories for a category
-    - GET /?type=videos&category=<category>&subcategory=<subcategory> - Get videos for a subcategory
+    - GET /?type=videos&category=<category>&subcategory=<subcategory>[&limit=<n>&cursor=<cursor>&fields=<f1,f2>]
+      - Get a page of videos for a subcategory plus the cursor for the next page
+    - GET /?type=bundle&category=<category>[&limit=<n>&fields=<f1,f2>] - Get a category's subcategories with their first page of videos
+    - GET /?type=video&video_id=<video_id> - Get the full record for a single video
+    - GET /?type=search&q=<text>[&limit=<n>] - Full-text search over the whole catalog
+    - GET /?type=related&video_id=<video_id>[&limit=<n>&fields=<f1,f2>] - Videos similar to a video ("more like this")
+    - GET /?type=changes&since=<timestamp|watermark>[&limit=<n>&fields=<f1,f2>] - Videos added or updated since a
+      watermark, oldest change first, plus the watermark to pass next time
+    - GET /health/live - Liveness probe (no I/O)
+    - GET /health/ready - Readiness probe with cache warmth and data freshness (503 when not ready)
+    - GET /health - Health check using the same cached database check
+    - GET /metrics - Prometheus metrics (request latency, response sizes, errors, Supabase timings, cache hits)
+
+List endpoints return a compact set of card fields by default (LIST_FIELDS);
+pass fields=a,b,c to pick columns (video_id is always included) or fields=all
+for complete records. Videos
+are listed by the rank_score ingest.py computes for each of them (see
+ranking.py), so every subcategory uses the same indexed sort order.
 
 Environment Variables Required:
     - SUPABASE_URL: Your Supabase project URL
     - SUPABASE_KEY: Your Supabase service role key (or anon key with proper RLS)
+
+Optional Environment Variables:
+    - CACHE_TTL_SECONDS: How long cached responses stay valid (default: 300)
+    - CACHE_MAX_ENTRIES: Maximum number of cached responses per worker (default: 512)
+    - CACHE_MAX_STALE_SECONDS: How long past CACHE_TTL_SECONDS an expired response may still be served
+      while it is refreshed in the background (default: 600)
+    - SEARCH_CACHE_TTL_SECONDS: How long cached search results stay valid (default: CACHE_TTL_SECONDS)
+    - SEARCH_CACHE_MAX_ENTRIES: Maximum number of cached search results per worker, kept apart from
+      the responses above (default: 128)
+    - DATA_VERSION_CHECK_SECONDS: How often to poll the ingestion version stamp (default: 30)
+    - HTTP_CACHE_MAX_AGE: max-age sent in Cache-Control for list responses (default: 60)
+    - MAX_PAGE_SIZE: Largest page size a client may request with limit= (default: 100)
+    - CHANGES_SETTLE_SECONDS: How old a change must be before type=changes hands it out, so writes
+      that commit out of updated_at order are not skipped (default: 60)
+    - DB_MAX_CONCURRENCY: Maximum number of Supabase queries in flight per worker (default: 16)
+    - MIRROR_PATH: Enables local read-replica mode - reads are served from a SQLite mirror at this path
+    - MIRROR_SYNC_SECONDS: How often the mirror pulls changes from Supabase (default: 300)
+    - LOG_LEVEL: DEBUG, INFO, WARNING, ERROR or OFF (default: INFO; per-request messages are DEBUG)
+    - HEALTH_CHECK_MAX_AGE_SECONDS: How long health probes reuse a database connectivity result (default: 30)
+    - SEARCH_INDEX_ON_STARTUP: Build the search index when a worker boots (default: true; set to
+      false for serverless, where the first search builds it instead)
+    - WARMUP_CATEGORIES: Comma-separated categories whose first-load bundles are cached at startup
+    - RATE_LIMIT_PER_SECOND: Sustained requests per second allowed per client (default: 10; 0 disables
+      rate limiting)
+    - RATE_LIMIT_BURST: Requests a client may make at once before being limited (default: 40)
+    - RATE_LIMIT_MAX_CLIENTS: Client buckets tracked per worker (default: 10000)
+    - RATE_LIMIT_TRUST_FORWARDED: Identify clients by the first X-Forwarded-For address; only enable
+      behind a proxy that sets it (default: false)
+    - RATE_LIMIT_API_KEYS: Comma-separated API keys that get their own bucket when sent as X-API-Key
+      (other keys are ignored and the client is limited by IP address)
+    - DB_MAX_PENDING, DB_RETRY_AFTER_SECONDS: Supabase admission control (see db.py)
+
+Supabase queries run in a bounded thread pool (see db.py) so a slow query
+never blocks the event loop for other requests.
+
+Cold starts are kept short: the Supabase client, python-dotenv and the mirror
+module are only loaded when they are needed, and the client is created in a
+worker thread right after startup. benchmarks/cold_start.py measures import
+time and time-to-first-response against a budget.
+
+In read-replica mode (MIRROR_PATH set) endpoints read from a local SQLite
+mirror (see mirror.py) that syncs incrementally on a schedule and as soon as
+ingest.py bumps the data version. Until the first sync finishes, reads fall
+back to Supabase. A pre-built mirror file also works without Supabase
+credentials, as a fully offline data source.
+
+Search is answered from an in-memory inverted index (see search_index.py)
+built at startup and rebuilt in the background whenever the data changes.
+Related videos are precomputed by ingest.py (see similarity.py); a request
+reads one related_videos row and the neighbors it lists.
+
+Responses carry an ETag; clients that send a matching If-None-Match header
+get an empty 304 Not Modified instead of the full payload. Bodies are
+serialized once per cache entry and gzip/brotli compressed on request
+(see serialization.py).
+
+Clients are rate limited with a token bucket each (see rate_limit.py), keyed
+by their X-API-Key header (if it is a configured key) or IP address, and get 429 Too Many Requests with
+Retry-After when they run dry. Health and metrics endpoints are exempt. When
+too many Supabase queries are already pending, new ones are refused and the
+request gets 503 Service Unavailable with Retry-After (cached responses are
+still served).
+
+Every request is timed and counted per route, and every Supabase call per
+operation; /metrics exposes the numbers in Prometheus text format (see
+metrics.py).
 """
 
+import asyncio
+import base64
+import json
+import logging
+import math
 import os
-from typing import List, Dict, Any, Optional
-from fastapi import FastAPI, HTTPException, Query
+import re
+import sys
+import time
+import anyio.to_thread
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Hashable, List, Mapping, Optional, Tuple
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+# Sibling modules are imported by bare name so this file works both as `index`
+# (uvicorn run from api/) and as `api.index` (serverless entry point). Modules
+# shared with ingest.py (tokenizer.py) live in the repository root.
+_API_DIR = os.path.dirname(os.path.abspath(__file__))
+_REPO_DIR = os.path.dirname(_API_DIR)
+if _API_DIR not in sys.path:
+    sys.path.insert(0, _API_DIR)
+if _REPO_DIR not in sys.path:
+    sys.path.append(_REPO_DIR)
+
+from db import (
+    DatabaseOverloaded, client_configured, get_client, pending_queries, run_blocking, run_query,
+    seconds_since_last_success
+)
+from metrics import (
+    CACHE_REFRESH_FAILURES, HTTP_ERRORS, HTTP_REQUEST_SECONDS, HTTP_REQUESTS, HTTP_RESPONSE_BYTES, REGISTRY
+)
+from rate_limit import TokenBucketLimiter, client_identity
+from records import VideoRecord, compact_rows
+from response_cache import CachedPayload, ResponseCache
+from search_index import SearchIndex
+from serialization import negotiate_encoding
+from singleflight import SingleFlight
+
+if TYPE_CHECKING:
+    from mirror import SQLiteMirror
+
+# Load environment variables from api/.env for local development. Deployments
+# set real environment variables, so python-dotenv is only imported when the
+# file exists.
+_ENV_FILE = os.path.join(_API_DIR, ".env")
+if os.path.exists(_ENV_FILE):
+    from dotenv import load_dotenv
+    load_dotenv(_ENV_FILE)
+
+# Logging: LOG_LEVEL=OFF silences the API's own messages entirely
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+logger = logging.getLogger("bracketstv.api")
+if LOG_LEVEL == "OFF":
+    logger.disabled = True
+else:
+    logger.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
+    if not logger.handlers:
+        _log_handler = logging.StreamHandler()
+        _log_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        logger.addHandler(_log_handler)
+        logger.propagate = False
+
+# Response cache configuration
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "300"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "512"))
+CACHE_MAX_STALE_SECONDS = float(os.getenv("CACHE_MAX_STALE_SECONDS", "600"))
+SEARCH_CACHE_TTL_SECONDS = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", str(CACHE_TTL_SECONDS)))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "128"))
+DATA_VERSION_CHECK_SECONDS = float(os.getenv("DATA_VERSION_CHECK_SECONDS", "30"))
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "60"))
+
+# Default and maximum number of videos returned per page
+VIDEOS_PAGE_SIZE = 50
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "100"))
+
+# Local read-replica mode
+MIRROR_PATH = os.getenv("MIRROR_PATH")
+MIRROR_SYNC_SECONDS = float(os.getenv("MIRROR_SYNC_SECONDS", "300"))
+
+# Health probes reuse a database connectivity result for this long
+HEALTH_CHECK_MAX_AGE_SECONDS = float(os.getenv("HEALTH_CHECK_MAX_AGE_SECONDS", "30"))
+
+# Background work started when a worker boots
+SEARCH_INDEX_ON_STARTUP = os.getenv("SEARCH_INDEX_ON_STARTUP", "true").lower() not in ("0", "false", "no")
+WARMUP_CATEGORIES = tuple(c.strip() for c in os.getenv("WARMUP_CATEGORIES", "").split(",") if c.strip())
+
+# Per-client rate limiting (RATE_LIMIT_PER_SECOND=0 turns it off)
+RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", "10"))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "40"))
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "10000"))
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() in ("1", "true", "yes")
+RATE_LIMIT_API_KEYS = frozenset(key.strip() for key in os.getenv("RATE_LIMIT_API_KEYS", "").split(",") if key.strip())
+
+# Probes and scrapes must keep working while a client is being limited
+RATE_LIMIT_EXEMPT_PATHS = ("/health", "/health/live", "/health/ready", "/metrics")
+
+# Page size the frontend requests on first load; warm-up caches exactly those responses
+WARMUP_PAGE_SIZE = 12
+
+# Supabase caps a single response at this many rows (PostgREST db-max-rows)
+SUPABASE_MAX_ROWS = 1000
+
+# Columns of the videos table that clients may request with fields=
+VIDEO_COLUMNS = (
+    'video_id', 'category', 'sub_category', 'title', 'description', 'channel_title',
+    'published_at', 'thumbnail_url', 'view_count', 'like_count', 'duration', 'tags', 'rank_score',
+    'updated_at'
+)
+
+# Every subcategory is sorted by the score ingest.py precomputes (see ranking.py)
+ORDER_COLUMN = 'rank_score'
+
+# Change stamp the database writes on every saved video; the delta feed pages by it
+CHANGE_COLUMN = 'updated_at'
+
+# Changes younger than this are held back from the delta feed: a row stamped
+# earlier may still be committing, and handing out a watermark past its stamp
+# would skip it for good
+CHANGES_SETTLE_SECONDS = float(os.getenv("CHANGES_SETTLE_SECONDS", "60"))
+
+# video_id values a cursor may carry; the filters interpolate it into PostgREST syntax
+CURSOR_VIDEO_ID = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+# Default projection for list views - everything the video cards render
+LIST_FIELDS = ('video_id', 'title', 'channel_title', 'published_at', 'thumbnail_url', 'view_count', 'duration')
+
+# Columns loaded to build the search index; search results return SEARCH_RESULT_FIELDS
+SEARCH_SOURCE_COLUMNS = LIST_FIELDS + ('category', 'sub_category', 'tags', 'description')
+SEARCH_RESULT_FIELDS = LIST_FIELDS + ('category', 'sub_category')
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -31,66 +237,388 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # In production, specify your frontend domain
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+# CORS middleware is added after enforce_rate_limit (see below), so that it
+# wraps the rate limiter and 429 responses carry CORS headers
+
+# The Supabase client is created on first use (see db.get_client)
+
+# Optional local SQLite mirror the endpoints read from instead of Supabase
+mirror: Optional["SQLiteMirror"] = None
+if MIRROR_PATH:
+    try:
+        from mirror import SQLiteMirror
+        mirror = SQLiteMirror(MIRROR_PATH)
+        logger.info(f"✅ Read mirror opened at {MIRROR_PATH}")
+    except Exception as e:
+        logger.error(f"Failed to open read mirror at {MIRROR_PATH}: {e}")
+        mirror = None
+
+_mirror_sync_task: Optional["asyncio.Task[None]"] = None
+
+# Cache for subcategory and video lists, invalidated when ingest.py bumps the data version
+response_cache = ResponseCache(
+    max_entries=CACHE_MAX_ENTRIES,
+    ttl_seconds=CACHE_TTL_SECONDS,
+    max_stale_seconds=CACHE_MAX_STALE_SECONDS
+)
+
+# Search results, kept apart so free-form queries cannot evict the list pages above
+# (keys include the index generation, so a rebuilt index never serves old results)
+search_cache = ResponseCache(
+    max_entries=SEARCH_CACHE_MAX_ENTRIES,
+    ttl_seconds=SEARCH_CACHE_TTL_SECONDS,
+    max_stale_seconds=0
 )
 
-# Initialize Supabase client
-try:
-    from supabase import create_client, Client
+# Coalesces concurrent cache misses for the same key into one Supabase query
+single_flight = SingleFlight()
+
+# Per-client token buckets checked before any request reaches the endpoints
+rate_limiter: Optional[TokenBucketLimiter] = None
+if RATE_LIMIT_PER_SECOND > 0:
+    rate_limiter = TokenBucketLimiter(RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST, RATE_LIMIT_MAX_CLIENTS)
+
+# In-memory full-text index; the generation number keys cached search results
+search_index: Optional[SearchIndex] = None
+_search_index_generation = 0
+_search_index_task: Optional["asyncio.Task[None]"] = None
+_last_version_check = 0.0
+
+# Latest database connectivity result served by the health endpoints
+_database_check: Optional[Dict[str, Any]] = None
+
+
+async def refresh_data_version() -> None:
+    """
+    Poll the data version stamp written by ingest.py and drop the cache if it changed.
+    
+    The stamp lives in the app_state table. It is read at most once every
+    DATA_VERSION_CHECK_SECONDS so the check itself stays off the hot path.
+    If the lookup fails, cached entries simply expire through their TTL.
+    """
+    global _last_version_check
+    
+    now = time.monotonic()
+    if now - _last_version_check < DATA_VERSION_CHECK_SECONDS:
+        return
+    
+    client = get_client()
+    if not client:
+        return
+    _last_version_check = now
+    
+    try:
+        response = await run_query(
+            client.table('app_state')
+            .select('value')
+            .eq('key', 'data_version')
+            .limit(1),
+            'data_version'
+        )
+    except Exception as e:
+        logger.warning(f"⚠️  Could not read data version: {e}")
+        return
+    
+    version = response.data[0]['value'] if response.data else None
+    if response_cache.bump_version(version):
+        logger.info(f"🔄 Data version is now '{version}', response cache cleared")
+        if mirror is not None:
+            # The search index is rebuilt once the mirror has the new rows
+            schedule_mirror_sync()
+        elif search_index is not None:
+            schedule_search_index_build()
+
+
+def active_mirror() -> Optional["SQLiteMirror"]:
+    """
+    Return the mirror to read from, or None to query Supabase.
+    
+    None when read-replica mode is off or the mirror has not finished its first sync.
+    """
+    if mirror is not None and mirror.is_ready():
+        return mirror
+    return None
+
+
+async def sync_mirror() -> None:
+    """
+    Pull the latest changes from Supabase into the read mirror.
+    
+    Cached responses are dropped afterwards if anything changed, so they are
+    rebuilt from the fresh mirror data.
+    """
+    client = await run_blocking(get_client)
+    if not client:
+        return
+    
+    try:
+        written = await run_blocking(mirror.sync, client, operation='mirror_sync')
+    except Exception as e:
+        logger.warning(f"⚠️  Read mirror sync failed: {e}")
+        return
+    
+    if written:
+        response_cache.clear()
+        logger.info(f"🔄 Read mirror synced {written} changed rows")
+        schedule_search_index_build()
+
+
+def schedule_mirror_sync() -> None:
+    """
+    Start a background mirror sync unless one is already running.
+    """
+    global _mirror_sync_task
+    
+    if mirror is None:
+        return
+    
+    if _mirror_sync_task is None or _mirror_sync_task.done():
+        _mirror_sync_task = asyncio.ensure_future(sync_mirror())
+
+
+async def mirror_sync_loop() -> None:
+    """
+    Keep the read mirror in sync on a fixed schedule.
+    """
+    while True:
+        schedule_mirror_sync()
+        await asyncio.sleep(MIRROR_SYNC_SECONDS)
+
+
+@app.on_event("startup")
+async def start_mirror_sync() -> None:
+    """
+    Start the periodic mirror sync when read-replica mode is enabled.
+    """
+    if mirror is not None and client_configured():
+        asyncio.ensure_future(mirror_sync_loop())
+
+
+async def load_search_documents() -> List[Dict[str, Any]]:
+    """
+    Load every video's searchable columns, from the mirror or by paging through Supabase.
+    """
+    source = active_mirror()
+    if source:
+        return source.all_videos(SEARCH_SOURCE_COLUMNS)
+    
+    client = await run_blocking(get_client)
+    if not client:
+        raise RuntimeError("Database connection not available")
+    
+    documents: List[Dict[str, Any]] = []
+    last_video_id = None
+    
+    while True:
+        query = client.table('videos').select(','.join(SEARCH_SOURCE_COLUMNS))
+        if last_video_id:
+            query = query.gt('video_id', last_video_id)
+        
+        rows = (await run_query(query.order('video_id').limit(SUPABASE_MAX_ROWS), 'search_documents')).data or []
+        documents.extend(rows)
+        
+        if len(rows) < SUPABASE_MAX_ROWS:
+            return documents
+        last_video_id = rows[-1]['video_id']
+
+
+async def build_search_index() -> None:
+    """
+    Build a fresh search index and swap it in once it is complete.
+    
+    The previous index keeps answering searches while the new one is built.
+    """
+    global search_index, _search_index_generation
+    
+    documents = await load_search_documents()
+    # Indexing is CPU-bound; a worker thread keeps the event loop responsive
+    index = await anyio.to_thread.run_sync(SearchIndex, documents, SEARCH_RESULT_FIELDS, VideoRecord)
+    
+    search_index = index
+    _search_index_generation += 1
+    logger.info(f"🔎 Search index built with {len(index)} videos")
+
+
+def schedule_search_index_build() -> "asyncio.Task[None]":
+    """
+    Start a background search index build unless one is already running.
+    """
+    global _search_index_task
+    
+    if _search_index_task is None or _search_index_task.done():
+        _search_index_task = asyncio.ensure_future(build_search_index())
+    
+    return _search_index_task
+
+
+@app.on_event("startup")
+async def start_search_index_build() -> None:
+    """
+    Build the search index in the background so the first search finds it ready.
+    """
+    if SEARCH_INDEX_ON_STARTUP and (client_configured() or active_mirror()):
+        schedule_search_index_build()
+
+
+async def load_cached(cache_key: Hashable, loader: Callable[[], Awaitable[Any]],
+                      cache: Optional[ResponseCache] = None) -> CachedPayload:
+    """
+    Return the cached payload for a key, loading it on a miss.
+    
+    Expired entries are served stale (up to CACHE_MAX_STALE_SECONDS past their
+    TTL) while one background task reloads them, so no request waits on
+    Supabase for a key that was cached recently. If the reload fails, the
+    stale payload keeps being served.
     
-    SUPABASE_URL = os.getenv("SUPABASE_URL")
-    SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+    Concurrent misses for the same key share one call to loader(), so a burst
+    of requests for a missing entry costs a single Supabase query.
+    
+    Args:
+        cache_key: Response cache key
+        loader: Coroutine function returning the response data to cache
+        cache: Cache to use (default: response_cache)
+    """
+    if cache is None:
+        cache = response_cache
     
-    if not SUPABASE_URL or not SUPABASE_KEY:
-        raise ValueError("SUPABASE_URL and SUPABASE_KEY environment variables are required")
+    async def load() -> CachedPayload:
+        version = cache.version
+        payload = CachedPayload(await loader())
+        cache.set(cache_key, payload, version=version)
+        return payload
     
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-    print("✅ Supabase client initialized successfully")
+    cached, refresh = cache.lookup(cache_key)
+    if cached is not None:
+        if refresh:
+            single_flight.start(cache_key, load).add_done_callback(log_refresh_failure)
+        return cached
     
-except ImportError:
-    print("ERROR: supabase-py not installed. Run: pip install supabase")
-    supabase = None
-except Exception as e:
-    print(f"ERROR: Failed to initialize Supabase client: {e}")
-    supabase = None
+    return await single_flight.do(cache_key, load)
+
+
+def log_refresh_failure(task: "asyncio.Task[Any]") -> None:
+    """
+    Record a failed background refresh; the stale entry stays in place until it is retried.
+    """
+    if task.cancelled() or task.exception() is None:
+        return
+    
+    error = task.exception()
+    CACHE_REFRESH_FAILURES.inc()
+    logger.warning(f"⚠️  Background refresh failed, serving stale data: {getattr(error, 'detail', error)}")
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check whether an If-None-Match header matches the given ETag.
+    
+    Handles lists of tags, the '*' wildcard, weak validators (W/"...") and the
+    per-encoding suffixes added by CachedPayload.etag_for, so a client that
+    cached the gzip body still matches after switching encodings.
+    """
+    if not if_none_match:
+        return False
+    
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        for suffix in ('-gzip"', '-br"'):
+            if candidate.endswith(suffix):
+                candidate = candidate[:-len(suffix)] + '"'
+        if candidate == '*' or candidate == etag:
+            return True
+    
+    return False
+
+
+def build_payload_response(request: Request, payload: CachedPayload) -> Response:
+    """
+    Turn a cached payload into an HTTP response with ETag and Cache-Control headers.
+    
+    The pre-serialized body is sent as-is, compressed with the best coding the
+    client accepts (compressed bytes are cached on the payload). Returns 304 Not
+    Modified with an empty body if the client already has this version.
+    """
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"), len(payload.body))
+    headers = {
+        "ETag": payload.etag_for(encoding),
+        "Cache-Control": f"public, max-age={HTTP_CACHE_MAX_AGE}",
+        "Vary": "Accept-Encoding",
+    }
+    
+    if etag_matches(request.headers.get("if-none-match"), payload.etag):
+        return Response(status_code=304, headers=headers)
+    
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    
+    return Response(content=payload.encoded(encoding), media_type="application/json", headers=headers)
 
 
 @app.get("/")
 async def get_data(
-    type: str = Query(..., description="Type of data to fetch: 'subcategories' or 'videos'"),
+    request: Request,
+    type: str = Query(..., description="Type of data to fetch: 'subcategories', 'videos', 'bundle', 'video', 'search', 'related' or 'changes'"),
     category: Optional[str] = Query(None, description="Category name (e.g., 'dsa', 'system_design')"),
-    subcategory: Optional[str] = Query(None, description="Subcategory name (e.g., 'Most Watched', 'Latest Uploads')")
+    subcategory: Optional[str] = Query(None, description="Subcategory name (e.g., 'Most Watched', 'Latest Uploads')"),
+    video_id: Optional[str] = Query(None, description="YouTube video ID for type=video and type=related"),
+    fields: Optional[str] = Query(None, description="Comma-separated video columns for list views, or 'all'"),
+    q: Optional[str] = Query(None, description="Search text for type=search"),
+    limit: int = Query(VIDEOS_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size (videos per page, or per subcategory in a bundle)"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+    since: Optional[str] = Query(None, description="ISO 8601 timestamp or a previous watermark for type=changes")
 ):
     """
-    Main API endpoint that handles two types of requests:
+    Main API endpoint that handles seven types of requests:
     
     1. Get subcategories: /?type=subcategories&category=dsa
-    2. Get videos: /?type=videos&category=dsa&subcategory=Most%20Watched
+    2. Get videos: /?type=videos&category=dsa&subcategory=Most%20Watched&limit=12
+       Returns {"videos": [...], "next_cursor": ...}; pass next_cursor back as cursor= for the next page.
+    3. Get a category bundle: /?type=bundle&category=dsa&limit=12
+    4. Get a single video: /?type=video&video_id=dQw4w9WgXcQ
+    5. Search the catalog: /?type=search&q=binary+trees&limit=20
+    6. Get related videos: /?type=related&video_id=dQw4w9WgXcQ&limit=6
+    7. Get changed videos: /?type=changes&since=2025-01-01T00:00:00Z&limit=100
+       Returns {"videos": [...], "watermark": ..., "has_more": ...}; pass watermark back as since=.
+    
+    Video lists return LIST_FIELDS unless fields= asks for other columns.
+    
+    All of them return an ETag and answer 304 Not Modified when If-None-Match matches.
     """
     
-    if not supabase:
+    if not active_mirror() and not get_client():
         raise HTTPException(status_code=500, detail="Database connection not available")
     
     try:
         if type == "subcategories":
-            return await get_subcategories(category)
+            payload = await get_subcategories(category)
         elif type == "videos":
-            return await get_videos(category, subcategory)
+            payload = await get_videos(category, subcategory, limit, cursor, parse_fields(fields))
+        elif type == "bundle":
+            payload = await get_bundle(category, limit, parse_fields(fields))
+        elif type == "video":
+            payload = await get_video(video_id)
+        elif type == "search":
+            payload = await search_videos(q, limit)
+        elif type == "related":
+            payload = await get_related(video_id, limit, parse_fields(fields))
+        elif type == "changes":
+            payload = await get_changes(since, limit, parse_fields(fields))
         else:
-            raise HTTPException(status_code=400, detail="Invalid type parameter. Use 'subcategories' or 'videos'")
+            raise HTTPException(status_code=400, detail="Invalid type parameter. Use 'subcategories', 'videos', 'bundle', 'video', 'search', 'related' or 'changes'")
+        
+        return build_payload_response(request, payload)
+    
+    except (HTTPException, DatabaseOverloaded):
+        raise
     
     except Exception as e:
-        print(f"Error in API endpoint: {e}")
+        logger.exception(f"Error in API endpoint: {e}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
-async def get_subcategories(category: Optional[str]) -> List[str]:
+async def get_subcategories(category: Optional[str]) -> CachedPayload:
     """
     Get subcategories for a given category.
     
@@ -98,44 +626,197 @@ async def get_subcategories(category: Optional[str]) -> List[str]:
         category: The main category (e.g., 'dsa', 'system_design')
     
     Returns:
-        List of subcategory names ordered by display_order
+        Cached payload holding the list of subcategory names ordered by display_order
     """
     if not category:
         raise HTTPException(status_code=400, detail="Category parameter is required for subcategories")
     
-    try:
-        # Query subcategories table ordered by display_order
-        response = supabase.table('subcategories')\
-            .select('name')\
-            .eq('main_category', category)\
-            .eq('is_active', True)\
-            .order('display_order', desc=False)\
-            .execute()
-        
-        if not response.data:
-            return []
-        
-        # Extract just the names
-        subcategory_names = [row['name'] for row in response.data]
-        
-        print(f"✅ Found {len(subcategory_names)} subcategories for category '{category}'")
-        return subcategory_names
+    async def load() -> List[str]:
+        try:
+            source = active_mirror()
+            if source:
+                subcategory_names = source.subcategory_names(category)
+            else:
+                # Query subcategories table ordered by display_order
+                response = await run_query(
+                    get_client().table('subcategories')
+                    .select('name')
+                    .eq('main_category', category)
+                    .eq('is_active', True)
+                    .order('display_order', desc=False),
+                    'subcategories'
+                )
+                
+                # Extract just the names
+                subcategory_names = [row['name'] for row in response.data or []]
+            
+            logger.debug(f"✅ Found {len(subcategory_names)} subcategories for category '{category}'")
+            return subcategory_names
+            
+        except DatabaseOverloaded:
+            raise
         
-    except Exception as e:
-        print(f"Error fetching subcategories: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to fetch subcategories: {str(e)}")
+        except Exception as e:
+            logger.error(f"Error fetching subcategories: {e}")
+            raise HTTPException(status_code=500, detail=f"Failed to fetch subcategories: {str(e)}")
+    
+    await refresh_data_version()
+    return await load_cached(('subcategories', category), load)
+
+
+def parse_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    """
+    Validate a fields= parameter and normalize it to a tuple of columns.
+    
+    Columns come back in VIDEO_COLUMNS order so equivalent requests share a cache entry.
+    
+    Raises:
+        HTTPException: 400 if an unknown column is requested
+    """
+    if not fields:
+        return LIST_FIELDS
+    
+    if fields.strip() == 'all':
+        return VIDEO_COLUMNS
+    
+    requested = {field.strip() for field in fields.split(',') if field.strip()}
+    unknown = requested.difference(VIDEO_COLUMNS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    
+    return tuple(column for column in VIDEO_COLUMNS if column in requested)
+
+
+def select_clause(fields: Tuple[str, ...], *required: str) -> str:
+    """
+    Build a select() column list from the requested fields plus columns the query needs internally.
+    """
+    wanted = set(fields).union(required)
+    return ','.join(column for column in VIDEO_COLUMNS if column in wanted)
+
+
+def project_rows(rows: List[Dict[str, Any]], fields: Tuple[str, ...]) -> List[VideoRecord]:
+    """
+    Cut rows down to the requested fields plus video_id, as compact VideoRecords.
+    
+    Drops the columns select_clause() added only for sorting and cursors.
+    """
+    columns = select_clause(fields, 'video_id').split(',')
+    return compact_rows({column: row.get(column) for column in columns} for row in rows)
+
+
+def encode_cursor(order_column: str, row: Mapping[str, Any]) -> str:
+    """
+    Build an opaque cursor pointing just past the given row.
+    
+    The cursor holds the sort key and video_id of the last row on a page, so the
+    next page can continue with a keyset filter instead of an OFFSET scan.
+    """
+    raw = json.dumps([order_column, row.get(order_column), row['video_id']], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, order_column: str) -> Tuple[Any, str]:
+    """
+    Decode a cursor produced by encode_cursor.
+    
+    Returns:
+        Tuple of (sort key value, video_id) of the last row on the previous page
+    
+    Every part is validated here, because apply_keyset_filter and get_changes
+    interpolate the values into PostgREST filter strings: the rank_score key
+    must be a number or null, the updated_at key an ISO 8601 timestamp, and
+    video_id must look like a video ID. A delta feed watermark may carry an
+    empty video_id (a since= timestamp nothing has changed after yet).
+    
+    Raises:
+        HTTPException: 400 if the cursor is malformed or belongs to another sort order
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        column, value, video_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    if column != order_column or not isinstance(video_id, str):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    if not CURSOR_VIDEO_ID.match(video_id) and not (video_id == '' and column == CHANGE_COLUMN):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    if column == CHANGE_COLUMN:
+        valid_value = isinstance(value, str) and _is_timestamp(value)
+    else:
+        valid_value = value is None or (
+            isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+        )
+    if not valid_value:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    return value, video_id
+
+
+def _is_timestamp(value: str) -> bool:
+    try:
+        datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return False
+    return True
+
+
+def order_videos_query(query, order_column: str):
+    """
+    Apply the keyset sort order: sort key descending (nulls last), then video_id as tiebreaker.
+    """
+    return query.order(order_column, desc=True, nullsfirst=False).order('video_id', desc=True)
+
+
+def apply_keyset_filter(query, order_column: str, value: Any, video_id: str):
+    """
+    Restrict a query to the rows that sort after (value, video_id).
+    
+    Mirrors order_videos_query: rows with a smaller sort key, rows with the same
+    key and a smaller video_id, and finally rows with a NULL sort key.
+    """
+    if value is None:
+        return query.is_(order_column, 'null').lt('video_id', video_id)
+    
+    return query.or_(
+        f'{order_column}.lt."{value}",'
+        f'and({order_column}.eq."{value}",video_id.lt."{video_id}"),'
+        f'{order_column}.is.null'
+    )
 
 
-async def get_videos(category: Optional[str], subcategory: Optional[str]) -> List[Dict[str, Any]]:
+def build_video_page(rows: List[Dict[str, Any]], limit: int, order_column: str,
+                     fields: Tuple[str, ...]) -> Dict[str, Any]:
     """
-    Get videos for a given category and subcategory.
+    Turn up to limit + 1 sorted rows into a page and its next_cursor.
+    
+    The extra row is only fetched to tell whether another page exists. Videos
+    hold only the requested fields and are kept as compact VideoRecords, since
+    pages live on in the response cache.
+    """
+    page = rows[:limit]
+    next_cursor = encode_cursor(order_column, page[-1]) if len(rows) > limit else None
+    return {"videos": project_rows(page, fields), "next_cursor": next_cursor}
+
+
+async def get_videos(category: Optional[str], subcategory: Optional[str],
+                     limit: int = VIDEOS_PAGE_SIZE, cursor: Optional[str] = None,
+                     fields: Tuple[str, ...] = LIST_FIELDS) -> CachedPayload:
+    """
+    Get one page of videos for a given category and subcategory.
     
     Args:
         category: The main category (e.g., 'dsa', 'system_design')
         subcategory: The subcategory (e.g., 'Most Watched', 'Latest Uploads')
+        limit: Number of videos per page
+        cursor: next_cursor from the previous page, or None for the first page
+        fields: Columns to return for each video (video_id is always included)
     
     Returns:
-        List of video objects
+        Cached payload of the form {"videos": [...], "next_cursor": ...}
     """
     if not category:
         raise HTTPException(status_code=400, detail="Category parameter is required for videos")
@@ -143,55 +824,718 @@ async def get_videos(category: Optional[str], subcategory: Optional[str]) -> Lis
     if not subcategory:
         raise HTTPException(status_code=400, detail="Subcategory parameter is required for videos")
     
+    order_column = ORDER_COLUMN
+    keyset = decode_cursor(cursor, order_column) if cursor else None
+    
+    async def load() -> Dict[str, Any]:
+        try:
+            columns = select_clause(fields, 'video_id', order_column)
+            source = active_mirror()
+            
+            # Fetch one extra row to know whether there is a next page
+            if source:
+                rows = source.video_page(category, subcategory, order_column, limit + 1, keyset, columns.split(','))
+            else:
+                # Query videos table in rank order
+                query = get_client().table('videos')\
+                    .select(columns)\
+                    .eq('category', category)\
+                    .eq('sub_category', subcategory)
+                
+                if keyset:
+                    query = apply_keyset_filter(query, order_column, *keyset)
+                
+                response = await run_query(order_videos_query(query, order_column).limit(limit + 1), 'videos_page')
+                rows = response.data or []
+            
+            page = build_video_page(rows, limit, order_column, fields)
+            
+            if not rows:
+                logger.debug(f"⚠️  No videos found for category '{category}' and subcategory '{subcategory}'")
+            else:
+                logger.debug(f"✅ Found {len(page['videos'])} videos for '{category}' -> '{subcategory}'")
+            return page
+            
+        except DatabaseOverloaded:
+            raise
+        
+        except Exception as e:
+            logger.error(f"Error fetching videos: {e}")
+            raise HTTPException(status_code=500, detail=f"Failed to fetch videos: {str(e)}")
+    
+    await refresh_data_version()
+    return await load_cached(('videos', category, subcategory, limit, cursor, fields), load)
+
+
+async def get_bundle(category: Optional[str], limit: int = VIDEOS_PAGE_SIZE,
+                     fields: Tuple[str, ...] = LIST_FIELDS) -> CachedPayload:
+    """
+    Get a category's subcategories together with the first page of videos for each.
+    
+    This replaces the subcategories -> videos request waterfall on the frontend.
+    First pages already in the cache are reused; the rest are loaded through the
+    videos_bundle database function, which returns the first limit + 1 rows of
+    every subcategory, so the whole bundle is usually a single query.
+    
+    Args:
+        category: The main category (e.g., 'dsa', 'system_design')
+        limit: Number of videos to include per subcategory
+        fields: Columns to return for each video
+    
+    Returns:
+        Cached payload of the form
+        {"category": ..., "subcategories": [{"name": ..., "videos": [...], "next_cursor": ...}, ...]}
+    """
+    if not category:
+        raise HTTPException(status_code=400, detail="Category parameter is required for bundles")
+    
+    async def load() -> Dict[str, Any]:
+        subcategory_names = (await get_subcategories(category)).data
+        version = response_cache.version
+        
+        pages: Dict[str, Dict[str, Any]] = {}
+        names: List[str] = []
+        order_column = ORDER_COLUMN
+        
+        for name in subcategory_names:
+            cached_page = response_cache.get(('videos', category, name, limit, None, fields))
+            if cached_page is not None:
+                pages[name] = cached_page.data
+            else:
+                names.append(name)
+        
+        try:
+            source = active_mirror()
+            
+            if names and source:
+                # Local reads are cheap enough to do one per subcategory
+                columns = select_clause(fields, 'video_id', order_column).split(',')
+                for name in names:
+                    rows = source.video_page(category, name, order_column, limit + 1, None, columns)
+                    pages[name] = build_video_page(rows, limit, order_column, fields)
+                    response_cache.set(('videos', category, name, limit, None, fields), CachedPayload(pages[name]), version=version)
+            
+            elif names:
+                # limit + 1 rows per subcategory still missing, so each page knows if it
+                # has a successor; as many subcategories per query as fit under the row cap
+                # (build_video_page drops sub_category again: pages are cached under
+                # get_videos' keys, so they must hold exactly its columns)
+                columns = select_clause(fields, 'video_id', 'sub_category', order_column)
+                per_query = max(1, SUPABASE_MAX_ROWS // (limit + 1))
+                grouped: Dict[str, List[Dict[str, Any]]] = {name: [] for name in names}
+                
+                for start in range(0, len(names), per_query):
+                    query = get_client().rpc('videos_bundle', {
+                        'p_category': category,
+                        'p_sub_categories': names[start:start + per_query],
+                        'p_per_subcategory': limit + 1,
+                    }).select(columns)
+                    response = await run_query(order_videos_query(query, order_column), 'videos_bundle')
+                    
+                    for row in response.data or []:
+                        group = grouped.get(row.get('sub_category'))
+                        if group is not None:
+                            group.append(row)
+                
+                for name, group in grouped.items():
+                    pages[name] = build_video_page(group, limit, order_column, fields)
+                    response_cache.set(('videos', category, name, limit, None, fields), CachedPayload(pages[name]), version=version)
+            
+        except (HTTPException, DatabaseOverloaded):
+            raise
+        
+        except Exception as e:
+            logger.error(f"Error fetching bundle: {e}")
+            raise HTTPException(status_code=500, detail=f"Failed to fetch bundle: {str(e)}")
+        
+        logger.debug(f"✅ Built bundle for '{category}' with {len(subcategory_names)} subcategories")
+        return {
+            "category": category,
+            "subcategories": [
+                {"name": name, **pages.get(name, {"videos": [], "next_cursor": None})}
+                for name in subcategory_names
+            ]
+        }
+    
+    await refresh_data_version()
+    return await load_cached(('bundle', category, limit, fields), load)
+
+
+async def get_video(video_id: Optional[str]) -> CachedPayload:
+    """
+    Get the full record for a single video.
+    
+    List views only carry the compact LIST_FIELDS projection; this is where
+    the player fetches the description, tags and other detail columns.
+    
+    Args:
+        video_id: YouTube video ID
+    
+    Returns:
+        Cached payload holding the video object
+    """
+    if not video_id:
+        raise HTTPException(status_code=400, detail="video_id parameter is required for video")
+    
+    async def load() -> Dict[str, Any]:
+        try:
+            source = active_mirror()
+            if source:
+                video = source.video(video_id)
+            else:
+                response = await run_query(
+                    get_client().table('videos')
+                    .select('*')
+                    .eq('video_id', video_id)
+                    .limit(1),
+                    'video'
+                )
+                video = response.data[0] if response.data else None
+            
+        except DatabaseOverloaded:
+            raise
+        
+        except Exception as e:
+            logger.error(f"Error fetching video: {e}")
+            raise HTTPException(status_code=500, detail=f"Failed to fetch video: {str(e)}")
+        
+        if not video:
+            raise HTTPException(status_code=404, detail=f"Video '{video_id}' not found")
+        
+        return video
+    
+    await refresh_data_version()
+    return await load_cached(('video', video_id), load)
+
+
+async def get_related(video_id: Optional[str], limit: int = VIDEOS_PAGE_SIZE,
+                      fields: Tuple[str, ...] = LIST_FIELDS) -> CachedPayload:
+    """
+    Get the videos most similar to a video, from the index ingest.py precomputes.
+    
+    Costs two primary key lookups whatever the catalog size: the video's
+    related_videos row, then the listed neighbors.
+    
+    Args:
+        video_id: YouTube video ID
+        limit: Maximum number of related videos (at most the number ingest.py stores)
+        fields: Columns to return for each video
+    
+    Returns:
+        Cached payload of the form {"video_id": ..., "videos": [...]}, most similar
+        first, each video with its similarity "score"
+    """
+    if not video_id:
+        raise HTTPException(status_code=400, detail="video_id parameter is required for related")
+    
+    async def load() -> Dict[str, Any]:
+        try:
+            columns = select_clause(fields, 'video_id')
+            source = active_mirror()
+            if source:
+                related = source.related(video_id)
+                neighbors = (related or [])[:limit]
+                rows = source.videos_by_id([n['video_id'] for n in neighbors], columns.split(','))
+            else:
+                response = await run_query(
+                    get_client().table('related_videos')
+                    .select('related')
+                    .eq('video_id', video_id)
+                    .limit(1),
+                    'related'
+                )
+                related = response.data[0]['related'] if response.data else None
+                neighbors = (related or [])[:limit]
+                rows = []
+                if neighbors:
+                    response = await run_query(
+                        get_client().table('videos')
+                        .select(columns)
+                        .in_('video_id', [n['video_id'] for n in neighbors]),
+                        'related_videos'
+                    )
+                    rows = response.data or []
+            
+        except DatabaseOverloaded:
+            raise
+        
+        except Exception as e:
+            logger.error(f"Error fetching related videos: {e}")
+            raise HTTPException(status_code=500, detail=f"Failed to fetch related videos: {str(e)}")
+        
+        if related is None:
+            raise HTTPException(status_code=404, detail=f"No related videos for video '{video_id}'")
+        
+        # Neighbors deleted since the index was built are skipped
+        by_id = {row['video_id']: row for row in rows}
+        videos = [
+            VideoRecord({**by_id[n['video_id']], "score": n['score']}) for n in neighbors if n['video_id'] in by_id
+        ]
+        
+        logger.debug(f"✅ Found {len(videos)} related videos for '{video_id}'")
+        return {"video_id": video_id, "videos": videos}
+    
+    await refresh_data_version()
+    return await load_cached(('related', video_id, limit, fields), load)
+
+
+def parse_since(since: str) -> Tuple[str, str]:
+    """
+    Turn a since= value into the (updated_at, video_id) position the delta feed resumes after.
+    
+    Accepts a watermark from a previous type=changes response, or an ISO 8601
+    timestamp (changes at or after that moment).
+    
+    Raises:
+        HTTPException: 400 if it is neither
+    """
     try:
-        # Query videos table with dynamic ordering based on subcategory
-        query = supabase.table('videos')\
-            .select('*')\
-            .eq('category', category)\
-            .eq('sub_category', subcategory)
-        
-        # Order by view_count for "Most Watched" subcategories, otherwise by published_at
-        if subcategory == "Most Watched":
-            query = query.order('view_count', desc=True)
-        else:
-            query = query.order('published_at', desc=True)
+        moment = datetime.fromisoformat(since.replace('Z', '+00:00'))
+    except ValueError:
+        return decode_cursor(since, CHANGE_COLUMN)
+    
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    # An empty video_id sorts before every real one, so rows stamped exactly at `moment` are included
+    return moment.astimezone(timezone.utc).isoformat(), ''
+
+
+def changes_horizon(source: Optional["SQLiteMirror"]) -> str:
+    """
+    Newest updated_at the delta feed may hand out right now.
+    
+    Stamps are taken before their write commits, so writes can become visible
+    out of stamp order. Only changes older than CHANGES_SETTLE_SECONDS are
+    served; every write stamped that long ago has committed. From the mirror,
+    that is counted from the start of its last sync instead of from now.
+    """
+    horizon = datetime.now(timezone.utc)
+    if source is not None and source.last_sync_started_at:
+        synced = datetime.fromisoformat(source.last_sync_started_at)
+        horizon = min(horizon, synced)
+    return (horizon - timedelta(seconds=CHANGES_SETTLE_SECONDS)).isoformat()
+
+
+async def get_changes(since: Optional[str], limit: int = VIDEOS_PAGE_SIZE,
+                      fields: Tuple[str, ...] = LIST_FIELDS) -> CachedPayload:
+    """
+    Get the videos inserted or updated after a watermark, oldest change first.
+    
+    Pages through the updated_at stamp the database writes on every saved
+    video (keyset on updated_at, video_id), so a client refresh only transfers
+    what changed. Changes show up once they are CHANGES_SETTLE_SECONDS old
+    (see changes_horizon), so no watermark ever passes a write that has not
+    committed yet. Deleted videos are not reported.
+    
+    Args:
+        since: ISO 8601 timestamp, or the watermark from the previous response
+        limit: Maximum number of videos per response
+        fields: Columns to return for each video (video_id is always included)
+    
+    Returns:
+        Cached payload of the form {"videos": [...], "watermark": ..., "has_more": ...}.
+        Pass watermark back as since= to continue; while has_more is true,
+        more changes are available right away.
+    """
+    if not since:
+        raise HTTPException(status_code=400, detail="since parameter is required for changes")
+    
+    position = parse_since(since)
+    
+    async def load() -> Dict[str, Any]:
+        try:
+            columns = select_clause(fields, 'video_id', CHANGE_COLUMN)
+            source = active_mirror()
+            until = changes_horizon(source)
+            
+            # Fetch one extra row to know whether more changes are waiting
+            if source:
+                rows = source.changes(position, until, limit + 1, columns.split(','))
+            else:
+                updated_at, video_id = position
+                query = get_client().table('videos')\
+                    .select(columns)\
+                    .or_(
+                        f'{CHANGE_COLUMN}.gt."{updated_at}",'
+                        f'and({CHANGE_COLUMN}.eq."{updated_at}",video_id.gt."{video_id}")'
+                    )\
+                    .lte(CHANGE_COLUMN, until)\
+                    .order(CHANGE_COLUMN)\
+                    .order('video_id')\
+                    .limit(limit + 1)
+                response = await run_query(query, 'changes')
+                rows = response.data or []
             
-        response = query.limit(50).execute()
+        except DatabaseOverloaded:
+            raise
         
-        if not response.data:
-            print(f"⚠️  No videos found for category '{category}' and subcategory '{subcategory}'")
-            return []
+        except Exception as e:
+            logger.error(f"Error fetching changes: {e}")
+            raise HTTPException(status_code=500, detail=f"Failed to fetch changes: {str(e)}")
         
-        print(f"✅ Found {len(response.data)} videos for '{category}' -> '{subcategory}'")
-        return response.data
+        changed = rows[:limit]
+        videos = project_rows(changed, fields)
+        # Nothing new: hand the same position back so the client keeps polling from it
+        watermark = encode_cursor(CHANGE_COLUMN, changed[-1]) if changed else \
+            encode_cursor(CHANGE_COLUMN, {CHANGE_COLUMN: position[0], 'video_id': position[1]})
         
-    except Exception as e:
-        print(f"Error fetching videos: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to fetch videos: {str(e)}")
+        logger.debug(f"✅ Found {len(videos)} changed videos since {position[0]}")
+        return {"videos": videos, "watermark": watermark, "has_more": len(rows) > limit}
+    
+    await refresh_data_version()
+    return await load_cached(('changes', position, limit, fields), load)
+
+
+async def search_videos(q: Optional[str], limit: int = VIDEOS_PAGE_SIZE) -> CachedPayload:
+    """
+    Full-text search over title, tags, channel and description.
+    
+    Answered from the in-memory search index; only the very first search on a
+    fresh worker waits for the index build. Queries run in a worker thread,
+    so a slow one does not hold up other requests, and results are cached in
+    search_cache.
+    
+    Args:
+        q: Search text (the last word may be partial)
+        limit: Maximum number of results (default: VIDEOS_PAGE_SIZE, like the list endpoints)
+    
+    Returns:
+        Cached payload of the form {"query": ..., "results": [...]}, best match first
+    """
+    if not q or not q.strip():
+        raise HTTPException(status_code=400, detail="q parameter is required for search")
+    
+    if search_index is None:
+        try:
+            await asyncio.shield(schedule_search_index_build())
+        except Exception as e:
+            logger.error(f"Error building search index: {e}")
+            raise HTTPException(status_code=503, detail="Search index is not available yet")
+    
+    index = search_index
+    query = ' '.join(q.lower().split())
+    
+    async def load() -> Dict[str, Any]:
+        matches = await anyio.to_thread.run_sync(index.search, query, limit)
+        results = [VideoRecord({**document, "score": round(score, 4)}) for score, document in matches]
+        return {"query": q, "results": results}
+    
+    return await load_cached(('search', _search_index_generation, query, limit), load, search_cache)
+
+
+async def warm_up(categories: Tuple[str, ...] = WARMUP_CATEGORIES) -> None:
+    """
+    Create the Supabase client and pre-fill the cache for the given categories.
+    
+    The client is built in a worker thread so the event loop keeps serving.
+    For each category, the bundle the frontend requests on first load is
+    loaded, which also caches the first page of every subcategory. Warm-up is
+    best effort: failures are logged and skipped.
+    """
+    await run_blocking(get_client)
+    
+    for category in categories:
+        try:
+            await get_bundle(category, WARMUP_PAGE_SIZE, LIST_FIELDS)
+            logger.info(f"🔥 Warmed up cache for '{category}'")
+        except Exception as e:
+            logger.warning(f"⚠️  Warm-up failed for '{category}': {e}")
+
+
+@app.on_event("startup")
+async def start_warm_up() -> None:
+    """
+    Run warm_up() in the background so startup itself is not delayed.
+    """
+    if client_configured() or active_mirror():
+        asyncio.ensure_future(warm_up())
+
+
+# Values kept by the cache and single-flight layers, read when /metrics is scraped
+REGISTRY.callback(
+    'bracketstv_cache_requests_total', 'Response cache lookups by result', 'counter',
+    lambda: {('hit',): response_cache.hits, ('stale',): response_cache.stale_hits, ('miss',): response_cache.misses},
+    ('result',)
+)
+REGISTRY.callback(
+    'bracketstv_cache_entries', 'Responses currently cached', 'gauge',
+    lambda: {(): len(response_cache)}
+)
+REGISTRY.callback(
+    'bracketstv_singleflight_shared_total', 'Requests that reused an in-flight load instead of querying', 'counter',
+    lambda: {(): single_flight.shared}
+)
+REGISTRY.callback(
+    'bracketstv_search_index_documents', 'Videos in the in-memory search index', 'gauge',
+    lambda: {(): len(search_index) if search_index is not None else 0}
+)
+
+REGISTRY.callback(
+    'bracketstv_rate_limit_requests_total', 'Requests checked by the per-client rate limiter by result', 'counter',
+    lambda: {('allowed',): rate_limiter.allowed, ('rejected',): rate_limiter.rejected} if rate_limiter else {},
+    ('result',)
+)
+REGISTRY.callback(
+    'bracketstv_rate_limit_clients', 'Clients with a rate limit bucket in memory', 'gauge',
+    lambda: {(): len(rate_limiter) if rate_limiter else 0}
+)
+REGISTRY.callback(
+    'bracketstv_db_pending_queries', 'Supabase queries running or waiting for a worker thread', 'gauge',
+    lambda: {(): pending_queries()}
+)
+
+# Values of type= that get their own route label; anything else is grouped as 'invalid'
+API_TYPES = ('subcategories', 'videos', 'bundle', 'video', 'search', 'related', 'changes')
+
+
+def route_label(request: Request) -> str:
+    """
+    Metrics label for a request: the matched route path, split by type= for the main endpoint.
+    
+    Unknown paths are grouped under 'unmatched' so the label set stays bounded.
+    """
+    route = request.scope.get("route")
+    path = getattr(route, "path", None)
+    if path is None and request.url.path == "/":
+        # Rejected before routing (e.g. rate limited)
+        path = "/"
+    if path is None:
+        return "unmatched"
+    
+    if path == "/":
+        request_type = request.query_params.get("type")
+        return f"/?type={request_type if request_type in API_TYPES else 'invalid'}"
+    
+    return path
+
+
+def retry_after_header(seconds: float) -> Dict[str, str]:
+    """Retry-After header for a wait in seconds, rounded up to a whole second."""
+    return {"Retry-After": str(max(1, math.ceil(seconds)))}
+
+
+# Registered before record_request_metrics so that 429 responses are still recorded
+@app.middleware("http")
+async def enforce_rate_limit(request: Request, call_next):
+    """
+    Reject clients that have used up their token bucket with 429 and Retry-After.
+    """
+    # CORS preflights are answered before reaching here; skip any stray OPTIONS too
+    if rate_limiter is None or request.method == "OPTIONS" or request.url.path in RATE_LIMIT_EXEMPT_PATHS:
+        return await call_next(request)
+    
+    client = client_identity(
+        request.headers, request.client.host if request.client else None, RATE_LIMIT_TRUST_FORWARDED,
+        RATE_LIMIT_API_KEYS
+    )
+    wait = rate_limiter.acquire(client)
+    if wait > 0:
+        logger.debug(f"⏳ Rate limited {client} for {wait:.2f}s")
+        return JSONResponse(
+            {"detail": "Rate limit exceeded"}, status_code=429, headers=retry_after_header(wait)
+        )
+    
+    return await call_next(request)
+
+
+# Add CORS middleware. Middleware added later runs first: CORS wraps the rate
+# limiter (browsers can read its 429s and Retry-After) and is itself inside
+# record_request_metrics
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],  # In production, specify your frontend domain
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=["Retry-After"],
+)
+
+
+@app.exception_handler(DatabaseOverloaded)
+async def database_overloaded(request: Request, exc: DatabaseOverloaded):
+    """
+    Shed load with 503 and Retry-After when too many Supabase queries are pending.
+    """
+    logger.debug(f"⚠️  {exc}")
+    return JSONResponse(
+        {"detail": "Service overloaded, retry later"}, status_code=503, headers=retry_after_header(exc.retry_after)
+    )
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """
+    Record latency, status and response size for every request.
+    """
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except Exception:
+        route = route_label(request)
+        HTTP_REQUESTS.inc(route, "500")
+        HTTP_ERRORS.inc(route, "500")
+        raise
+    
+    route = route_label(request)
+    status = str(response.status_code)
+    HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, route, request.method)
+    HTTP_REQUESTS.inc(route, status)
+    HTTP_RESPONSE_BYTES.observe(int(response.headers.get("content-length", 0)), route)
+    if response.status_code >= 400:
+        HTTP_ERRORS.inc(route, status)
+    
+    return response
+
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus metrics in the text exposition format.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+async def check_database() -> Dict[str, Any]:
+    """
+    Report whether Supabase is reachable, re-probing at most once per HEALTH_CHECK_MAX_AGE_SECONDS.
+    
+    Any query that succeeded within the window counts as proof of
+    connectivity, so under normal traffic probes never reach the database.
+    Otherwise one probe query runs and its result is cached; concurrent
+    probes share it.
+    """
+    global _database_check
+    
+    now = time.monotonic()
+    if _database_check and now - _database_check["checked_at"] < HEALTH_CHECK_MAX_AGE_SECONDS:
+        return _database_check
+    
+    since_success = seconds_since_last_success()
+    if since_success is not None and since_success < HEALTH_CHECK_MAX_AGE_SECONDS:
+        _database_check = {"connected": True, "error": None, "checked_at": now - since_success}
+        return _database_check
+    
+    async def probe() -> Dict[str, Any]:
+        global _database_check
+        
+        client = get_client()
+        if not client:
+            result = {"connected": False, "error": "Database connection not available"}
+        else:
+            try:
+                await run_query(client.table('subcategories').select('count').limit(1), 'health')
+                result = {"connected": True, "error": None}
+            except Exception as e:
+                result = {"connected": False, "error": f"Database connection failed: {str(e)}"}
+        
+        _database_check = {**result, "checked_at": time.monotonic()}
+        return _database_check
+    
+    return await single_flight.do(('health', 'database'), probe)
+
+
+def data_freshness() -> Dict[str, Any]:
+    """
+    How current the served data is: the ingestion version stamp and the mirror's last sync.
+    """
+    freshness: Dict[str, Any] = {
+        "data_version": response_cache.version,
+        "data_version_checked_seconds_ago": (
+            round(time.monotonic() - _last_version_check, 1) if _last_version_check else None
+        ),
+    }
+    if mirror is not None:
+        freshness["mirror"] = {"ready": mirror.is_ready(), "last_synced_at": mirror.last_synced_at}
+    return freshness
+
+
+def cache_warmth() -> Dict[str, Any]:
+    """
+    How much the response cache and search index currently hold.
+    """
+    stats = response_cache.stats()
+    served = stats["hits"] + stats["stale_hits"]
+    lookups = served + stats["misses"]
+    return {
+        "entries": stats["entries"],
+        "max_entries": stats["max_entries"],
+        "hit_ratio": round(served / lookups, 3) if lookups else None,
+        "stale_hits": stats["stale_hits"],
+        "search_cache_entries": len(search_cache),
+        "search_index_documents": len(search_index) if search_index is not None else 0,
+    }
+
+
+@app.get("/health/live")
+async def liveness():
+    """
+    Liveness probe: the process is up and serving. Does no I/O.
+    """
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def readiness():
+    """
+    Readiness probe: can this worker serve data?
+    
+    Ready when Supabase was reachable within the last HEALTH_CHECK_MAX_AGE_SECONDS
+    or the read mirror can serve on its own. Returns 503 when not ready, and
+    reports cache warmth and data freshness either way.
+    """
+    database = await check_database()
+    serving_from_mirror = active_mirror() is not None
+    ready = database["connected"] or serving_from_mirror
+    
+    body = {
+        "status": "ready" if ready else "unavailable",
+        "database": {
+            "connected": database["connected"],
+            "error": database["error"],
+            "checked_seconds_ago": round(time.monotonic() - database["checked_at"], 1),
+        },
+        "serving_from_mirror": serving_from_mirror,
+        "cache": cache_warmth(),
+        "freshness": data_freshness(),
+    }
+    return JSONResponse(body, status_code=200 if ready else 503)
 
 
 @app.get("/health")
 async def health_check():
     """
     Health check endpoint to verify API and database connectivity.
+    
+    Uses the same cached database check as /health/ready, so frequent probes
+    do not each cost a query.
     """
-    if not supabase:
-        return {"status": "error", "message": "Database connection not available"}
+    mirror_status = None
+    if mirror is not None:
+        mirror_status = {"ready": mirror.is_ready(), "last_synced_at": mirror.last_synced_at}
     
-    try:
-        # Test database connection with a simple query
-        response = supabase.table('subcategories').select('count').limit(1).execute()
+    database = await check_database()
+    if database["connected"]:
         return {
             "status": "healthy",
             "message": "API and database are working",
-            "database_connected": True
+            "database_connected": True,
+            "mirror": mirror_status
         }
-    except Exception as e:
+    
+    if active_mirror():
         return {
-            "status": "error", 
-            "message": f"Database connection failed: {str(e)}",
-            "database_connected": False
+            "status": "healthy",
+            "message": "Serving from the offline read mirror",
+            "database_connected": False,
+            "mirror": mirror_status
         }
+    
+    return {
+        "status": "error",
+        "message": database["error"],
+        "database_connected": False,
+        "mirror": mirror_status
+    }
 
 
 if __name__ == "__main__":
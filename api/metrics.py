@@ -0,0 +1,175 @@
+"""
+BracketsTV API Metrics
+======================
+
+A small, dependency-free metrics registry rendered in the Prometheus text
+exposition format at /metrics.
+
+Request latency, response size, error counts and Supabase query timings are
+recorded as they happen. Values that already live elsewhere (cache hit/miss
+counters, cache size, ...) are registered as callbacks and read only when
+/metrics is scraped, so they cost nothing on the request path.
+"""
+
+import threading
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class Counter:
+    """A monotonically increasing count, optionally split by labels."""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            yield f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}'
+
+
+class Histogram:
+    """Cumulative-bucket histogram, optionally split by labels."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (+Inf last), sum, count]
+        self._values: Dict[LabelValues, List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._values[labels] = state
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = [(labels, (list(state[0]), state[1], state[2])) for labels, state in self._values.items()]
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                yield f'{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}'
+            yield f'{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}'
+            yield f'{self.name}_count{_format_labels(self.labelnames, labels)} {count}'
+
+
+class CallbackMetric:
+    """A counter or gauge whose values are read from a callback at scrape time."""
+
+    def __init__(self, name: str, help_text: str, kind: str,
+                 callback: Callable[[], Dict[LabelValues, float]], labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self._callback = callback
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in self._callback().items():
+            yield f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}'
+
+
+class Registry:
+    """Holds every metric and renders them in Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: List = []
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help_text, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help_text, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def callback(self, name: str, help_text: str, kind: str,
+                 callback: Callable[[], Dict[LabelValues, float]], labelnames: Sequence[str] = ()) -> None:
+        self._metrics.append(CallbackMetric(name, help_text, kind, callback, labelnames))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.help_text}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    'bracketstv_http_request_duration_seconds', 'HTTP request latency by route', ('route', 'method')
+)
+HTTP_RESPONSE_BYTES = REGISTRY.histogram(
+    'bracketstv_http_response_size_bytes', 'HTTP response body size by route', ('route',), SIZE_BUCKETS
+)
+HTTP_REQUESTS = REGISTRY.counter(
+    'bracketstv_http_requests_total', 'HTTP requests by route and status code', ('route', 'status')
+)
+HTTP_ERRORS = REGISTRY.counter(
+    'bracketstv_http_errors_total', 'HTTP responses with a 4xx/5xx status by route', ('route', 'status')
+)
+DB_QUERY_SECONDS = REGISTRY.histogram(
+    'bracketstv_db_query_duration_seconds', 'Supabase call latency by operation', ('operation',)
+)
+DB_ERRORS = REGISTRY.counter(
+    'bracketstv_db_errors_total', 'Failed Supabase calls by operation', ('operation',)
+)
+CACHE_REFRESH_FAILURES = REGISTRY.counter(
+    'bracketstv_cache_refresh_failures_total', 'Background refreshes of stale cache entries that failed'
+)
+DB_SHED = REGISTRY.counter(
+    'bracketstv_db_shed_total', 'Supabase calls refused because too many were already pending', ('operation',)
+)
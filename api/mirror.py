@@ -0,0 +1,395 @@
+"""
+BracketsTV Local Read Mirror
+============================
+
+An embedded SQLite copy of the `videos`, `related_videos` and `subcategories`
+tables that the API
+can answer reads from instead of calling Supabase. Queries against the local
+file take well under a millisecond, and the API keeps serving when Supabase is
+slow or unreachable.
+
+The mirror syncs incrementally: every video and related_videos row carries an
+`updated_at` stamp written by ingest.py, and each sync only pulls rows stamped
+since the last watermark. Subcategories are small and are reloaded in full.
+
+Rows deleted in Supabase are not removed from the mirror; delete the mirror
+file to rebuild it from scratch.
+
+A mirror file can also be used on its own (no Supabase credentials) as a fully
+offline data source, e.g. for local development and tests.
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Bump when the table layout changes; older mirror files are rebuilt on open
+SCHEMA_VERSION = 3
+
+# Columns stored for every video (tags are kept as JSON text)
+MIRROR_VIDEO_COLUMNS = (
+    'video_id', 'category', 'sub_category', 'title', 'description', 'channel_title',
+    'published_at', 'thumbnail_url', 'view_count', 'like_count', 'duration', 'tags',
+    'rank_score', 'updated_at'
+)
+
+# Columns stored for every related_videos row (the neighbor list is kept as JSON text)
+MIRROR_RELATED_COLUMNS = ('video_id', 'related', 'updated_at')
+
+# Columns kept as JSON text in SQLite
+_JSON_COLUMNS = ('tags', 'related')
+
+# Rows fetched from Supabase per sync request (PostgREST db-max-rows)
+SYNC_PAGE_SIZE = 1000
+
+# Re-read this much history before the watermark on every sync, so rows committed
+# slightly out of updated_at order are not missed (upserts make re-reads harmless)
+SYNC_OVERLAP = timedelta(minutes=5)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    video_id TEXT PRIMARY KEY,
+    category TEXT NOT NULL,
+    sub_category TEXT NOT NULL,
+    title TEXT,
+    description TEXT,
+    channel_title TEXT,
+    published_at TEXT,
+    thumbnail_url TEXT,
+    view_count INTEGER,
+    like_count INTEGER,
+    duration INTEGER,
+    tags TEXT,
+    rank_score REAL,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS videos_rank_score_idx
+    ON videos (category, sub_category, rank_score IS NULL, rank_score DESC, video_id DESC);
+CREATE INDEX IF NOT EXISTS videos_updated_at_idx ON videos (updated_at, video_id);
+
+CREATE TABLE IF NOT EXISTS related_videos (
+    video_id TEXT PRIMARY KEY,
+    related TEXT NOT NULL,
+    updated_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS subcategories (
+    main_category TEXT NOT NULL,
+    name TEXT NOT NULL,
+    is_active INTEGER NOT NULL,
+    display_order INTEGER,
+    PRIMARY KEY (main_category, name)
+);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class SQLiteMirror:
+    """
+    Local SQLite mirror of the videos and subcategories tables.
+
+    Reads use one connection and syncs use another; the file runs in WAL mode
+    so a sync in a worker thread never blocks readers on the event loop.
+
+    Args:
+        path: Path of the SQLite database file
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._write_lock = threading.Lock()
+        self._ready = False
+
+        self._writer = sqlite3.connect(path, check_same_thread=False)
+        self._writer.execute('PRAGMA journal_mode=WAL')
+        self._writer.execute('PRAGMA synchronous=NORMAL')
+        self._ensure_schema()
+
+        self._reader = sqlite3.connect(path, check_same_thread=False)
+        self._reader.row_factory = sqlite3.Row
+
+    def _ensure_schema(self) -> None:
+        with self._write_lock, self._writer:
+            self._writer.executescript(_SCHEMA)
+            row = self._writer.execute("SELECT value FROM sync_state WHERE key = 'schema_version'").fetchone()
+
+            if row is None or int(row[0]) != SCHEMA_VERSION:
+                # Layout changed: start over and let the next sync pull everything
+                self._writer.executescript(
+                    "DROP TABLE videos; DROP TABLE related_videos; DROP TABLE subcategories; DROP TABLE sync_state;"
+                    + _SCHEMA
+                )
+                self._writer.execute(
+                    "INSERT INTO sync_state (key, value) VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),)
+                )
+
+    # ------------------------------------------------------------------
+    # Sync
+    # ------------------------------------------------------------------
+
+    def get_state(self, key: str) -> Optional[str]:
+        """Read a value from the sync_state table."""
+        row = self._reader.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row['value'] if row else None
+
+    def _get_state_for_sync(self, key: str) -> Optional[str]:
+        # Syncs run in a worker thread, so they only ever touch the writer connection
+        row = self._writer.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, key: str, value: str) -> None:
+        self._writer.execute(
+            "INSERT INTO sync_state (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value)
+        )
+
+    @property
+    def last_synced_at(self) -> Optional[str]:
+        """UTC timestamp of the last successful sync, or None if never synced."""
+        return self.get_state('last_synced_at')
+
+    @property
+    def last_sync_started_at(self) -> Optional[str]:
+        """UTC timestamp at which the last successful sync started, or None if never synced."""
+        return self.get_state('last_sync_started_at') or self.last_synced_at
+
+    def is_ready(self) -> bool:
+        """True once the mirror holds data it can serve (it has been synced at least once)."""
+        if not self._ready:
+            self._ready = self.last_synced_at is not None
+        return self._ready
+
+    def sync(self, client: Any) -> int:
+        """
+        Pull changes from Supabase into the mirror. Blocking - run it in a worker thread.
+
+        Args:
+            client: supabase-py Client
+
+        Returns:
+            Number of video and related_videos rows that changed (0 when the
+            mirror was already up to date)
+        """
+        with self._write_lock:
+            # Every row committed before this moment is in the mirror once the sync is done
+            started_at = datetime.now(timezone.utc).isoformat()
+            subcategories = client.table('subcategories')\
+                .select('main_category, name, is_active, display_order')\
+                .execute().data or []
+
+            written, videos_watermark = self._pull_changes(
+                client, 'videos', MIRROR_VIDEO_COLUMNS, 'videos_watermark'
+            )
+            related_written, related_watermark = self._pull_changes(
+                client, 'related_videos', MIRROR_RELATED_COLUMNS, 'related_watermark'
+            )
+
+            with self._writer:
+                self._writer.execute("DELETE FROM subcategories")
+                self._writer.executemany(
+                    "INSERT INTO subcategories (main_category, name, is_active, display_order) VALUES (?, ?, ?, ?)",
+                    [
+                        (row['main_category'], row['name'], 1 if row.get('is_active') else 0, row.get('display_order'))
+                        for row in subcategories
+                    ]
+                )
+                if videos_watermark:
+                    self._set_state('videos_watermark', videos_watermark)
+                if related_watermark:
+                    self._set_state('related_watermark', related_watermark)
+                self._set_state('last_synced_at', datetime.now(timezone.utc).isoformat())
+                self._set_state('last_sync_started_at', started_at)
+
+            return written + related_written
+
+    def _pull_changes(self, client: Any, table: str, columns: Sequence[str],
+                      watermark_key: str) -> Tuple[int, Optional[str]]:
+        """
+        Copy the rows of a table stamped since its watermark, in (updated_at, video_id) order.
+
+        Caller holds the write lock. The watermark itself is only stored by
+        sync() once everything was pulled.
+
+        Rows re-read from the SYNC_OVERLAP window that the mirror already holds
+        unchanged are neither written nor counted.
+
+        Returns:
+            (rows written, new watermark)
+        """
+        watermark = self._get_state_for_sync(watermark_key)
+        since = None
+        if watermark:
+            since = (datetime.fromisoformat(watermark.replace('Z', '+00:00')) - SYNC_OVERLAP).isoformat()
+
+        written = 0
+        newest = watermark
+        last_key: Optional[Tuple[str, str]] = None
+
+        while True:
+            query = client.table(table).select(','.join(columns))
+            if last_key:
+                updated_at, video_id = last_key
+                query = query.or_(
+                    f'updated_at.gt."{updated_at}",'
+                    f'and(updated_at.eq."{updated_at}",video_id.gt."{video_id}")'
+                )
+            elif since:
+                query = query.gte('updated_at', since)
+
+            rows = query.order('updated_at').order('video_id').limit(SYNC_PAGE_SIZE).execute().data or []
+            if not rows:
+                break
+
+            changed = self._changed_rows(table, columns, [self._to_sqlite(row, columns) for row in rows])
+            if changed:
+                with self._writer:
+                    self._writer.executemany(
+                        f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) "
+                        f"VALUES ({', '.join('?' for _ in columns)})",
+                        changed
+                    )
+
+            written += len(changed)
+            last_key = (rows[-1]['updated_at'], rows[-1]['video_id'])
+            if last_key[0] and (newest is None or last_key[0] > newest):
+                newest = last_key[0]
+
+            if len(rows) < SYNC_PAGE_SIZE:
+                break
+
+        return written, newest
+
+    def _changed_rows(self, table: str, columns: Sequence[str],
+                      rows: List[Tuple[Any, ...]]) -> List[Tuple[Any, ...]]:
+        """The rows (as _to_sqlite tuples, video_id first) that differ from the mirror's copy."""
+        stored: Dict[str, Tuple[Any, ...]] = {}
+        for i in range(0, len(rows), 500):
+            ids = [row[0] for row in rows[i:i + 500]]
+            for existing in self._writer.execute(
+                f"SELECT {', '.join(columns)} FROM {table} WHERE video_id IN ({', '.join('?' for _ in ids)})", ids
+            ):
+                stored[existing[0]] = tuple(existing)
+        return [row for row in rows if stored.get(row[0]) != row]
+
+    @staticmethod
+    def _to_sqlite(row: Dict[str, Any], columns: Sequence[str]) -> Tuple[Any, ...]:
+        values = []
+        for column in columns:
+            value = row.get(column)
+            if column in _JSON_COLUMNS and value is not None:
+                value = json.dumps(value)
+            values.append(value)
+        return tuple(values)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def _rows(self, sql: str, params: Sequence[Any]) -> List[Dict[str, Any]]:
+        rows = []
+        for row in self._reader.execute(sql, params):
+            item = dict(row)
+            for column in _JSON_COLUMNS:
+                if item.get(column) is not None:
+                    item[column] = json.loads(item[column])
+            rows.append(item)
+        return rows
+
+    def subcategory_names(self, category: str) -> List[str]:
+        """Active subcategory names for a category, ordered by display_order."""
+        rows = self._reader.execute(
+            "SELECT name FROM subcategories WHERE main_category = ? AND is_active = 1 "
+            "ORDER BY display_order",
+            (category,)
+        )
+        return [row['name'] for row in rows]
+
+    def video_page(self, category: str, subcategory: str, order_column: str, limit: int,
+                   keyset: Optional[Tuple[Any, str]], columns: Sequence[str]) -> List[Dict[str, Any]]:
+        """
+        One page of a subcategory's videos in the API's keyset order.
+
+        Sorted by order_column descending with NULLs last, then video_id descending,
+        matching the Supabase query in index.py.
+
+        Args:
+            category: Main category
+            subcategory: Subcategory name
+            order_column: Sort column (the API uses 'rank_score')
+            limit: Maximum number of rows
+            keyset: (sort value, video_id) of the last row of the previous page, or None
+            columns: Columns to return
+        """
+        if order_column not in MIRROR_VIDEO_COLUMNS:
+            raise ValueError(f"Unknown order column: {order_column}")
+
+        sql = f"SELECT {', '.join(columns)} FROM videos WHERE category = ? AND sub_category = ?"
+        params: List[Any] = [category, subcategory]
+
+        if keyset:
+            value, video_id = keyset
+            if value is None:
+                sql += f" AND {order_column} IS NULL AND video_id < ?"
+                params.append(video_id)
+            else:
+                sql += (
+                    f" AND ({order_column} < ? OR ({order_column} = ? AND video_id < ?)"
+                    f" OR {order_column} IS NULL)"
+                )
+                params.extend([value, value, video_id])
+
+        sql += f" ORDER BY {order_column} IS NULL, {order_column} DESC, video_id DESC LIMIT ?"
+        params.append(limit)
+
+        return self._rows(sql, params)
+
+    def changes(self, position: Tuple[str, str], until: str, limit: int,
+                columns: Sequence[str]) -> List[Dict[str, Any]]:
+        """
+        Videos stamped after (updated_at, video_id) in that order, matching the API's delta feed.
+
+        Args:
+            position: (updated_at, video_id) to resume after
+            until: Newest updated_at to include
+            limit: Maximum number of rows
+            columns: Columns to return
+        """
+        updated_at, video_id = position
+        return self._rows(
+            f"SELECT {', '.join(columns)} FROM videos"
+            " WHERE (updated_at > ? OR (updated_at = ? AND video_id > ?)) AND updated_at <= ?"
+            " ORDER BY updated_at, video_id LIMIT ?",
+            (updated_at, updated_at, video_id, until, limit)
+        )
+
+    def all_videos(self, columns: Sequence[str]) -> List[Dict[str, Any]]:
+        """Every video in the mirror, with the given columns."""
+        return self._rows(f"SELECT {', '.join(columns)} FROM videos", ())
+
+    def videos_by_id(self, video_ids: Sequence[str], columns: Sequence[str]) -> List[Dict[str, Any]]:
+        """Videos with the given IDs (in no particular order); unknown IDs are skipped."""
+        if not video_ids:
+            return []
+        placeholders = ', '.join('?' for _ in video_ids)
+        return self._rows(f"SELECT {', '.join(columns)} FROM videos WHERE video_id IN ({placeholders})", video_ids)
+
+    def related(self, video_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Precomputed related videos ([{"video_id", "score"}, ...]) for a video, or None if unknown."""
+        rows = self._rows("SELECT related FROM related_videos WHERE video_id = ?", (video_id,))
+        return rows[0]['related'] if rows else None
+
+    def video(self, video_id: str) -> Optional[Dict[str, Any]]:
+        """Full record for a single video, or None if it is not in the mirror."""
+        rows = self._rows("SELECT * FROM videos WHERE video_id = ?", (video_id,))
+        return rows[0] if rows else None
+
+    def close(self) -> None:
+        self._reader.close()
+        self._writer.close()
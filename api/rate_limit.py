@@ -0,0 +1,104 @@
+"""
+BracketsTV API Rate Limiting
+============================
+
+Per-client token buckets in front of the data endpoints, so a single scraper
+cannot use up the Supabase request budget for everyone else.
+
+Every client gets a bucket holding up to `burst` tokens that refills at `rate`
+tokens per second; each request takes one token. A request that finds the
+bucket empty is rejected with the number of seconds until a token is
+available, which the API sends back as Retry-After.
+
+Clients are identified by their X-API-Key header when it is one of the
+configured API keys, and by IP address otherwise. Unknown keys are ignored,
+so sending a fresh key with every request does not buy a fresh bucket. Keys
+are only kept as a hash prefix, so identities are safe to log.
+
+The number of tracked clients is bounded; the least recently seen are
+forgotten first (and start again with a full bucket).
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Collection, Mapping, Optional, Tuple
+
+
+def client_identity(headers: Mapping[str, str], host: Optional[str], trust_forwarded: bool = False,
+                    api_keys: Collection[str] = ()) -> str:
+    """
+    Key a client's rate limit bucket by API key or IP address.
+
+    Args:
+        headers: Request headers (case-insensitive mapping)
+        host: Address of the connecting peer
+        trust_forwarded: Use the first X-Forwarded-For address instead of the peer
+            address. Only enable this behind a proxy that sets the header, or
+            clients can pick their own identity.
+        api_keys: Known API keys; an X-API-Key outside this set is ignored
+
+    Returns:
+        "key:<sha256 prefix of the key>" or "ip:<address>"
+    """
+    api_key = headers.get("x-api-key")
+    if api_key and api_key in api_keys:
+        return f"key:{hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16]}"
+
+    if trust_forwarded:
+        forwarded = headers.get("x-forwarded-for")
+        if forwarded:
+            return f"ip:{forwarded.split(',')[0].strip()}"
+
+    return f"ip:{host or 'unknown'}"
+
+
+class TokenBucketLimiter:
+    """
+    Token bucket rate limiter keyed by client.
+
+    Args:
+        rate: Tokens added per second (sustained requests per second per client)
+        burst: Bucket size (requests a client may make at once after being idle)
+        max_clients: Maximum number of client buckets kept in memory
+    """
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self.allowed = 0
+        self.rejected = 0
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, client: str, cost: float = 1.0) -> float:
+        """
+        Take tokens from a client's bucket.
+
+        Returns:
+            0.0 if the request is allowed, otherwise the seconds until enough
+            tokens will be available
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+
+            if tokens >= cost:
+                tokens -= cost
+                wait = 0.0
+                self.allowed += 1
+            else:
+                wait = (cost - tokens) / self.rate
+                self.rejected += 1
+
+            self._buckets[client] = (tokens, now)
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+
+        return wait
+
+    def __len__(self) -> int:
+        return len(self._buckets)
@@ -0,0 +1,76 @@
+"""
+BracketsTV API Video Records
+============================
+
+A compact stand-in for the video dicts returned by Supabase, used for every
+video the API keeps in memory (cached pages, bundles, related lists and the
+search index's stored documents).
+
+A VideoRecord holds its values in one tuple and shares its tuple of field
+names with every record of the same projection, so a row costs two small
+objects instead of a hash table. Strings that repeat across many videos
+(category, subcategory and channel names, tags) are interned, and tag lists
+become tuples.
+
+Records are read-only mappings: `record['title']`, `record.get(...)`,
+`{**record}` and `dict(record)` all work, and serialization.dumps() encodes
+them as JSON objects directly.
+"""
+
+import sys
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+# Columns whose values repeat across many videos
+INTERNED_FIELDS = frozenset({'category', 'sub_category', 'channel_title'})
+
+# One shared tuple of field names per projection
+_FIELD_TUPLES: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+def _compact(field: str, value: Any) -> Any:
+    if field == 'tags' and isinstance(value, list):
+        return tuple(sys.intern(tag) if isinstance(tag, str) else tag for tag in value)
+    if field in INTERNED_FIELDS and isinstance(value, str):
+        return sys.intern(value)
+    return value
+
+
+class VideoRecord(Mapping):
+    """
+    Immutable, memory-compact video row.
+
+    Args:
+        row: Video row as returned by Supabase or the mirror (field order is kept)
+    """
+
+    __slots__ = ('_fields', '_values')
+
+    def __init__(self, row: Dict[str, Any]):
+        fields = tuple(row)
+        self._fields = _FIELD_TUPLES.setdefault(fields, fields)
+        self._values = tuple(_compact(field, value) for field, value in row.items())
+
+    def __getitem__(self, field: str) -> Any:
+        try:
+            return self._values[self._fields.index(field)]
+        except ValueError:
+            raise KeyError(field) from None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._fields)
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def __repr__(self) -> str:
+        return f"VideoRecord({dict(zip(self._fields, self._values))!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict of the record (tags stay a tuple)."""
+        return dict(zip(self._fields, self._values))
+
+
+def compact_rows(rows: Iterable[Dict[str, Any]]) -> List[VideoRecord]:
+    """Convert Supabase/mirror rows to VideoRecords."""
+    return [VideoRecord(row) for row in rows]
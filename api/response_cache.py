@@ -0,0 +1,218 @@
+"""
+BracketsTV API Response Cache
+=============================
+
+A small in-process cache for API responses. The video catalog only changes
+when ingest.py runs, so almost every read can be answered from memory.
+
+Entries are fresh for a fixed TTL. After that they can still be served stale
+for up to max_stale_seconds while a single caller refreshes them in the
+background (stale-while-revalidate); if that refresh fails, the stale value
+keeps being served and the refresh is retried at a bounded rate. Beyond the
+stale window an entry is gone. The cache is bounded and evicts the least
+recently used entry when full, and the whole cache is dropped whenever the
+data version stamp written by ingest.py changes.
+
+Cached values are CachedPayload objects. They hold the response serialized
+once to JSON bytes, a content hash of those bytes used as the HTTP ETag, and
+compressed variants of the body built on first use.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from serialization import compress, dumps
+
+
+class CachedPayload:
+    """
+    A response ready to send: data, pre-serialized JSON body, ETag and compressed bodies.
+
+    Args:
+        data: JSON-serializable response data
+    """
+
+    __slots__ = ('data', 'body', 'etag', '_encoded')
+
+    def __init__(self, data: Any):
+        self.data = data
+        self.body = dumps(data)
+        self.etag = f'"{hashlib.sha1(self.body).hexdigest()}"'
+        self._encoded: Dict[str, bytes] = {}
+
+    def encoded(self, encoding: Optional[str]) -> bytes:
+        """
+        Return the body in the given content coding, compressing it only the first time.
+
+        Args:
+            encoding: 'br', 'gzip', or None for the uncompressed body
+        """
+        if encoding is None:
+            return self.body
+
+        body = self._encoded.get(encoding)
+        if body is None:
+            body = compress(self.body, encoding)
+            self._encoded[encoding] = body
+
+        return body
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        """
+        ETag for one encoding of the body.
+
+        Compressed bodies are different byte sequences, so each coding gets
+        its own strong validator ("<hash>-gzip", "<hash>-br").
+        """
+        if encoding is None:
+            return self.etag
+
+        return f'{self.etag[:-1]}-{encoding}"'
+
+
+class _Entry:
+    __slots__ = ('value', 'expires_at', 'stale_until', 'refresh_after')
+
+    def __init__(self, value: Any, expires_at: float, stale_until: float):
+        self.value = value
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+        self.refresh_after = expires_at
+
+
+class ResponseCache:
+    """
+    Bounded in-memory cache with per-entry TTL, stale-while-revalidate and LRU eviction.
+
+    Args:
+        max_entries: Maximum number of entries kept before evicting the least recently used
+        ttl_seconds: How long an entry stays fresh after it was stored
+        max_stale_seconds: How long past its TTL an entry may still be served stale
+        refresh_retry_seconds: Minimum time between refresh attempts for one stale entry
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 300.0,
+                 max_stale_seconds: float = 0.0, refresh_retry_seconds: float = 5.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self.refresh_retry_seconds = refresh_retry_seconds
+        self.version: Optional[str] = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _live_entry(self, key: Hashable, now: float) -> Optional[_Entry]:
+        # Caller holds the lock
+        entry = self._entries.get(key)
+        if entry is not None and entry.stale_until <= now:
+            del self._entries[key]
+            return None
+        return entry
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Return the cached value for a key, or None if it is missing or no longer fresh.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._live_entry(key, now)
+            if entry is None or entry.expires_at <= now:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+    def lookup(self, key: Hashable) -> Tuple[Optional[Any], bool]:
+        """
+        Return the cached value for a key, accepting stale values.
+
+        Returns:
+            (value, refresh). value is None if the entry is missing or past its
+            stale window. refresh is True when the value is stale and the caller
+            should refresh it; it is handed to one caller at a time, and again
+            only after refresh_retry_seconds if the entry was not replaced.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._live_entry(key, now)
+            if entry is None:
+                self.misses += 1
+                return None, False
+
+            self._entries.move_to_end(key)
+            if entry.expires_at > now:
+                self.hits += 1
+                return entry.value, False
+
+            self.stale_hits += 1
+            if entry.refresh_after > now:
+                return entry.value, False
+
+            entry.refresh_after = now + self.refresh_retry_seconds
+            return entry.value, True
+
+    def set(self, key: Hashable, value: Any, version: Optional[str] = None) -> None:
+        """
+        Store a value, evicting the least recently used entries if the cache is full.
+
+        Args:
+            key: Cache key
+            value: Value to store
+            version: Data version the value was loaded under. If the version has
+                changed since the load started, the value is stale and is dropped.
+        """
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+
+            expires_at = time.monotonic() + self.ttl_seconds
+            self._entries[key] = _Entry(value, expires_at, expires_at + self.max_stale_seconds)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def bump_version(self, version: Optional[str]) -> bool:
+        """
+        Record the current data version, dropping every entry if it changed.
+
+        Returns:
+            True if the version changed and the cache was cleared
+        """
+        with self._lock:
+            if version == self.version:
+                return False
+
+            self.version = version
+            self._entries.clear()
+            return True
+
+    def clear(self) -> None:
+        """Drop every cached entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return basic cache statistics."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "max_stale_seconds": self.max_stale_seconds,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "version": self.version,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,131 @@
+"""
+BracketsTV Search Index
+=======================
+
+An in-memory inverted index over the video catalog, so type=search can answer
+without querying Supabase.
+
+Documents are indexed on title, tags, channel_title and the (already truncated)
+description, with per-field weights, split into terms by tokenizer.py. Results are ranked with BM25 over the
+weighted term frequencies. Every query term of at least MIN_PREFIX_LENGTH
+characters also matches indexed terms it is a prefix of ("pyth" finds
+"python"), with a small discount so exact matches rank first. Shorter terms
+only match exactly: a one- or two-letter prefix would pull in dozens of
+unrelated terms and make the query slow.
+"""
+
+import heapq
+import math
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Sequence, Tuple
+
+from tokenizer import tokenize
+
+# Relative importance of a term occurrence in each field
+FIELD_WEIGHTS = {
+    'title': 3.0,
+    'tags': 2.0,
+    'channel_title': 1.5,
+    'description': 1.0,
+}
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Score multiplier for terms matched only by prefix, and how many terms a prefix may expand to
+PREFIX_DISCOUNT = 0.7
+MAX_PREFIX_EXPANSIONS = 50
+
+# Shortest query term that is expanded as a prefix
+MIN_PREFIX_LENGTH = 3
+
+
+class SearchIndex:
+    """
+    Inverted index with BM25 ranking and prefix matching.
+
+    Args:
+        documents: Video rows with at least video_id and the indexed fields
+        stored_fields: Fields kept per document and returned in results
+        make_document: Builds the stored document from its stored fields (e.g.
+            records.VideoRecord for a compact one)
+    """
+
+    def __init__(self, documents: Iterable[Dict[str, Any]], stored_fields: Sequence[str],
+                 make_document: Callable[[Dict[str, Any]], Mapping[str, Any]] = dict):
+        self._documents: List[Mapping[str, Any]] = []
+        self._lengths: List[float] = []
+        postings: Dict[str, List[Tuple[int, float]]] = {}
+
+        for document in documents:
+            weighted_tf: Counter = Counter()
+            for field, weight in FIELD_WEIGHTS.items():
+                value = document.get(field)
+                if not value:
+                    continue
+                text = ' '.join(value) if isinstance(value, list) else str(value)
+                for token in tokenize(text):
+                    weighted_tf[token] += weight
+
+            doc_id = len(self._documents)
+            self._documents.append(make_document({field: document.get(field) for field in stored_fields}))
+            self._lengths.append(sum(weighted_tf.values()))
+
+            for term, tf in weighted_tf.items():
+                postings.setdefault(term, []).append((doc_id, tf))
+
+        count = len(self._documents)
+        self._average_length = (sum(self._lengths) / count) if count else 0.0
+        self._postings = postings
+        self._idf = {
+            term: math.log(1 + (count - len(entries) + 0.5) / (len(entries) + 0.5))
+            for term, entries in postings.items()
+        }
+        self._vocabulary = sorted(postings)
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def _expand(self, token: str) -> List[Tuple[str, float]]:
+        """Terms a query token matches: itself (exact) and indexed terms it prefixes."""
+        matches = []
+        if token in self._postings:
+            matches.append((token, 1.0))
+        if len(token) < MIN_PREFIX_LENGTH:
+            return matches
+
+        position = bisect_left(self._vocabulary, token)
+        while position < len(self._vocabulary) and len(matches) <= MAX_PREFIX_EXPANSIONS:
+            term = self._vocabulary[position]
+            if not term.startswith(token):
+                break
+            if term != token:
+                matches.append((term, PREFIX_DISCOUNT))
+            position += 1
+
+        return matches
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[float, Mapping[str, Any]]]:
+        """
+        Rank documents for a free-text query.
+
+        Args:
+            query: Search text
+            limit: Maximum number of results
+
+        Returns:
+            List of (score, stored document) pairs, best match first
+        """
+        scores: Dict[int, float] = {}
+
+        for token in dict.fromkeys(tokenize(query)):
+            for term, boost in self._expand(token):
+                idf = self._idf[term] * boost
+                for doc_id, tf in self._postings[term]:
+                    norm = K1 * (1 - B + B * self._lengths[doc_id] / self._average_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [(score, self._documents[doc_id]) for doc_id, score in best]
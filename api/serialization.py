@@ -0,0 +1,91 @@
+"""
+BracketsTV API Serialization
+============================
+
+Fast JSON encoding and negotiated response compression.
+
+orjson is used when installed (several times faster than the standard json
+module), and brotli is offered when the Brotli package is available; gzip from
+the standard library is always available. Both are optional: without them the
+API falls back to json and gzip.
+
+Optional Environment Variables:
+    - COMPRESSION_MIN_BYTES: Bodies smaller than this are sent uncompressed (default: 1024)
+"""
+
+import gzip
+import json
+import os
+from collections.abc import Mapping
+from typing import Any, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+
+# Content codings we can produce, in order of preference
+SUPPORTED_ENCODINGS = ('br', 'gzip') if brotli else ('gzip',)
+
+
+def _encode_default(value: Any) -> Any:
+    # Mappings that are not dicts (e.g. records.VideoRecord) are encoded as JSON objects
+    if isinstance(value, Mapping):
+        return dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(data: Any) -> bytes:
+    """Serialize a value to compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(data, default=_encode_default)
+
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=_encode_default).encode('utf-8')
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a body with the given content coding ('br' or 'gzip')."""
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+
+    return gzip.compress(body, compresslevel=6)
+
+
+def negotiate_encoding(accept_encoding: Optional[str], body_size: int) -> Optional[str]:
+    """
+    Pick the content coding for a response from the client's Accept-Encoding header.
+
+    Args:
+        accept_encoding: Raw Accept-Encoding header value
+        body_size: Size of the uncompressed body in bytes
+
+    Returns:
+        'br', 'gzip', or None to send the body uncompressed
+    """
+    if not accept_encoding or body_size < COMPRESSION_MIN_BYTES:
+        return None
+
+    accepted = {}
+    for item in accept_encoding.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    for encoding in SUPPORTED_ENCODINGS:
+        if accepted.get(encoding, accepted.get('*', 0.0)) > 0:
+            return encoding
+
+    return None
@@ -0,0 +1,64 @@
+"""
+BracketsTV API Request Coalescing
+=================================
+
+When a popular cache entry expires, or right after a cold start, many
+concurrent requests miss the cache for the same key at once. SingleFlight makes
+sure only one of them runs the Supabase query; the others wait for it and share
+its result (or its exception).
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into a single in-flight call.
+
+    The shared call runs as its own task, so a client disconnecting (and its
+    request being cancelled) does not cancel the work other waiters depend on.
+    """
+
+    def __init__(self):
+        self.shared = 0
+        self._calls: Dict[Hashable, "asyncio.Task[Any]"] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fn() for a key, or join the call already in flight for it.
+
+        Args:
+            key: Identifies equivalent calls (e.g. the response cache key)
+            fn: Zero-argument coroutine function doing the actual work
+
+        Returns:
+            The result of the shared call
+        """
+        return await asyncio.shield(self.start(key, fn))
+
+    def start(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> "asyncio.Task[Any]":
+        """
+        Start fn() for a key unless a call is already in flight, without waiting for it.
+
+        Returns:
+            The task running the shared call
+        """
+        task = self._calls.get(key)
+
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._forget(key, task))
+        else:
+            self.shared += 1
+
+        return task
+
+    def in_flight(self) -> int:
+        """Number of distinct keys currently being loaded."""
+        return len(self._calls)
+
+    def _forget(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
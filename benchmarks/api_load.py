@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+BracketsTV API Load Benchmark
+=============================
+
+Starts api/index.py under uvicorn in a child process, backed by the
+in-process fake Supabase (see fake_supabase.py), drives a request mix at fixed
+concurrency levels from this process and writes throughput and latency
+percentiles to JSON. Everything runs locally; no network access or Supabase
+project is needed. The API runs in its own process so the load generator does
+not compete with it for the GIL.
+
+Usage:
+    python benchmarks/api_load.py
+    python benchmarks/api_load.py --mix browse --concurrency 1,16,64 --duration 15
+    python benchmarks/api_load.py --cache-ttl 0 --db-latency-ms 40 --output /tmp/uncached.json
+
+Request mixes:
+    - browse: what the frontend does - bundles, first and later pages, subcategories, video details
+    - search: type=search queries only
+    - mixed: browse traffic with one request in five being a search
+
+The JSON output records the git commit, the settings and, per concurrency
+level, requests, errors, RPS and p50/p95/p99/max latency (overall and per
+request kind), so runs can be compared across commits.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Sequence, Tuple
+
+import httpx
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCHMARKS_DIR)
+API_DIR = os.path.join(REPO_ROOT, 'api')
+
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from fake_supabase import FakeSupabase, VOCABULARY, build_catalog
+
+# Relative weight of each request kind per mix
+MIXES = {
+    'browse': {'bundle': 30, 'videos_first_page': 30, 'videos_next_page': 20, 'subcategories': 10, 'video': 10},
+    'search': {'search': 100},
+    'mixed': {'bundle': 24, 'videos_first_page': 24, 'videos_next_page': 16, 'subcategories': 8, 'video': 8, 'search': 20},
+}
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    """Latency percentiles in milliseconds."""
+    ordered = sorted(latencies)
+    return {
+        'p50_ms': round(percentile(ordered, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(ordered, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 3),
+        'max_ms': round((ordered[-1] if ordered else 0.0) * 1000, 3),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return 'unknown'
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def serve(port: int, videos_per_subcategory: int, seed: int, db_latency: float, cache_ttl: float) -> None:
+    """Child process: import api/index.py, wire it to a seeded fake backend and serve it."""
+    os.environ.setdefault('SUPABASE_URL', 'https://benchmark.supabase.co')
+    os.environ.setdefault('SUPABASE_KEY', 'benchmark-key')
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    os.environ['CACHE_TTL_SECONDS'] = str(cache_ttl)
+    # Every simulated user shares one address; per-client limits would cap the whole run
+    os.environ.setdefault('RATE_LIMIT_PER_SECOND', '0')
+    os.environ.pop('MIRROR_PATH', None)
+    sys.path.insert(0, API_DIR)
+
+    import uvicorn
+    import db
+    import index
+
+    db.set_client(FakeSupabase.seeded(videos_per_subcategory, seed=seed, latency=db_latency))
+    uvicorn.run(index.app, host='127.0.0.1', port=port, log_level='warning')
+
+
+def read_metric(base_url: str, prefix: str) -> float:
+    """Sum every sample of a metric from the API's /metrics endpoint."""
+    text = httpx.get(f'{base_url}/metrics').text
+    return sum(float(line.rsplit(' ', 1)[1]) for line in text.splitlines() if line.startswith(prefix))
+
+
+def start_api(args: argparse.Namespace) -> Tuple[multiprocessing.Process, str]:
+    """
+    Start the API in a child process and wait until it is serving.
+
+    Returns:
+        (child process, base URL)
+    """
+    port = free_port()
+    process = multiprocessing.get_context('spawn').Process(
+        target=serve,
+        args=(port, args.videos_per_subcategory, args.seed, args.db_latency_ms / 1000, args.cache_ttl),
+        daemon=True
+    )
+    process.start()
+    base_url = f'http://127.0.0.1:{port}'
+
+    # Wait for the server and for the startup search index build, so it does not skew the first level
+    deadline = time.monotonic() + 120
+    while True:
+        if time.monotonic() > deadline or not process.is_alive():
+            process.terminate()
+            raise RuntimeError('API server did not start')
+        try:
+            if read_metric(base_url, 'bracketstv_search_index_documents') > 0:
+                return process, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+
+
+class Workload:
+    """Builds randomized request URLs for a mix from the seeded catalog."""
+
+    def __init__(self, catalog: Dict[str, List[Dict[str, Any]]], mix: str, rng: random.Random):
+        self.weights = MIXES[mix]
+        self.rng = rng
+        subcategories = catalog['subcategories']
+        self.categories = sorted({row['main_category'] for row in subcategories})
+        self.subcategories = [(row['main_category'], row['name']) for row in subcategories]
+        self.video_ids = [row['video_id'] for row in catalog['videos']]
+        self.search_terms = list(VOCABULARY)
+        self.cursors: Dict[Tuple[str, str], str] = {}
+
+    async def prepare(self, client: httpx.AsyncClient) -> None:
+        """Fetch every subcategory's first page once to collect cursors for later pages."""
+        for category, name in self.subcategories:
+            response = await client.get('/', params={'type': 'videos', 'category': category, 'subcategory': name})
+            cursor = response.json().get('next_cursor') if response.status_code == 200 else None
+            if cursor:
+                self.cursors[(category, name)] = cursor
+
+    def next_request(self) -> Tuple[str, Dict[str, str]]:
+        kind = self.rng.choices(list(self.weights), weights=list(self.weights.values()))[0]
+
+        if kind == 'bundle':
+            return kind, {'type': 'bundle', 'category': self.rng.choice(self.categories), 'limit': '12'}
+        if kind == 'subcategories':
+            return kind, {'type': 'subcategories', 'category': self.rng.choice(self.categories)}
+        if kind == 'video':
+            return kind, {'type': 'video', 'video_id': self.rng.choice(self.video_ids)}
+        if kind == 'search':
+            words = self.rng.sample(self.search_terms, self.rng.randint(1, 2))
+            # Half the searches end in a partial word, like a search-as-you-type box
+            if self.rng.random() < 0.5:
+                words[-1] = words[-1][:max(2, len(words[-1]) - 2)]
+            return kind, {'type': 'search', 'q': ' '.join(words)}
+        if kind == 'videos_next_page' and self.cursors:
+            (category, name), cursor = self.rng.choice(list(self.cursors.items()))
+            return kind, {'type': 'videos', 'category': category, 'subcategory': name, 'cursor': cursor}
+
+        category, name = self.rng.choice(self.subcategories)
+        return 'videos_first_page', {'type': 'videos', 'category': category, 'subcategory': name}
+
+
+async def run_level(base_url: str, workload: Workload, concurrency: int, duration: float, warmup: float) -> Dict[str, Any]:
+    """Run closed-loop workers at one concurrency level and summarize the results."""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    headers = {'Accept-Encoding': 'gzip, br'}
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, headers=headers, timeout=30) as client:
+        if not workload.cursors:
+            await workload.prepare(client)
+
+        latencies: Dict[str, List[float]] = {}
+        errors: Dict[str, int] = {}
+        phase = {'recording': False, 'stop': False}
+
+        async def worker() -> None:
+            while not phase['stop']:
+                kind, params = workload.next_request()
+                started = time.perf_counter()
+                try:
+                    response = await client.get('/', params=params)
+                    failed = response.status_code >= 400
+                except httpx.HTTPError:
+                    failed = True
+                elapsed = time.perf_counter() - started
+
+                if phase['recording']:
+                    latencies.setdefault(kind, []).append(elapsed)
+                    if failed:
+                        errors[kind] = errors.get(kind, 0) + 1
+
+        tasks = [asyncio.ensure_future(worker()) for _ in range(concurrency)]
+        await asyncio.sleep(warmup)
+        phase['recording'] = True
+        started = time.perf_counter()
+        await asyncio.sleep(duration)
+        phase['stop'] = True
+        elapsed = time.perf_counter() - started
+        await asyncio.gather(*tasks)
+
+    everything = [value for values in latencies.values() for value in values]
+    return {
+        'concurrency': concurrency,
+        'duration_s': round(elapsed, 3),
+        'requests': len(everything),
+        'errors': sum(errors.values()),
+        'rps': round(len(everything) / elapsed, 1) if elapsed else 0.0,
+        **summarize(everything),
+        'by_kind': {
+            kind: {'requests': len(values), 'errors': errors.get(kind, 0), **summarize(values)}
+            for kind, values in sorted(latencies.items())
+        },
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Load-test the BracketsTV API against a fake Supabase backend.')
+    parser.add_argument('--mix', choices=sorted(MIXES), default='mixed', help='Request mix (default: mixed)')
+    parser.add_argument('--concurrency', default='1,8,32', help='Comma-separated concurrency levels (default: 1,8,32)')
+    parser.add_argument('--duration', type=float, default=10.0, help='Measured seconds per level (default: 10)')
+    parser.add_argument('--warmup', type=float, default=2.0, help='Unmeasured seconds before each level (default: 2)')
+    parser.add_argument('--videos-per-subcategory', type=int, default=200, help='Synthetic catalog size (default: 200)')
+    parser.add_argument('--db-latency-ms', type=float, default=20.0, help='Simulated Supabase round trip (default: 20)')
+    parser.add_argument('--cache-ttl', type=float, default=300.0, help='CACHE_TTL_SECONDS for the API (default: 300)')
+    parser.add_argument('--seed', type=int, default=42, help='Seed for the catalog and request stream (default: 42)')
+    parser.add_argument('--output', help='JSON result path (default: benchmarks/results/api_load-<commit>-<mix>.json)')
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    levels = [int(level) for level in args.concurrency.split(',') if level.strip()]
+    commit = git_commit()
+
+    # Same seed as the server's fake backend, so the workload asks for videos that exist
+    catalog = build_catalog(args.videos_per_subcategory, seed=args.seed)
+    process, base_url = start_api(args)
+    workload = Workload(catalog, args.mix, random.Random(args.seed))
+
+    print(f"🏁 Benchmarking '{args.mix}' mix at {base_url} ({len(catalog['videos'])} videos, commit {commit})")
+
+    results = []
+    try:
+        for concurrency in levels:
+            result = asyncio.run(run_level(base_url, workload, concurrency, args.duration, args.warmup))
+            results.append(result)
+            print(
+                f"   c={concurrency:<4} {result['rps']:>9.1f} rps   p50 {result['p50_ms']:>8.2f} ms   "
+                f"p95 {result['p95_ms']:>8.2f} ms   p99 {result['p99_ms']:>8.2f} ms   errors {result['errors']}"
+            )
+        supabase_queries = int(read_metric(base_url, 'bracketstv_db_query_duration_seconds_count'))
+    finally:
+        process.terminate()
+        process.join(timeout=10)
+
+    report = {
+        'benchmark': 'api_load',
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': {
+            'mix': args.mix,
+            'mix_weights': MIXES[args.mix],
+            'duration_s': args.duration,
+            'warmup_s': args.warmup,
+            'videos_per_subcategory': args.videos_per_subcategory,
+            'db_latency_ms': args.db_latency_ms,
+            'cache_ttl_s': args.cache_ttl,
+            'seed': args.seed,
+        },
+        'supabase_queries': supabase_queries,
+        'results': results,
+    }
+
+    output = args.output or os.path.join(BENCHMARKS_DIR, 'results', f'api_load-{commit}-{args.mix}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"📄 Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+BracketsTV API Cold Start Benchmark
+===================================
+
+Measures what a fresh serverless worker pays before it can answer, each in a
+new Python process:
+
+    - import: `import index` (module load, app creation)
+    - client_init: importing supabase-py and creating the client, which the
+      API defers to first use (no network calls are made)
+    - time_to_first_response: from spawning the process to the first
+      successful response from uvicorn, served from the fake Supabase backend
+      (see fake_supabase.py)
+
+Each measurement is repeated and the median is compared with a budget; the
+script exits with status 1 when a budget is exceeded, so it can catch
+regressions in CI. Budgets depend on the machine - calibrate them with a run
+on the baseline commit.
+
+Usage:
+    python benchmarks/cold_start.py
+    python benchmarks/cold_start.py --runs 10 --import-budget-ms 600 --ttfr-budget-ms 1500
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCHMARKS_DIR)
+API_DIR = os.path.join(REPO_ROOT, 'api')
+
+DEFAULT_IMPORT_BUDGET_MS = 800
+DEFAULT_TTFR_BUDGET_MS = 2000
+
+# Request timed for time-to-first-response: a cache miss that reaches the backend
+FIRST_REQUEST = '/?type=subcategories&category=dsa'
+
+
+def child_env() -> Dict[str, str]:
+    """Environment for measured processes: serverless-style settings, no .env lookups."""
+    env = dict(os.environ)
+    env.setdefault('SUPABASE_URL', 'https://benchmark.supabase.co')
+    env.setdefault('SUPABASE_KEY', 'benchmark-key')
+    env['LOG_LEVEL'] = 'OFF'
+    env['SEARCH_INDEX_ON_STARTUP'] = 'false'
+    env.pop('WARMUP_CATEGORIES', None)
+    env.pop('MIRROR_PATH', None)
+    env['PYTHONPATH'] = os.pathsep.join([API_DIR, BENCHMARKS_DIR])
+    return env
+
+
+def run_child(mode: str) -> float:
+    """Run this script in a fresh interpreter in the given child mode and return its timing."""
+    output = subprocess.check_output([sys.executable, __file__, '--child', mode], env=child_env(), cwd=API_DIR)
+    return float(output.decode().strip().splitlines()[-1])
+
+
+def measure_time_to_first_response(db_latency_ms: float) -> float:
+    """Spawn a server process and time until it answers FIRST_REQUEST successfully."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, __file__, '--child', 'serve', '--port', str(port), '--db-latency-ms', str(db_latency_ms)],
+        env=child_env(), cwd=API_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError('API server exited before answering')
+            if time.perf_counter() - started > 60:
+                raise RuntimeError('API server did not answer within 60 seconds')
+            # http.client keeps polling cheap; the measured process gets the CPU
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            try:
+                connection.request('GET', FIRST_REQUEST)
+                if connection.getresponse().status == 200:
+                    return (time.perf_counter() - started) * 1000
+            except OSError:
+                time.sleep(0.005)
+            finally:
+                connection.close()
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def child(mode: str, port: int, db_latency_ms: float) -> None:
+    """Entry point inside the measured process."""
+    if mode == 'import':
+        started = time.perf_counter()
+        import index  # noqa: F401
+        print((time.perf_counter() - started) * 1000)
+    elif mode == 'client':
+        import db
+        started = time.perf_counter()
+        if db.get_client() is None:
+            raise SystemExit('Supabase client could not be created')
+        print((time.perf_counter() - started) * 1000)
+    elif mode == 'serve':
+        from fake_supabase import FakeSupabase
+        backend = FakeSupabase.seeded(20, latency=db_latency_ms / 1000)
+
+        import uvicorn
+        import db
+        import index
+
+        db.set_client(backend)
+        uvicorn.run(index.app, host='127.0.0.1', port=port, log_level='warning')
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        'median_ms': round(statistics.median(samples), 1),
+        'min_ms': round(min(samples), 1),
+        'max_ms': round(max(samples), 1),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return 'unknown'
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Measure BracketsTV API cold start time.')
+    parser.add_argument('--runs', type=int, default=5, help='Fresh processes per measurement (default: 5)')
+    parser.add_argument('--import-budget-ms', type=float, default=DEFAULT_IMPORT_BUDGET_MS,
+                        help=f'Median import time budget (default: {DEFAULT_IMPORT_BUDGET_MS})')
+    parser.add_argument('--ttfr-budget-ms', type=float, default=DEFAULT_TTFR_BUDGET_MS,
+                        help=f'Median time-to-first-response budget (default: {DEFAULT_TTFR_BUDGET_MS})')
+    parser.add_argument('--db-latency-ms', type=float, default=20.0, help='Simulated Supabase round trip (default: 20)')
+    parser.add_argument('--output', help='JSON result path (default: benchmarks/results/cold_start-<commit>.json)')
+    parser.add_argument('--child', choices=('import', 'client', 'serve'), help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, default=0, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.child:
+        child(args.child, args.port, args.db_latency_ms)
+        return
+
+    commit = git_commit()
+    print(f"🧊 Measuring cold start over {args.runs} runs (commit {commit})")
+
+    results = {
+        'import': summarize([run_child('import') for _ in range(args.runs)]),
+        'client_init': summarize([run_child('client') for _ in range(args.runs)]),
+        'time_to_first_response': summarize([measure_time_to_first_response(args.db_latency_ms) for _ in range(args.runs)]),
+    }
+    budgets = {'import': args.import_budget_ms, 'time_to_first_response': args.ttfr_budget_ms}
+
+    failures = []
+    for name, summary in results.items():
+        budget = budgets.get(name)
+        verdict = ''
+        if budget is not None:
+            within = summary['median_ms'] <= budget
+            verdict = f"   budget {budget:.0f} ms {'✅' if within else '❌'}"
+            if not within:
+                failures.append(name)
+        print(f"   {name:<24} median {summary['median_ms']:>8.1f} ms   max {summary['max_ms']:>8.1f} ms{verdict}")
+
+    report = {
+        'benchmark': 'cold_start',
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': {'runs': args.runs, 'db_latency_ms': args.db_latency_ms, 'first_request': FIRST_REQUEST},
+        'budgets_ms': budgets,
+        'results': results,
+        'over_budget': failures,
+    }
+
+    output = args.output or os.path.join(BENCHMARKS_DIR, 'results', f'cold_start-{commit}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"📄 Results written to {output}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,393 @@
+"""
+BracketsTV Fake Supabase Backend
+================================
+
+An in-process stand-in for the subset of the supabase-py table API that the
+API and ingest.py use, so benchmarks run offline and reproducibly.
+
+    client = FakeSupabase.seeded(videos_per_subcategory=200)
+    client.table('videos').select('video_id,title').eq('category', 'dsa').limit(10).execute().data
+
+The catalog is synthetic but shaped like real ingested data: one set of videos
+for every APP_CONFIG subcategory, with skewed view counts, a few missing
+statistics, realistic titles/tags/descriptions and YouTube-style video IDs.
+Seeding is deterministic for a given seed.
+
+Supported query builder methods: select, eq, neq, gt, gte, lt, lte, is_, in_,
+or_ (PostgREST logic-tree syntax, including nested and()), order (desc,
+nullsfirst), limit, upsert and execute. rpc() supports the database
+functions in RPC_FUNCTIONS and returns a query builder over their result.
+Every execute() sleeps for the configured latency to stand in for the network
+round trip to Supabase.
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config_data import APP_CONFIG, MASTER_CHANNEL_LIST
+from ranking import rank_score
+from similarity import build_similarity_index
+
+Row = Dict[str, Any]
+Predicate = Callable[[Row], bool]
+
+# Words mixed into synthetic titles, tags and descriptions
+VOCABULARY = (
+    'array', 'string', 'hash', 'map', 'tree', 'graph', 'heap', 'trie', 'stack', 'queue',
+    'recursion', 'dynamic', 'programming', 'greedy', 'binary', 'search', 'sorting', 'python',
+    'javascript', 'system', 'design', 'cache', 'database', 'scaling', 'load', 'balancer',
+    'interview', 'leetcode', 'tutorial', 'course', 'explained', 'beginner', 'advanced', 'docker',
+    'git', 'kubernetes', 'machine', 'learning', 'llm', 'prompt', 'langchain', 'behavioral',
+    'leadership', 'conflict', 'teamwork', 'productivity', 'tips', 'patterns', 'complexity',
+)
+
+_ID_ALPHABET = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_'
+
+
+class FakeResponse:
+    """Mimics postgrest's APIResponse."""
+
+    def __init__(self, data: List[Row]):
+        self.data = data
+        self.count = None
+
+
+def _split_top_level(expression: str) -> List[str]:
+    """Split a PostgREST logic tree on commas that are not nested or quoted."""
+    parts, current, depth, quoted = [], '', 0, False
+    for char in expression:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == '(':
+            depth += 1
+        elif not quoted and char == ')':
+            depth -= 1
+        if char == ',' and depth == 0 and not quoted:
+            parts.append(current)
+            current = ''
+        else:
+            current += char
+    parts.append(current)
+    return parts
+
+
+def _coerce(value: Any, like: Any) -> Any:
+    """Convert a filter value from its PostgREST string form to the column's type."""
+    if isinstance(like, bool) and isinstance(value, str):
+        return value.lower() == 'true'
+    if isinstance(like, (int, float)) and isinstance(value, str):
+        return float(value)
+    return value
+
+
+def _compare(operator: str, column: str, value: Any) -> Predicate:
+    def predicate(row: Row) -> bool:
+        current = row.get(column)
+        if operator == 'is':
+            return current is None if str(value).lower() == 'null' else current == _coerce(value, True)
+        if current is None:
+            return False
+        target = _coerce(value, current)
+        if operator == 'eq':
+            return current == target
+        if operator == 'neq':
+            return current != target
+        if operator == 'gt':
+            return current > target
+        if operator == 'gte':
+            return current >= target
+        if operator == 'lt':
+            return current < target
+        if operator == 'lte':
+            return current <= target
+        raise ValueError(f"Unsupported operator: {operator}")
+
+    return predicate
+
+
+def _parse_logic_tree(expression: str) -> Predicate:
+    """Parse one condition of an or_()/and() filter string into a predicate."""
+    expression = expression.strip()
+    for combinator, combine in (('and', all), ('or', any)):
+        if expression.startswith(combinator + '('):
+            children = [_parse_logic_tree(part) for part in _split_top_level(expression[len(combinator) + 1:-1])]
+            return lambda row: combine(child(row) for child in children)
+
+    column, operator, value = expression.split('.', 2)
+    if value.startswith('"') and value.endswith('"'):
+        value = value[1:-1]
+    return _compare(operator, column, value)
+
+
+class FakeQuery:
+    """Chainable query builder over one in-memory table."""
+
+    def __init__(self, backend: 'FakeSupabase', table: str, result: Optional[List[Row]] = None):
+        self._backend = backend
+        self._table = table
+        self._result = result
+        self._columns: Optional[List[str]] = None
+        self._filters: List[Predicate] = []
+        self._lookup: Optional[Tuple[str, List[Any]]] = None
+        self._ordering: List[Tuple[str, bool, bool]] = []
+        self._limit: Optional[int] = None
+        self._upsert: Optional[Tuple[List[Row], str]] = None
+
+    def select(self, columns: str = '*', **kwargs: Any) -> 'FakeQuery':
+        if columns.strip() not in ('*', 'count'):
+            self._columns = [column.strip() for column in columns.split(',')]
+        return self
+
+    def eq(self, column: str, value: Any) -> 'FakeQuery':
+        self._filters.append(_compare('eq', column, value))
+        if self._lookup is None:
+            self._lookup = (column, [value])
+        return self
+
+    def neq(self, column: str, value: Any) -> 'FakeQuery':
+        self._filters.append(_compare('neq', column, value))
+        return self
+
+    def gt(self, column: str, value: Any) -> 'FakeQuery':
+        self._filters.append(_compare('gt', column, value))
+        return self
+
+    def gte(self, column: str, value: Any) -> 'FakeQuery':
+        self._filters.append(_compare('gte', column, value))
+        return self
+
+    def lt(self, column: str, value: Any) -> 'FakeQuery':
+        self._filters.append(_compare('lt', column, value))
+        return self
+
+    def lte(self, column: str, value: Any) -> 'FakeQuery':
+        self._filters.append(_compare('lte', column, value))
+        return self
+
+    def is_(self, column: str, value: Any) -> 'FakeQuery':
+        self._filters.append(_compare('is', column, value))
+        return self
+
+    def in_(self, column: str, values: Sequence[Any]) -> 'FakeQuery':
+        allowed = set(values)
+        self._filters.append(lambda row: row.get(column) in allowed)
+        if self._lookup is None:
+            self._lookup = (column, list(allowed))
+        return self
+
+    def or_(self, filters: str) -> 'FakeQuery':
+        self._filters.append(_parse_logic_tree(f'or({filters})'))
+        return self
+
+    def order(self, column: str, desc: bool = False, nullsfirst: Optional[bool] = None, **kwargs: Any) -> 'FakeQuery':
+        # PostgreSQL puts NULLs first for DESC and last for ASC unless told otherwise
+        self._ordering.append((column, desc, desc if nullsfirst is None else nullsfirst))
+        return self
+
+    def limit(self, count: int) -> 'FakeQuery':
+        self._limit = count
+        return self
+
+    def upsert(self, rows: Any, on_conflict: str = 'id', **kwargs: Any) -> 'FakeQuery':
+        self._upsert = (rows if isinstance(rows, list) else [rows], on_conflict)
+        return self
+
+    def execute(self) -> FakeResponse:
+        self._backend.record_call()
+        if self._upsert is not None:
+            rows, key = self._upsert
+            return FakeResponse(self._backend.upsert(self._table, rows, key))
+
+        # The first eq()/in_() narrows the scan through a hash index, like a database would
+        if self._result is not None:
+            candidates = self._result
+        elif self._lookup:
+            candidates = self._backend.lookup(self._table, *self._lookup)
+        else:
+            candidates = self._backend.rows(self._table)
+        rows = [row for row in candidates if all(check(row) for check in self._filters)]
+
+        # Stable sorts applied from the last sort key to the first
+        for column, desc, nulls_first in reversed(self._ordering):
+            present = [row for row in rows if row.get(column) is not None]
+            missing = [row for row in rows if row.get(column) is None]
+            present.sort(key=lambda row: row[column], reverse=desc)
+            rows = missing + present if nulls_first else present + missing
+
+        if self._limit is not None:
+            rows = rows[:self._limit]
+
+        if self._columns:
+            return FakeResponse([{column: row.get(column) for column in self._columns} for row in rows])
+        return FakeResponse([dict(row) for row in rows])
+
+
+class FakeSupabase:
+    """
+    In-memory replacement for a supabase-py Client.
+
+    Args:
+        tables: Initial rows per table name
+        latency: Seconds every query sleeps before answering
+    """
+
+    def __init__(self, tables: Optional[Dict[str, List[Row]]] = None, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+        self._tables: Dict[str, List[Row]] = {name: list(rows) for name, rows in (tables or {}).items()}
+        self._indexes: Dict[Tuple[str, str], Dict[Any, List[Row]]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def seeded(cls, videos_per_subcategory: int = 100, seed: int = 42, latency: float = 0.0,
+               related: bool = False) -> 'FakeSupabase':
+        """Create a client with a synthetic catalog for every APP_CONFIG subcategory."""
+        return cls(build_catalog(videos_per_subcategory, seed, related), latency=latency)
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def rpc(self, func: str, params: Dict[str, Any]) -> FakeQuery:
+        return FakeQuery(self, func, RPC_FUNCTIONS[func](self, params))
+
+    def record_call(self) -> None:
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def rows(self, table: str) -> List[Row]:
+        with self._lock:
+            return list(self._tables.get(table, []))
+
+    def lookup(self, table: str, column: str, values: Sequence[Any]) -> List[Row]:
+        """Rows whose column equals one of values, via a hash index built on first use."""
+        with self._lock:
+            index = self._indexes.get((table, column))
+            if index is None:
+                index = {}
+                for row in self._tables.get(table, []):
+                    index.setdefault(row.get(column), []).append(row)
+                self._indexes[(table, column)] = index
+            return [row for value in values for row in index.get(value, ())]
+
+    def upsert(self, table: str, rows: List[Row], key: str) -> List[Row]:
+        with self._lock:
+            self._indexes = {name: index for name, index in self._indexes.items() if name[0] != table}
+            existing = self._tables.setdefault(table, [])
+            positions = {row.get(key): index for index, row in enumerate(existing)}
+            for row in rows:
+                if row.get(key) in positions:
+                    existing[positions[row.get(key)]] = {**existing[positions[row.get(key)]], **row}
+                else:
+                    positions[row.get(key)] = len(existing)
+                    existing.append(dict(row))
+        return [dict(row) for row in rows]
+
+
+def _videos_bundle(backend: FakeSupabase, params: Dict[str, Any]) -> List[Row]:
+    """migrations/007_videos_bundle_function.sql: the first rows of each subcategory."""
+    rows = []
+    for name in params['p_sub_categories']:
+        candidates = [row for row in backend.lookup('videos', 'sub_category', [name])
+                      if row.get('category') == params['p_category']]
+        # rank_score desc nulls last, then video_id desc
+        scored = sorted((row for row in candidates if row.get('rank_score') is not None),
+                        key=lambda row: (row['rank_score'], row['video_id']), reverse=True)
+        unscored = sorted((row for row in candidates if row.get('rank_score') is None),
+                          key=lambda row: row['video_id'], reverse=True)
+        rows.extend((scored + unscored)[:params['p_per_subcategory']])
+    return rows
+
+
+# Database functions rpc() can call
+RPC_FUNCTIONS: Dict[str, Callable[[FakeSupabase, Dict[str, Any]], List[Row]]] = {
+    'videos_bundle': _videos_bundle,
+}
+
+
+def _video_id(rng: random.Random) -> str:
+    return ''.join(rng.choice(_ID_ALPHABET) for _ in range(11))
+
+
+def build_catalog(videos_per_subcategory: int, seed: int = 42, related: bool = False) -> Dict[str, List[Row]]:
+    """
+    Generate subcategories, videos and app_state rows shaped like ingested data.
+
+    Args:
+        videos_per_subcategory: Number of videos per APP_CONFIG subcategory
+        seed: Random seed; the same seed always yields the same catalog
+        related: Also build the related_videos table the way ingest.py does
+            (takes about a second per thousand videos)
+
+    Returns:
+        Rows per table name
+    """
+    rng = random.Random(seed)
+    now = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    all_channels = sorted(MASTER_CHANNEL_LIST)
+    subcategories: List[Row] = []
+    videos: List[Row] = []
+
+    for category_config in APP_CONFIG:
+        category = category_config['main_category']
+        for subcategory in category_config['subcategories']:
+            subcategory_row = {
+                'main_category': category,
+                'name': subcategory['name'],
+                'strategy': subcategory['strategy'],
+                'search_query': subcategory['search_query'],
+                'is_active': subcategory['is_active'],
+                'display_order': subcategory['display_order'],
+            }
+            subcategories.append(subcategory_row)
+
+            channels = subcategory['channels'] or all_channels
+            for _ in range(videos_per_subcategory):
+                words = rng.sample(VOCABULARY, 6)
+                published = now - timedelta(days=rng.uniform(0, 3 * 365))
+                views = int(rng.lognormvariate(10, 2))
+                has_stats = rng.random() > 0.03
+                video = {
+                    'video_id': _video_id(rng),
+                    'category': category,
+                    'sub_category': subcategory['name'],
+                    'title': f"{subcategory['name']}: {' '.join(words[:4]).title()}",
+                    'description': ' '.join(rng.choice(VOCABULARY) for _ in range(60))[:500],
+                    'channel_title': rng.choice(channels),
+                    'published_at': published.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                    'thumbnail_url': 'https://i.ytimg.com/vi/placeholder/hqdefault.jpg',
+                    'view_count': views if has_stats else None,
+                    'like_count': int(views * rng.uniform(0.005, 0.05)) if has_stats else None,
+                    'duration': rng.randint(60, 4 * 3600),
+                    'tags': words[2:],
+                    'updated_at': (published + timedelta(days=1)).strftime('%Y-%m-%dT%H:%M:%S.%fZ'),
+                }
+                video['rank_score'] = rank_score(video, subcategory_row)
+                videos.append(video)
+
+    tables = {
+        'subcategories': subcategories,
+        'videos': videos,
+        'app_state': [{'key': 'data_version', 'value': now.isoformat()}],
+    }
+
+    if related:
+        updated_at = now.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+        tables['related_videos'] = [
+            {
+                'video_id': video_id,
+                'related': [{'video_id': other, 'score': score} for other, score in neighbors],
+                'updated_at': updated_at,
+            }
+            for video_id, neighbors in build_similarity_index(videos).items()
+        ]
+
+    return tables
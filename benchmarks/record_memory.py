@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+BracketsTV Video Record Memory Benchmark
+========================================
+
+Compares the memory the API retains for cached videos kept as plain dicts
+(as parsed from Supabase responses) with the same videos kept as compact
+VideoRecords (api/records.py).
+
+Rows come from a synthetic catalog (fake_supabase.build_catalog), serialized
+and parsed back one page at a time like real responses, so equal strings in
+different rows are separate objects, as they are in the API. Memory is
+measured with tracemalloc and reported per 10,000 videos, for the list-view
+projection (LIST_FIELDS) and for complete records.
+
+Usage:
+    python benchmarks/record_memory.py
+    python benchmarks/record_memory.py --videos 50000
+"""
+
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Sequence
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCHMARKS_DIR)
+API_DIR = os.path.join(REPO_ROOT, 'api')
+sys.path.insert(0, API_DIR)
+os.environ.setdefault('LOG_LEVEL', 'OFF')
+
+from fake_supabase import build_catalog  # noqa: E402
+from index import LIST_FIELDS, VIDEO_COLUMNS  # noqa: E402
+from records import compact_rows  # noqa: E402
+
+PAGE_SIZE = 50
+
+
+def parsed_pages(videos: List[Dict[str, Any]], fields: Sequence[str]) -> List[List[Dict[str, Any]]]:
+    """The videos as the API receives them: one freshly parsed JSON response per page."""
+    pages = []
+    for i in range(0, len(videos), PAGE_SIZE):
+        page = [{field: video.get(field) for field in fields} for video in videos[i:i + PAGE_SIZE]]
+        pages.append(json.loads(json.dumps(page)))
+    return pages
+
+
+def retained_bytes(build: Callable[[], Any]) -> int:
+    """Bytes still allocated by build()'s result once it returns."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del result
+    return after - before
+
+
+def measure(videos: List[Dict[str, Any]], fields: Sequence[str]) -> Dict[str, Any]:
+    as_dicts = retained_bytes(lambda: parsed_pages(videos, fields))
+    as_records = retained_bytes(lambda: [compact_rows(page) for page in parsed_pages(videos, fields)])
+
+    scale = 10000 / len(videos)
+    return {
+        'fields': len(fields),
+        'dicts_mb_per_10k': round(as_dicts * scale / 2**20, 2),
+        'records_mb_per_10k': round(as_records * scale / 2**20, 2),
+        'saved_mb_per_10k': round((as_dicts - as_records) * scale / 2**20, 2),
+        'saved_percent': round((1 - as_records / as_dicts) * 100, 1),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return 'unknown'
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Measure memory of cached videos as dicts vs VideoRecords.')
+    parser.add_argument('--videos', type=int, default=20000, help='Videos to measure (default: 20000)')
+    parser.add_argument('--seed', type=int, default=42, help='Catalog seed (default: 42)')
+    parser.add_argument('--output', help='JSON result path (default: benchmarks/results/record_memory-<commit>.json)')
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    commit = git_commit()
+    per_subcategory = len(build_catalog(1, args.seed)['videos'])
+    videos = build_catalog(math.ceil(args.videos / per_subcategory), args.seed)['videos'][:args.videos]
+    print(f"🧮 Measuring cached video memory for {len(videos)} videos (commit {commit})")
+
+    results = {
+        'list_fields': measure(videos, LIST_FIELDS),
+        'all_fields': measure(videos, VIDEO_COLUMNS),
+    }
+    for name, result in results.items():
+        print(f"   {name:<12} dicts {result['dicts_mb_per_10k']:>6.2f} MB   records {result['records_mb_per_10k']:>6.2f} MB"
+              f"   saved {result['saved_mb_per_10k']:>6.2f} MB ({result['saved_percent']}%) per 10k videos")
+
+    report = {
+        'benchmark': 'record_memory',
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': {'videos': len(videos), 'page_size': PAGE_SIZE, 'seed': args.seed},
+        'results': results,
+    }
+
+    output = args.output or os.path.join(BENCHMARKS_DIR, 'results', f'record_memory-{commit}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"📄 Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
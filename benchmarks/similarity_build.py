@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+BracketsTV Related Videos Index Build Benchmark
+===============================================
+
+Times build_similarity_index (similarity.py), the step ingest.py runs over
+the whole catalog after every ingestion, against catalog size. Catalogs are
+generated with fake_supabase.build_catalog, so titles and tags come from a
+small vocabulary; that is a worst case for the index (every term is common)
+compared with real titles.
+
+For each size the build is repeated and the median time is reported, along
+with the time per video. That grows until common terms' posting lists reach
+MAX_POSTINGS (a few thousand videos here) and stays roughly flat after that.
+
+Usage:
+    python benchmarks/similarity_build.py
+    python benchmarks/similarity_build.py --sizes 1000,5000,20000 --runs 5
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCHMARKS_DIR)
+sys.path.insert(0, REPO_ROOT)
+
+from fake_supabase import build_catalog  # noqa: E402
+from similarity import DEFAULT_NEIGHBORS, build_similarity_index  # noqa: E402
+
+DEFAULT_SIZES = (1000, 2500, 5000, 10000, 20000)
+
+
+def catalog_of_size(size: int, seed: int) -> List[Dict[str, Any]]:
+    """The first `size` videos of a synthetic catalog spread over every subcategory."""
+    per_subcategory = len(build_catalog(1, seed)['videos'])
+    videos = build_catalog(math.ceil(size / per_subcategory), seed)['videos']
+    return videos[:size]
+
+
+def measure(videos: List[Dict[str, Any]], runs: int, k: int) -> Dict[str, Any]:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        index = build_similarity_index(videos, k)
+        timings.append(time.perf_counter() - started)
+
+    median = statistics.median(timings)
+    return {
+        'videos': len(videos),
+        'median_s': round(median, 3),
+        'min_s': round(min(timings), 3),
+        'max_s': round(max(timings), 3),
+        'us_per_video': round(median / len(videos) * 1e6, 1),
+        'avg_neighbors': round(sum(len(n) for n in index.values()) / max(1, len(index)), 2),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return 'unknown'
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Measure related-videos index build time against catalog size.')
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help='Comma-separated catalog sizes (default: %(default)s)')
+    parser.add_argument('--runs', type=int, default=3, help='Builds per size (default: 3)')
+    parser.add_argument('--neighbors', type=int, default=DEFAULT_NEIGHBORS,
+                        help=f'Neighbors kept per video (default: {DEFAULT_NEIGHBORS})')
+    parser.add_argument('--seed', type=int, default=42, help='Catalog seed (default: 42)')
+    parser.add_argument('--output', help='JSON result path (default: benchmarks/results/similarity_build-<commit>.json)')
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    commit = git_commit()
+    print(f"🔗 Timing related-videos index builds over {args.runs} runs (commit {commit})")
+
+    results = []
+    for size in sizes:
+        result = measure(catalog_of_size(size, args.seed), args.runs, args.neighbors)
+        results.append(result)
+        print(f"   {result['videos']:>7} videos   median {result['median_s']:>8.3f} s"
+              f"   {result['us_per_video']:>8.1f} µs/video   {result['avg_neighbors']:.1f} neighbors")
+
+    report = {
+        'benchmark': 'similarity_build',
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': {'runs': args.runs, 'neighbors': args.neighbors, 'seed': args.seed},
+        'results': results,
+    }
+
+    output = args.output or os.path.join(BENCHMARKS_DIR, 'results', f'similarity_build-{commit}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"📄 Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -15,6 +15,10 @@ const colors = {
 // API base URL - uses environment variable in production, localhost in development
 const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://127.0.0.1:8001';
 
+// Small first page for fast first paint; "Load more" fetches the next pages
+const FIRST_PAGE_SIZE = 12;
+const NEXT_PAGE_SIZE = 24;
+
 // Custom TextIcon component for languages without specific icons
 const TextIcon = ({ name }) => (
   <div className="flex items-center justify-center h-10 w-10 border border-gray-600 rounded-md bg-gray-800">
@@ -121,17 +125,21 @@ function App() {
   const [subcategories, setSubcategories] = useState([]);
   const [activeSubcategory, setActiveSubcategory] = useState(null);
   const [videos, setVideos] = useState([]);
+  const [videosBySubcategory, setVideosBySubcategory] = useState({});
+  const [nextCursorBySubcategory, setNextCursorBySubcategory] = useState({});
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
   const [isLoadingSubcategories, setIsLoadingSubcategories] = useState(false);
-  const [isLoadingVideos, setIsLoadingVideos] = useState(false);
   const [error, setError] = useState(null);
   const [selectedVideo, setSelectedVideo] = useState(null);
 
-  // Fetch subcategories whenever activeMainCategory changes
+  // Fetch the category bundle (subcategories + first page of videos) whenever activeMainCategory changes
   useEffect(() => {
-    const fetchSubcategories = async () => {
-      // Only fetch subcategories for non-language categories
+    const fetchBundle = async () => {
+      // Only fetch bundles for non-language categories
       if (activeMainCategory === 'languages') {
         setSubcategories([]);
+        setVideosBySubcategory({});
+        setNextCursorBySubcategory({});
         return;
       }
 
@@ -139,7 +147,7 @@ function App() {
       setError(null);
       
       //chindhamani response_url is updated and included in the error msg for debugging
-      const response_url = `${API_BASE_URL}/?type=subcategories&category=${activeMainCategory}`;
+      const response_url = `${API_BASE_URL}/?type=bundle&category=${activeMainCategory}&limit=${FIRST_PAGE_SIZE}`;
       try {
         const response = await fetch(response_url);
         
@@ -148,18 +156,31 @@ function App() {
         }
         
         const data = await response.json();
+        const bundleSubcategories = Array.isArray(data.subcategories) ? data.subcategories : [];
         
-        if (Array.isArray(data) && data.length > 0) {
-          setSubcategories(data);
+        if (bundleSubcategories.length > 0) {
+          const videoMap = {};
+          const cursorMap = {};
+          bundleSubcategories.forEach((subcategory) => {
+            videoMap[subcategory.name] = subcategory.videos || [];
+            cursorMap[subcategory.name] = subcategory.next_cursor || null;
+          });
+          setVideosBySubcategory(videoMap);
+          setNextCursorBySubcategory(cursorMap);
+          setSubcategories(bundleSubcategories.map((subcategory) => subcategory.name));
           // Automatically set the first subcategory as active
-          setActiveSubcategory(data[0]);
+          setActiveSubcategory(bundleSubcategories[0].name);
         } else {
+          setVideosBySubcategory({});
+          setNextCursorBySubcategory({});
           setSubcategories([]);
           setActiveSubcategory(null);
         }
       } catch (err) {
         console.error('Error fetching subcategories:', err);
         setError(`Failed to load subcategories: ${err.message}`);
+        setVideosBySubcategory({});
+        setNextCursorBySubcategory({});
         setSubcategories([]);
         setActiveSubcategory(null);
       } finally {
@@ -167,49 +188,73 @@ function App() {
       }
     };
 
-    fetchSubcategories();
+    fetchBundle();
   }, [activeMainCategory]);
 
-  // Fetch videos whenever activeSubcategory changes
+  // Show the bundled videos whenever activeSubcategory changes - no extra request needed
   useEffect(() => {
-    const fetchVideos = async () => {
-      // Don't fetch if no subcategory is selected or if we're on the language hub
-      if (!activeSubcategory || activeMainCategory === 'languages') {
-        setVideos([]);
-        return;
+    // Nothing to show if no subcategory is selected or if we're on the language hub
+    if (!activeSubcategory || activeMainCategory === 'languages') {
+      setVideos([]);
+      return;
+    }
+
+    setVideos(videosBySubcategory[activeSubcategory] || []);
+  }, [activeMainCategory, activeSubcategory, videosBySubcategory]);
+
+  // Fetch the next page of videos for the active subcategory using its cursor
+  const handleLoadMore = async () => {
+    const cursor = nextCursorBySubcategory[activeSubcategory];
+    if (!cursor || isLoadingMore) {
+      return;
+    }
+
+    const subcategory = activeSubcategory;
+    setIsLoadingMore(true);
+
+    const response_url = `${API_BASE_URL}/?type=videos&category=${activeMainCategory}&subcategory=${encodeURIComponent(subcategory)}&limit=${NEXT_PAGE_SIZE}&cursor=${encodeURIComponent(cursor)}`;
+    try {
+      const response = await fetch(response_url);
+
+      if (!response.ok) {
+        throw new Error(`${response_url} HTTP error! status: ${response.status}`);
       }
 
-      setIsLoadingVideos(true);
-      setError(null);
-      
-      //chindhamani response_url is updated and included in the error msg for debugging
-      const response_url = `${API_BASE_URL}/?type=videos&category=${activeMainCategory}&subcategory=${encodeURIComponent(activeSubcategory)}`;
-      try {
-        const response = await fetch(response_url);
-        
-        
-        if (!response.ok) {
-          throw new Error(`${response_url} HTTP error! status: ${response.status}`);
-        }
-        
-        const data = await response.json();
-        
-        if (Array.isArray(data) && data.length > 0) {
-          setVideos(data);
-        } else {
-          setVideos([]);
-        }
-      } catch (err) {
-        console.error('Error fetching videos:', err);
-        setError(`Failed to load videos: ${err.message}`);
-        setVideos([]);
-      } finally {
-        setIsLoadingVideos(false);
+      const data = await response.json();
+      setVideosBySubcategory((current) => ({
+        ...current,
+        [subcategory]: [...(current[subcategory] || []), ...(data.videos || [])]
+      }));
+      setNextCursorBySubcategory((current) => ({ ...current, [subcategory]: data.next_cursor || null }));
+    } catch (err) {
+      console.error('Error fetching more videos:', err);
+      setError(`Failed to load more videos: ${err.message}`);
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
+  // Open the player right away, then fill in detail fields (description, tags) the card list omits
+  const handleVideoClick = async (video) => {
+    setSelectedVideo(video);
+
+    const response_url = `${API_BASE_URL}/?type=video&video_id=${encodeURIComponent(video.video_id)}`;
+    try {
+      const response = await fetch(response_url);
+
+      if (!response.ok) {
+        throw new Error(`${response_url} HTTP error! status: ${response.status}`);
       }
-    };
 
-    fetchVideos();
-  }, [activeMainCategory, activeSubcategory]);
+      const details = await response.json();
+      setSelectedVideo((current) => (
+        current && current.video_id === video.video_id ? { ...current, ...details } : current
+      ));
+    } catch (err) {
+      // The player still works with the card fields, so just log it
+      console.error('Error fetching video details:', err);
+    }
+  };
 
   // Handle navigation clicks
   const handleNavClick = (categoryPath) => {
@@ -217,6 +262,8 @@ function App() {
       setActiveMainCategory('languages');
       setSubcategories([]);
       setActiveSubcategory(null);
+      setVideosBySubcategory({});
+      setNextCursorBySubcategory({});
       setVideos([]);
       return;
     }
@@ -349,7 +396,7 @@ function App() {
     // Get current category display info
     const currentCategoryInfo = categories.find(cat => cat.path === activeMainCategory);
     const isLanguageHub = activeMainCategory === 'languages';
-    const isLoading = isLoadingSubcategories || isLoadingVideos;
+    const isLoading = isLoadingSubcategories;
 
     return (
       <div className="min-h-screen" style={{ backgroundColor: colors['near-black'] }}>
@@ -447,7 +494,7 @@ function App() {
                       <FaCode className="w-12 h-12" style={{ color: colors['glowing-cyan'] }} />
                     </div>
                     <h3 className="text-2xl font-semibold mb-4" style={{ color: colors['light-gray'] }}>
-                      {isLoadingSubcategories ? 'Loading Categories...' : 'Loading Videos...'}
+                      Loading Videos...
                     </h3>
                     <p className="text-lg" style={{ color: colors['light-gray'], opacity: 0.6 }}>
                       Fetching the latest content for you
@@ -490,7 +537,7 @@ function App() {
                     {videos.map((video) => (
                       <div
                         key={video.video_id}
-                        onClick={() => setSelectedVideo(video)}
+                        onClick={() => handleVideoClick(video)}
                         className="rounded-lg overflow-hidden cursor-pointer transition-all duration-300 hover:scale-105 focus:outline-none focus:ring-0"
                         style={{ backgroundColor: colors['intermediate-gray'] }}
                         onMouseEnter={(e) => {
@@ -536,6 +583,20 @@ function App() {
                     ))}
                   </div>
                 )}
+
+                {/* Load More */}
+                {!isLoading && !error && videos.length > 0 && nextCursorBySubcategory[activeSubcategory] && (
+                  <div className="text-center mt-10">
+                    <button
+                      onClick={handleLoadMore}
+                      disabled={isLoadingMore}
+                      className="px-6 py-3 rounded-lg font-semibold transition-all duration-300 focus:outline-none focus:ring-0"
+                      style={{ backgroundColor: colors['dark-charcoal'], color: colors['glowing-cyan'], opacity: isLoadingMore ? 0.6 : 1 }}
+                    >
+                      {isLoadingMore ? 'Loading...' : 'Load More'}
+                    </button>
+                  </div>
+                )}
               </div>
             )}
           </main>
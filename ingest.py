@@ -9,23 +9,83 @@ YouTube Data API, and saves the results back to the database.
 It's designed to run as a scheduled background job (e.g., via cron or a 
 task scheduler) to keep the video database fresh and up-to-date.
 
+Every saved video gets a rank_score (see ranking.py) that the API orders
+subcategories by. Videos saved before scoring existed are scored at the
+start of the next run.
+
+After a run that saved videos, the related-videos index (see similarity.py)
+is rebuilt over the whole catalog and stored in related_videos.
+
+A run searches every planned subcategory, then pools the video IDs of all
+searches, dedupes them and fetches their details once, in full batches of 50,
+before fanning the details back out and saving each subcategory's videos.
+
+Every stage runs on a pool of worker threads. All YouTube calls go through
+one shared adaptive throttle (see youtube_throttle.py) that speeds up while
+calls succeed and backs off when YouTube rate-limits, and a quota error in
+any worker stops all of them.
+
+Each run plans its YouTube quota spend up front (see quota_planner.py): the
+stalest, highest-priority subcategories are refreshed first and those that do
+not fit in the budget wait for a later run. The budget is per quota day
+(midnight to midnight Pacific Time): the units each run spends are added up
+in app_state, and a run only plans with what earlier runs that day left over.
+
+YouTube responses are cached on disk (see youtube_cache.py), so re-running
+after a crash or again the same day costs little or no quota.
+
+With --stats-only, no searches run: the view and like counts of the videos
+already stored are refreshed with videos.list(part='statistics'), 50 videos
+per quota unit, and videos whose counts changed are re-saved with a new
+rank_score. This is cheap enough to run hourly.
+
+Usage:
+    python ingest.py
+    python ingest.py --dry-run          # print the quota plan and exit
+    python ingest.py --budget 5000      # spend at most 5,000 quota units a day
+    python ingest.py --concurrency 1    # one subcategory at a time
+    python ingest.py --no-cache         # ignore cached YouTube responses
+    python ingest.py --stats-only       # only refresh view/like counts of stored videos
+
 Tables:
     - Read from: channels, subcategories, subcategory_channels
-    - Write to: videos
+    - Write to: videos, related_videos, subcategories (last_ingested_at),
+      app_state (data_version stamp used by the API cache, youtube_quota_used
+      with the quota units spent on the current quota day)
 
 Environment Variables Required:
     - YOUTUBE_API_KEY: Your YouTube Data API v3 key
     - SUPABASE_URL: Your Supabase project URL
     - SUPABASE_KEY: Your Supabase service role key (or anon key with proper RLS)
+
+Optional Environment Variables:
+    - INGEST_CONCURRENCY: Subcategories processed at once (default: 4)
+    - YOUTUBE_QUOTA_BUDGET: Quota units all runs of a quota day may spend together (default: 10000,
+      the daily quota)
+    - YOUTUBE_REQUESTS_PER_SECOND: Starting YouTube API request rate (default: 5)
+    - YOUTUBE_MAX_REQUESTS_PER_SECOND: Ceiling for the adaptive request rate (default: 20)
+    - YOUTUBE_CACHE_PATH: YouTube response cache file (default: .youtube_cache.sqlite3 next to this script)
+    - YOUTUBE_CACHE_MAX_MB: Size the response cache is kept under (default: 200)
 """
 
+import argparse
+import json
 import os
 import sys
+import threading
 import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Any
 from dotenv import load_dotenv
 
+from quota_planner import DAILY_QUOTA, plan_ingestion, quota_day, quota_units
+from ranking import rank_score
+from similarity import build_similarity_index
+from youtube_cache import YouTubeResponseCache
+from youtube_throttle import AdaptiveRateLimiter
+
 try:
     from googleapiclient.discovery import build
     from googleapiclient.errors import HttpError
@@ -58,6 +118,26 @@ SUPABASE_KEY = os.getenv('SUPABASE_KEY')
 # Process all subcategories
 TEST_LIMIT = None  # Set to a number (e.g., 3) to limit processing for testing
 
+# YouTube quota units all runs of a quota day may spend together
+YOUTUBE_QUOTA_BUDGET = int(os.getenv('YOUTUBE_QUOTA_BUDGET', str(DAILY_QUOTA)))
+
+# app_state key holding the units spent on the current quota day
+# (add_youtube_quota_used in migrations/009 writes it)
+QUOTA_USAGE_KEY = 'youtube_quota_used'
+
+# Concurrency and YouTube API pacing
+INGEST_CONCURRENCY = int(os.getenv('INGEST_CONCURRENCY', '4'))
+YOUTUBE_REQUESTS_PER_SECOND = float(os.getenv('YOUTUBE_REQUESTS_PER_SECOND', '5'))
+YOUTUBE_MAX_REQUESTS_PER_SECOND = float(os.getenv('YOUTUBE_MAX_REQUESTS_PER_SECOND', '20'))
+YOUTUBE_MAX_ATTEMPTS = 4  # Tries per call when YouTube rate-limits or fails with a 5xx
+
+# On-disk cache of YouTube responses shared by runs (see youtube_cache.py)
+YOUTUBE_CACHE_PATH = os.getenv('YOUTUBE_CACHE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.youtube_cache.sqlite3'))
+YOUTUBE_CACHE_MAX_MB = int(os.getenv('YOUTUBE_CACHE_MAX_MB', '200'))
+
+# Errors YouTube returns when calls come in too fast (as opposed to the daily quota)
+RATE_LIMIT_REASONS = {'rateLimitExceeded', 'userRateLimitExceeded'}
+
 # Validate environment variables
 if not YOUTUBE_API_KEY:
     print("ERROR: YOUTUBE_API_KEY not found in environment variables")
@@ -67,9 +147,17 @@ if not SUPABASE_URL or not SUPABASE_KEY:
     print("ERROR: SUPABASE_URL and SUPABASE_KEY must be set in environment variables")
     sys.exit(1)
 
-# Initialize clients
-youtube = build('youtube', 'v3', developerKey=YOUTUBE_API_KEY)
+# Initialize clients (YouTube clients are not thread-safe: one per worker thread, see get_youtube)
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+throttle = AdaptiveRateLimiter(rate=YOUTUBE_REQUESTS_PER_SECOND, max_rate=YOUTUBE_MAX_REQUESTS_PER_SECOND)
+_thread_state = threading.local()
+
+# YouTube API requests sent per resource, for the quota used
+youtube_calls: Counter = Counter()
+_youtube_calls_lock = threading.Lock()
+
+# Opened by main() unless --no-cache is given
+response_cache: Optional[YouTubeResponseCache] = None
 
 print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Starting BracketsTV Video Ingestion")
 print(f"Supabase URL: {SUPABASE_URL}")
@@ -77,6 +165,95 @@ print(f"YouTube API Key: {'*' * (len(YOUTUBE_API_KEY) - 4)}{YOUTUBE_API_KEY[-4:]
 print("-" * 80)
 
 
+def get_youtube():
+    """
+    YouTube API client for the calling thread.
+    
+    googleapiclient service objects share one httplib2 connection that must not
+    be used from two threads at once, so every worker builds its own.
+    """
+    if not hasattr(_thread_state, 'youtube'):
+        _thread_state.youtube = build('youtube', 'v3', developerKey=YOUTUBE_API_KEY, cache_discovery=False)
+    return _thread_state.youtube
+
+
+def youtube_list(resource: str, use_cache: bool = True, **params) -> Dict[str, Any]:
+    """
+    Call a YouTube Data API list endpoint through the shared throttle.
+    
+    Rate-limit (429, rateLimitExceeded) and server errors slow the throttle
+    down for every worker and are retried; a quota error stops every worker.
+    
+    Responses are kept in the on-disk response cache (unless --no-cache): a
+    fresh cached response is returned without calling YouTube, and a stale
+    one is revalidated with its ETag.
+    
+    Args:
+        resource: API resource, e.g. 'search' or 'videos'
+        use_cache: Whether to use the response cache for this call
+        **params: Parameters for <resource>.list()
+        
+    Returns:
+        The API response
+        
+    Raises:
+        QuotaExceededException: The daily quota is used up (in this or another worker)
+        HttpError: Any other API error, or a retryable one that persisted
+    """
+    cache = response_cache if use_cache else None
+    cached = cache.lookup(resource, params) if cache is not None else None
+    if cached and cached['fresh']:
+        return cached['response']
+    
+    for attempt in range(1, YOUTUBE_MAX_ATTEMPTS + 1):
+        # Checked after waiting for a slot, so no call starts once any worker hit the quota
+        throttle.acquire()
+        if throttle.aborted.is_set():
+            raise QuotaExceededException("YouTube API quota limit reached")
+        
+        with _youtube_calls_lock:
+            youtube_calls[resource] += 1
+        
+        try:
+            request = getattr(get_youtube(), resource)().list(**params)
+            if cached:
+                # Stale but with an ETag: YouTube answers 304 if nothing changed
+                request.headers['If-None-Match'] = cached['etag']
+            response = request.execute()
+            
+        except HttpError as e:
+            status = e.resp.status
+            
+            if status == 304 and cached:
+                throttle.record_success()
+                cache.mark_revalidated(cached['key'])
+                return cached['response']
+            
+            reason = e.error_details[0].get('reason', '') if e.error_details else ''
+            
+            # Quota exceeded - abort immediately to save remaining quota
+            if status == 403 and 'quota' in reason.lower():
+                if not throttle.aborted.is_set():
+                    throttle.abort()
+                    print("   ⚠ YouTube API quota exceeded!")
+                    print("   ⚠ Aborting ingestion to prevent further quota consumption.")
+                raise QuotaExceededException("YouTube API quota limit reached")
+            
+            retryable = status == 429 or status >= 500 or (status == 403 and reason in RATE_LIMIT_REASONS)
+            if not retryable or attempt == YOUTUBE_MAX_ATTEMPTS:
+                raise
+            
+            retry_after = e.resp.get('retry-after', '')
+            throttle.record_throttle(float(retry_after) if retry_after.isdigit() else 0.0)
+            print(f"   ⚠ YouTube API throttled ({status} {reason}), slowing down to {throttle.rate:.1f} req/s and retrying...")
+            continue
+        
+        throttle.record_success()
+        if cache is not None:
+            cache.store(resource, params, response)
+        return response
+
+
 def get_all_subcategories() -> List[Dict[str, Any]]:
     """
     Fetch all active subcategories from the database.
@@ -131,7 +308,7 @@ def get_channel_handles_for_subcategory(subcategory_id: int) -> List[str]:
 
 def search_youtube_videos(query: str, order: str = 'relevance', 
                          video_duration: Optional[str] = None, 
-                         max_results: int = 20) -> List[str]:
+                         max_results: int = 20) -> Optional[List[str]]:
     """
     Search YouTube and return a list of video IDs.
     
@@ -142,7 +319,7 @@ def search_youtube_videos(query: str, order: str = 'relevance',
         max_results: Maximum number of results to return
         
     Returns:
-        List of video IDs
+        List of video IDs, or None if the search failed (after retries)
     """
     try:
         print(f"   → Searching YouTube: query='{query[:60]}...', order={order}, duration={video_duration}")
@@ -159,69 +336,48 @@ def search_youtube_videos(query: str, order: str = 'relevance',
         if video_duration:
             search_params['videoDuration'] = video_duration
         
-        response = youtube.search().list(**search_params).execute()
+        response = youtube_list('search', **search_params)
         
         video_ids = [item['id']['videoId'] for item in response.get('items', [])]
         print(f"   ✓ Found {len(video_ids)} videos")
         
         return video_ids
         
+    except QuotaExceededException:
+        raise
+        
     except HttpError as e:
         print(f"   ✗ YouTube API Error: {e.resp.status} - {e.error_details}")
-        
-        # Check for quota exceeded error - abort immediately to save remaining quota
-        if e.resp.status == 403:
-            error_reason = e.error_details[0].get('reason', '') if e.error_details else ''
-            if 'quota' in error_reason.lower():
-                print("   ⚠ YouTube API quota exceeded!")
-                print("   ⚠ Aborting ingestion to prevent further quota consumption.")
-                raise QuotaExceededException("YouTube API quota limit reached")
-        
-        return []
+        return None
         
     except Exception as e:
         print(f"   ✗ ERROR searching YouTube: {e}")
-        return []
+        return None
 
 
-def get_video_details(video_ids: List[str]) -> List[Dict[str, Any]]:
+def fetch_video_details_batch(video_ids: List[str]) -> List[Dict[str, Any]]:
     """
-    Fetch full details for a list of video IDs using the videos.list endpoint.
+    Fetch full details for up to 50 video IDs with one videos.list call.
     
     This is a more efficient API call that retrieves comprehensive metadata
     including statistics, content details, and full descriptions.
     
     Args:
-        video_ids: List of YouTube video IDs
+        video_ids: Up to 50 YouTube video IDs
         
     Returns:
         List of video detail dictionaries
     """
-    if not video_ids:
-        return []
-    
     try:
-        print(f"   → Fetching full details for {len(video_ids)} videos...")
-        
-        # YouTube API allows up to 50 IDs per request
-        all_videos = []
-        
-        for i in range(0, len(video_ids), 50):
-            batch = video_ids[i:i+50]
-            
-            response = youtube.videos().list(
-                part='snippet,statistics,contentDetails',  # Include all data: snippet, statistics, and contentDetails
-                id=','.join(batch)
-            ).execute()
-            
-            all_videos.extend(response.get('items', []))
-            
-            # Rate limiting: small delay between batches
-            if i + 50 < len(video_ids):
-                time.sleep(0.2)
+        response = youtube_list(
+            'videos',
+            part='snippet,statistics,contentDetails',  # Include all data: snippet, statistics, and contentDetails
+            id=','.join(video_ids)
+        )
+        return response.get('items', [])
         
-        print(f"   ✓ Retrieved details for {len(all_videos)} videos")
-        return all_videos
+    except QuotaExceededException:
+        raise
         
     except HttpError as e:
         print(f"   ✗ YouTube API Error fetching details: {e.resp.status} - {e.error_details}")
@@ -232,6 +388,109 @@ def get_video_details(video_ids: List[str]) -> List[Dict[str, Any]]:
         return []
 
 
+def get_video_details(video_ids: List[str], executor: ThreadPoolExecutor) -> Dict[str, Dict[str, Any]]:
+    """
+    Fetch full details for every video found in a run.
+    
+    The IDs from all subcategories' searches are pooled and deduplicated, then
+    fetched in full batches of 50 (the most videos.list accepts), so a video
+    found by several subcategories costs one lookup and the run makes as few
+    videos.list calls as possible.
+    
+    Args:
+        video_ids: YouTube video IDs from every search, duplicates included
+        executor: Worker pool the batches are fetched on
+        
+    Returns:
+        Video detail dictionaries by video ID. If the quota runs out partway,
+        the details fetched until then (throttle.aborted is set).
+    """
+    # Sorted, so the same searches give the same batches (and cache keys) next run
+    unique_ids = sorted(set(video_ids))
+    if not unique_ids:
+        return {}
+    
+    batches = [unique_ids[i:i+50] for i in range(0, len(unique_ids), 50)]
+    print(f"\n📦 Fetching full details for {len(unique_ids)} unique videos "
+          f"({len(video_ids) - len(unique_ids)} duplicates pooled) in {len(batches)} batches...")
+    
+    details = {}
+    futures = [executor.submit(fetch_video_details_batch, batch) for batch in batches]
+    
+    for future in futures:
+        try:
+            for video in future.result():
+                details[video['id']] = video
+        except QuotaExceededException:
+            # The other batches stop at their next call; keep what was fetched
+            continue
+    
+    print(f"   ✓ Retrieved details for {len(details)} videos")
+    return details
+
+
+def assign_video_owners(subcategories: List[Dict[str, Any]],
+                        found: Dict[int, List[str]]) -> Dict[int, List[str]]:
+    """
+    Give every video found in a run exactly one subcategory to be saved under.
+    
+    A video found by several subcategories goes to the first of them in
+    subcategories' order (the plan order), so the saves, which run
+    concurrently, never upsert the same row and the row's category and
+    rank_score do not depend on which save finishes last.
+    
+    Args:
+        subcategories: Subcategories of the run, in plan order
+        found: Video IDs each subcategory's search found, by subcategory ID
+        
+    Returns:
+        The video IDs each subcategory saves, by subcategory ID
+    """
+    claimed = set()
+    owned = {}
+    
+    for subcategory in subcategories:
+        if subcategory['id'] not in found:
+            continue
+        
+        owned[subcategory['id']] = []
+        for video_id in found[subcategory['id']]:
+            if video_id not in claimed:
+                claimed.add(video_id)
+                owned[subcategory['id']].append(video_id)
+    
+    return owned
+
+
+def fetch_video_statistics(video_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Fetch current statistics for up to 50 video IDs with one videos.list call (1 quota unit).
+    
+    Always asks YouTube: the point is fresher counts than any cached response.
+    
+    Args:
+        video_ids: Up to 50 YouTube video IDs
+        
+    Returns:
+        Statistics (viewCount, likeCount, ...) by video ID; videos that no
+        longer exist are missing
+    """
+    try:
+        response = youtube_list('videos', use_cache=False, part='statistics', id=','.join(video_ids))
+        return {video['id']: video.get('statistics', {}) for video in response.get('items', [])}
+        
+    except QuotaExceededException:
+        raise
+        
+    except HttpError as e:
+        print(f"   ✗ YouTube API Error fetching statistics: {e.resp.status} - {e.error_details}")
+        return {}
+        
+    except Exception as e:
+        print(f"   ✗ ERROR fetching video statistics: {e}")
+        return {}
+
+
 def parse_duration_to_seconds(duration: str) -> int:
     """
     Parse YouTube ISO 8601 duration to seconds.
@@ -307,10 +566,73 @@ def format_video_for_database(video: Dict[str, Any], subcategory_id: int, catego
     }
 
 
+def score_videos(videos: List[Dict[str, Any]], subcategory: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Scoring stage: attach a rank_score to each formatted video.
+    
+    Args:
+        videos: Formatted video dictionaries
+        subcategory: Subcategory the videos were fetched for (its strategy picks the ranking weights)
+        
+    Returns:
+        The videos with rank_score set
+    """
+    return [{**video, 'rank_score': rank_score(video, subcategory)} for video in videos]
+
+
+def score_unranked_videos(subcategories: List[Dict[str, Any]]) -> int:
+    """
+    Backfill rank_score for videos saved before they were scored.
+    
+    After the first run this is a single query that finds nothing.
+    
+    Args:
+        subcategories: Active subcategories, used to look up each video's strategy
+        
+    Returns:
+        Number of videos scored
+    """
+    by_name = {(sub['main_category'], sub['name']): sub for sub in subcategories}
+    scored = 0
+    
+    try:
+        while True:
+            response = supabase.table('videos') \
+                .select('*') \
+                .is_('rank_score', 'null') \
+                .limit(1000) \
+                .execute()
+            
+            rows = response.data or []
+            if not rows:
+                break
+            
+            if not scored:
+                print("\n📈 Scoring videos saved without a rank_score...")
+            
+            rows = [
+                {**row, 'rank_score': rank_score(row, by_name.get((row['category'], row['sub_category']), {}))}
+                for row in rows
+            ]
+            saved = save_videos_to_database(rows)
+            if not saved:
+                break
+            scored += saved
+        
+    except Exception as e:
+        print(f"   ✗ ERROR scoring unranked videos: {e}")
+    
+    return scored
+
+
 def save_videos_to_database(videos: List[Dict[str, Any]]) -> int:
     """
     Save or update videos in the database using upsert.
     
+    The database stamps every saved row's updated_at with its own clock (see
+    migrations/008_videos_updated_at_trigger.sql); the API's read mirror and
+    delta feed use it to find the rows that changed.
+    
     Args:
         videos: List of formatted video dictionaries
         
@@ -339,15 +661,247 @@ def save_videos_to_database(videos: List[Dict[str, Any]]) -> int:
         return 0
 
 
-def process_subcategory(subcategory: Dict[str, Any]) -> int:
+def count_videos() -> int:
+    """Number of videos in the database."""
+    try:
+        response = supabase.table('videos').select('video_id', count='exact').limit(1).execute()
+        return response.count or 0
+        
+    except Exception as e:
+        print(f"   ✗ ERROR counting videos: {e}")
+        return 0
+
+
+def refresh_video_statistics(subcategories: List[Dict[str, Any]], budget: int, concurrency: int) -> int:
     """
-    Process a single subcategory: fetch videos and save to database.
+    Stats-only refresh: update the view and like counts of stored videos.
+    
+    Reads the catalog in chunks of 1000 by video_id and fetches statistics
+    50 videos per videos.list call, at 1 quota unit per call instead of a
+    100-unit search per subcategory. Only videos whose counts changed are
+    saved. They are saved as full rows with a recomputed rank_score, so the
+    API's ordering follows the new counts.
+    
+    Args:
+        subcategories: Active subcategories, used to look up each video's strategy
+        budget: Quota units the refresh may spend (videos past budget * 50 wait for the next run)
+        concurrency: Statistics calls made at once
+        
+    Returns:
+        Number of videos saved with new counts
+    """
+    by_name = {(sub['main_category'], sub['name']): sub for sub in subcategories}
+    calls_left = budget
+    checked = 0
+    updated = 0
+    last_id = None
+    
+    print("\n📈 Refreshing view and like counts of stored videos...")
+    
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='stats') as executor:
+            while calls_left > 0 and not throttle.aborted.is_set():
+                query = supabase.table('videos').select('*')
+                if last_id:
+                    query = query.gt('video_id', last_id)
+                rows = query.order('video_id').limit(1000).execute().data or []
+                if not rows:
+                    break
+                last_id = rows[-1]['video_id']
+                
+                batches = [rows[i:i+50] for i in range(0, len(rows), 50)][:calls_left]
+                calls_left -= len(batches)
+                futures = [
+                    executor.submit(fetch_video_statistics, [row['video_id'] for row in batch])
+                    for batch in batches
+                ]
+                
+                statistics = {}
+                for future in futures:
+                    try:
+                        statistics.update(future.result())
+                    except QuotaExceededException:
+                        # The other batches stop at their next call; keep what was fetched
+                        continue
+                
+                changed = []
+                for batch in batches:
+                    for row in batch:
+                        stats = statistics.get(row['video_id'])
+                        if stats is None:
+                            continue
+                        checked += 1
+                        
+                        view_count = int(stats['viewCount']) if stats.get('viewCount') else None
+                        like_count = int(stats['likeCount']) if stats.get('likeCount') else None
+                        if view_count == row.get('view_count') and like_count == row.get('like_count'):
+                            continue
+                        
+                        row = {**row, 'view_count': view_count, 'like_count': like_count}
+                        row['rank_score'] = rank_score(row, by_name.get((row['category'], row['sub_category']), {}))
+                        changed.append(row)
+                
+                updated += save_videos_to_database(changed)
+                
+                if len(rows) < 1000:
+                    break
+        
+    except Exception as e:
+        print(f"   ✗ ERROR refreshing video statistics: {e}")
+    
+    print(f"   ✓ Checked {checked} videos, {updated} with new counts")
+    return updated
+
+
+def update_related_videos() -> int:
+    """
+    Rebuild the related-videos index over the whole catalog and store it.
+    
+    Reads every video's title and tags, computes each video's most similar
+    videos and upserts them into related_videos for the API's type=related.
+    
+    Returns:
+        Number of videos whose related list was saved
+    """
+    try:
+        print("\n🔗 Rebuilding related videos index...")
+        build_start = time.time()
+        
+        # Page through the catalog by video_id
+        videos = []
+        last_id = None
+        while True:
+            query = supabase.table('videos').select('video_id, title, tags')
+            if last_id:
+                query = query.gt('video_id', last_id)
+            rows = query.order('video_id').limit(1000).execute().data or []
+            videos.extend(rows)
+            if len(rows) < 1000:
+                break
+            last_id = rows[-1]['video_id']
+        
+        index = build_similarity_index(videos)
+        print(f"   ✓ Indexed {len(videos)} videos in {time.time() - build_start:.2f} seconds")
+        
+        updated_at = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+        rows = [
+            {
+                'video_id': video_id,
+                'related': [{'video_id': other, 'score': score} for other, score in neighbors],
+                'updated_at': updated_at
+            }
+            for video_id, neighbors in index.items()
+        ]
+        
+        saved = 0
+        for i in range(0, len(rows), 500):
+            response = supabase.table('related_videos').upsert(rows[i:i+500], on_conflict='video_id').execute()
+            saved += len(response.data) if response.data else 0
+        
+        print(f"   ✓ Saved related videos for {saved} videos")
+        return saved
+        
+    except Exception as e:
+        print(f"   ✗ ERROR updating related videos: {e}")
+        return 0
+
+
+def mark_subcategory_ingested(subcategory_id: int) -> None:
+    """
+    Stamp a subcategory's last_ingested_at, which the quota planner orders runs by.
+    
+    Args:
+        subcategory_id: The ID of the subcategory
+    """
+    try:
+        supabase.table('subcategories') \
+            .update({'last_ingested_at': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S.%fZ')}) \
+            .eq('id', subcategory_id) \
+            .execute()
+        
+    except Exception as e:
+        print(f"   ✗ ERROR stamping subcategory as ingested: {e}")
+
+
+def bump_data_version() -> None:
+    """
+    Record a new data version stamp so API workers drop their cached responses.
+    
+    The API polls app_state.data_version and clears its in-process cache as soon
+    as the value changes, so new videos are served right after ingestion.
+    """
+    version = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+    
+    try:
+        supabase.table('app_state').upsert(
+            {'key': 'data_version', 'value': version},
+            on_conflict='key'
+        ).execute()
+        print(f"   ✓ Data version bumped to {version}")
+        
+    except Exception as e:
+        print(f"   ✗ ERROR bumping data version: {e}")
+
+
+def get_quota_used_today() -> int:
+    """
+    Quota units earlier runs spent on the current quota day (Pacific Time).
+    
+    Read from app_state.youtube_quota_used, {"day": "YYYY-MM-DD", "units": N};
+    a record from an earlier day counts as nothing spent.
+    """
+    try:
+        response = supabase.table('app_state') \
+            .select('value') \
+            .eq('key', QUOTA_USAGE_KEY) \
+            .execute()
+        
+        if not response.data:
+            return 0
+        
+        usage = json.loads(response.data[0]['value'])
+        return int(usage['units']) if usage.get('day') == quota_day() else 0
+        
+    except Exception as e:
+        print(f"   ⚠ Could not read today's quota usage, assuming none: {e}")
+        return 0
+
+
+def record_quota_used(units: int) -> None:
+    """
+    Add a run's quota spend to the current quota day's total in app_state.
+    
+    The increment runs in the database (add_youtube_quota_used, see
+    migrations/009_add_youtube_quota_used.sql), so runs that overlap never
+    overwrite each other's spend.
+    
+    Args:
+        units: Quota units the run spent
+    """
+    if not units:
+        return
+    
+    try:
+        response = supabase.rpc('add_youtube_quota_used', {'p_day': quota_day(), 'p_units': units}).execute()
+        print(f"   ✓ Quota used today: {response.data:,} units")
+        
+    except Exception as e:
+        print(f"   ✗ ERROR recording quota usage: {e}")
+
+
+def search_subcategory(subcategory: Dict[str, Any]) -> Optional[List[str]]:
+    """
+    Search stage: find the video IDs for a subcategory with its fetching strategy.
+    
+    Details are fetched later for the IDs of all subcategories at once (see
+    get_video_details).
     
     Args:
         subcategory: Subcategory dictionary from database
         
     Returns:
-        Number of videos successfully processed
+        Video IDs found (empty if the subcategory is skipped), or None if its
+        search failed
     """
     subcat_id = subcategory['id']
     subcat_name = subcategory['name']
@@ -372,7 +926,7 @@ def process_subcategory(subcategory: Dict[str, Any]) -> int:
         
         if not channel_handles:
             print("   ⚠ No curated channels found for this subcategory, skipping...")
-            return 0
+            return []
         
         # Build query: combine search_query with channel handles
         # Example: "(trees OR graphs) AND (@NeetCode OR @freeCodeCamp)"
@@ -416,7 +970,7 @@ def process_subcategory(subcategory: Dict[str, Any]) -> int:
         
         if not channel_handles:
             print("   ⚠ No curated channels found for this subcategory, skipping...")
-            return 0
+            return []
         
         # Build query with channel handles, ordered by date
         channel_part = ' OR '.join(channel_handles)
@@ -446,7 +1000,7 @@ def process_subcategory(subcategory: Dict[str, Any]) -> int:
         
         if not channel_handles:
             print("   ⚠ No curated channels found for this subcategory, skipping...")
-            return 0
+            return []
         
         # Build query with channel handles, ordered by view count for popularity
         channel_part = ' OR '.join(channel_handles)
@@ -460,15 +1014,37 @@ def process_subcategory(subcategory: Dict[str, Any]) -> int:
         
     else:
         print(f"   ⚠ Unknown strategy '{strategy}', skipping...")
-        return 0
+        return []
+    
+    return video_ids
+
+
+def save_subcategory(subcategory: Dict[str, Any], video_ids: List[str], 
+                     details: Dict[str, Dict[str, Any]]) -> int:
+    """
+    Save stage: format, score and save a subcategory's videos from the pooled details.
+    
+    Args:
+        subcategory: Subcategory dictionary from database
+        video_ids: Video IDs its search found
+        details: Video details by ID for the whole run
+        
+    Returns:
+        Number of videos successfully processed
+    """
+    subcat_id = subcategory['id']
+    subcat_name = subcategory['name']
+    category = subcategory['main_category']
+    
+    print(f"\n💾 {category} → {subcat_name}")
     
     # If no videos found, return early
     if not video_ids:
         print("   ℹ No videos found for this subcategory")
         return 0
     
-    # Fetch full video details
-    video_details = get_video_details(video_ids)
+    # Fan the pooled details back out to this subcategory
+    video_details = [details[video_id] for video_id in video_ids if video_id in details]
     
     if not video_details:
         print("   ℹ No video details retrieved")
@@ -480,16 +1056,152 @@ def process_subcategory(subcategory: Dict[str, Any]) -> int:
         for video in video_details
     ]
     
-    # Save to database
-    saved_count = save_videos_to_database(formatted_videos)
+    # Score videos for ranking, then save to database
+    scored_videos = score_videos(formatted_videos, subcategory)
+    saved_count = save_videos_to_database(scored_videos)
     
     return saved_count
 
 
+class TaskOutput:
+    """
+    Stand-in for sys.stdout that keeps concurrent subcategories' logs apart.
+    
+    Output a worker prints while processing a subcategory is held back and
+    written as one block when the subcategory is done; output from anywhere
+    else passes straight through.
+    """
+    
+    def __init__(self, stream):
+        self.stream = stream
+        self._local = threading.local()
+        self._lock = threading.Lock()
+    
+    def write(self, text: str) -> int:
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is not None:
+            buffer.append(text)
+            return len(text)
+        with self._lock:
+            return self.stream.write(text)
+    
+    def flush(self) -> None:
+        with self._lock:
+            self.stream.flush()
+    
+    def begin(self) -> None:
+        """Start holding back this thread's output."""
+        self._local.buffer = []
+    
+    def end(self) -> None:
+        """Write out this thread's held-back output."""
+        text = ''.join(self._local.buffer)
+        self._local.buffer = None
+        with self._lock:
+            self.stream.write(text)
+            self.stream.flush()
+
+
+def run_search(subcategory: Dict[str, Any], output: Optional[TaskOutput]) -> Optional[List[str]]:
+    """
+    Worker task: search one subcategory, keeping its log in one block.
+    
+    Args:
+        subcategory: Subcategory dictionary from database
+        output: The installed TaskOutput, or None when running sequentially
+        
+    Returns:
+        Video IDs found, or None if the search failed
+    """
+    if output:
+        output.begin()
+    try:
+        return search_subcategory(subcategory)
+    finally:
+        if output:
+            output.end()
+
+
+def run_save(subcategory: Dict[str, Any], video_ids: List[str], details: Dict[str, Dict[str, Any]],
+             output: Optional[TaskOutput], complete: bool) -> int:
+    """
+    Worker task: save one subcategory's videos, keeping its log in one block,
+    and record when it was refreshed.
+    
+    Args:
+        subcategory: Subcategory dictionary from database
+        video_ids: Video IDs its search found
+        details: Video details by ID for the whole run
+        output: The installed TaskOutput, or None when running sequentially
+        complete: Whether every detail was fetched; a subcategory saved from
+            partial details is not stamped, so the next run refreshes it again
+        
+    Returns:
+        Number of videos successfully processed
+    """
+    if output:
+        output.begin()
+    try:
+        saved_count = save_subcategory(subcategory, video_ids, details)
+        if complete:
+            mark_subcategory_ingested(subcategory['id'])
+        return saved_count
+    finally:
+        if output:
+            output.end()
+
+
+def print_plan(plan: Dict[str, Any], detailed: bool = False) -> None:
+    """
+    Print a quota plan from quota_planner.plan_ingestion.
+    
+    Args:
+        plan: The plan
+        detailed: List every subcategory, not just the totals
+    """
+    selected, skipped = plan['selected'], plan['skipped']
+    print(f"\n🧮 Quota plan: {plan['projected_cost']:,} of {plan['budget']:,} units "
+          f"for {len(selected)}/{len(selected) + len(skipped)} subcategories")
+    
+    if skipped:
+        print(f"   ⚠ {len(skipped)} subcategories do not fit in the budget and are skipped this run")
+    
+    if not detailed:
+        return
+    
+    for marker, entries in (('✓', selected), ('✗', skipped)):
+        for entry in entries:
+            subcategory = entry['subcategory']
+            hours = entry['hours_since_ingested']
+            age = 'never ingested' if hours is None else f"{hours:.1f}h ago"
+            print(f"   {marker} {entry['cost']:>5} units  {age:>15}  "
+                  f"{subcategory['main_category']} → {subcategory['name']} ({subcategory['strategy']})")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Fetch videos from YouTube for every active subcategory.')
+    parser.add_argument('--budget', type=int, default=YOUTUBE_QUOTA_BUDGET,
+                        help=f'YouTube quota units all runs of a quota day may spend together '
+                             f'(default: {YOUTUBE_QUOTA_BUDGET})')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Print the quota plan with projected spend and exit without fetching')
+    parser.add_argument('--concurrency', type=int, default=INGEST_CONCURRENCY,
+                        help=f'Subcategories processed at once (default: {INGEST_CONCURRENCY})')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Call YouTube for every request instead of using cached responses')
+    parser.add_argument('--stats-only', action='store_true',
+                        help='Only refresh view and like counts of stored videos (1 quota unit per 50 videos)')
+    return parser.parse_args()
+
+
 def main():
     """
     Main execution function: orchestrates the entire ingestion process.
     """
+    global response_cache
+    
+    args = parse_args()
+    concurrency = max(1, args.concurrency)
     start_time = time.time()
     total_videos_saved = 0
     
@@ -501,69 +1213,213 @@ def main():
             print("\n⚠ No subcategories found in database. Exiting.")
             return
         
-        # Step 2: Process each subcategory (with optional test limit)
-        subcategories_to_process = subcategories[:TEST_LIMIT] if TEST_LIMIT else subcategories
+        # This run may spend what earlier runs of the quota day left over
+        spent_today = get_quota_used_today()
+        budget = max(0, args.budget - spent_today)
+        print(f"\n🧮 Quota today ({quota_day()}, Pacific Time): {spent_today:,} of {args.budget:,} units spent, "
+              f"{budget:,} left for this run")
+        
+        if not budget:
+            print("\n⚠ Today's quota budget is spent; nothing to do until midnight Pacific Time")
+            return
+        
+        # Stats-only mode: refresh counts of stored videos instead of searching
+        if args.stats_only:
+            video_count = count_videos()
+            print(f"\n🧮 Stats refresh plan: {video_count} videos, "
+                  f"{min(budget, -(-video_count // 50)):,} of {budget:,} units")
+            
+            if args.dry_run:
+                print("\nℹ Dry run: nothing fetched or saved")
+                return
+            
+            total_videos_saved = refresh_video_statistics(subcategories, budget, concurrency)
+            
+            # Let API workers know there is new data to serve
+            if total_videos_saved:
+                bump_data_version()
+            
+            if throttle.aborted.is_set():
+                print(f"\n⚠️  QUOTA EXCEEDED - Statistics refresh stopped early")
+            
+            elapsed_time = time.time() - start_time
+            print("\n" + "="*80)
+            print(f"✅ Statistics Refresh Complete!")
+            print(f"   • Videos with new counts: {total_videos_saved}")
+            print(f"   • Quota used: {quota_units(youtube_calls):,} units")
+            print(f"   • Time elapsed: {elapsed_time:.2f} seconds")
+            print("="*80)
+            return
+        
+        # Step 2: Plan which subcategories fit in the quota budget, most valuable first
+        plan = plan_ingestion(subcategories, budget)
+        print_plan(plan, detailed=args.dry_run)
+        
+        if args.dry_run:
+            print("\nℹ Dry run: nothing fetched or saved")
+            return
+        
+        if not args.no_cache:
+            response_cache = YouTubeResponseCache(YOUTUBE_CACHE_PATH, max_bytes=YOUTUBE_CACHE_MAX_MB * 2**20)
+            print(f"\n🗄  YouTube response cache: {len(response_cache)} responses in {YOUTUBE_CACHE_PATH}")
+        
+        # Score any videos saved before ranking existed
+        total_videos_saved += score_unranked_videos(subcategories)
+        
+        # Step 3: Search subcategories concurrently (with optional test limit)
+        planned = [entry['subcategory'] for entry in plan['selected']]
+        subcategories_to_process = planned[:TEST_LIMIT] if TEST_LIMIT else planned
         total_subcategories = len(subcategories)
         limit_message = f" (TESTING: limited to first {TEST_LIMIT})" if TEST_LIMIT else ""
         
         print(f"\n📊 Processing {len(subcategories_to_process)}/{total_subcategories} subcategories{limit_message}")
+        print(f"   → {concurrency} at a time, starting at {throttle.rate:.1f} YouTube requests/second")
         
         # Track consecutive errors to detect systemic issues
         consecutive_errors = 0
         MAX_CONSECUTIVE_ERRORS = 3  # Abort after 3 consecutive failures
+        processed = 0
+        quota_exceeded = False
+        systemic_error = None
+        found: Dict[int, List[str]] = {}
         
-        for idx, subcategory in enumerate(subcategories_to_process, 1):
-            print(f"\n[{idx}/{len(subcategories_to_process)}]", end=' ')
-            
-            try:
-                videos_saved = process_subcategory(subcategory)
-                total_videos_saved += videos_saved
+        output = None
+        if concurrency > 1:
+            output = TaskOutput(sys.stdout)
+            sys.stdout = output
+        
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='ingest')
+        futures = {
+            executor.submit(run_search, subcategory, output): subcategory
+            for subcategory in subcategories_to_process
+        }
+        
+        try:
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
                 
-                # Reset error counter on successful processing
-                consecutive_errors = 0
+                processed += 1
+                subcategory = futures[future]
+                label = f"[{processed}/{len(subcategories_to_process)}] {subcategory['main_category']} → {subcategory['name']}"
                 
-                # Rate limiting: sleep between subcategories to avoid API throttling
-                if idx < len(subcategories_to_process):
-                    time.sleep(1)
+                try:
+                    video_ids = future.result()
+                    if video_ids is None:
+                        # Not saved or stamped, so the next run retries it
+                        print(f"\n{label}: search failed, left for the next run")
+                        continue
                     
-            except QuotaExceededException as e:
-                # YouTube API quota exceeded - abort immediately to save quota
-                print(f"\n\n{'='*80}")
-                print(f"⚠️  QUOTA EXCEEDED - Ingestion Aborted")
-                print(f"   • Processed: {idx} of {len(subcategories_to_process)} subcategories")
-                print(f"   • Videos saved so far: {total_videos_saved}")
-                print(f"   • Quota resets at midnight Pacific Time")
-                print(f"   • OR request quota increase at: https://console.cloud.google.com/")
-                print(f"{'='*80}")
-                sys.exit(0)  # Exit gracefully
-                
-            except Exception as e:
-                consecutive_errors += 1
-                print(f"\n   ✗ ERROR processing subcategory: {e}")
+                    found[subcategory['id']] = video_ids
+                    print(f"\n{label}: {len(video_ids)} videos found")
+                    
+                    # Reset error counter on successful processing
+                    consecutive_errors = 0
+                    
+                except QuotaExceededException:
+                    # YouTube API quota exceeded - every worker stops at its next
+                    # API call; drop the subcategories that have not started
+                    print(f"\n{label}: stopped, YouTube API quota exceeded")
+                    if not quota_exceeded:
+                        quota_exceeded = True
+                        throttle.abort()
+                        for pending in futures:
+                            pending.cancel()
+                    
+                except Exception as e:
+                    print(f"\n{label}")
+                    print(f"   ✗ ERROR processing subcategory: {e}")
+                    if quota_exceeded or systemic_error:
+                        continue
+                    
+                    consecutive_errors += 1
+                    
+                    # Abort if too many consecutive errors (likely systemic issue):
+                    # start nothing new and let the running subcategories finish
+                    if consecutive_errors >= MAX_CONSECUTIVE_ERRORS:
+                        systemic_error = e
+                        for pending in futures:
+                            pending.cancel()
+                        continue
+                    
+                    # Continue with next subcategory (might be transient error)
+                    print(f"   ⚠ Attempt {consecutive_errors}/{MAX_CONSECUTIVE_ERRORS} - continuing...")
+            
+            # Step 4: Fetch details once for the videos of every search, then
+            # fan them out and save each subcategory (skipped after a systemic
+            # error; after a quota error, whatever was fetched is saved).
+            # A video found by several subcategories is saved by one of them.
+            if not systemic_error:
+                details = {}
+                if not quota_exceeded:
+                    pooled_ids = [video_id for video_ids in found.values() for video_id in video_ids]
+                    details = get_video_details(pooled_ids, executor)
+                    quota_exceeded = throttle.aborted.is_set()
                 
-                # Abort if too many consecutive errors (likely systemic issue)
-                if consecutive_errors >= MAX_CONSECUTIVE_ERRORS:
-                    print(f"\n\n{'='*80}")
-                    print(f"⚠️  SYSTEMIC ERROR DETECTED - Ingestion Aborted")
-                    print(f"   • {consecutive_errors} consecutive failures detected")
-                    print(f"   • Likely cause: Database schema issue, network problem, or code bug")
-                    print(f"   • Processed: {idx} of {len(subcategories_to_process)} subcategories")
-                    print(f"   • Videos saved so far: {total_videos_saved}")
-                    print(f"   • Last error: {e}")
-                    print(f"\n   💡 Fix the issue and run the script again to save YouTube API quota.")
-                    print(f"{'='*80}")
-                    sys.exit(1)  # Exit with error code
+                owned = assign_video_owners(subcategories_to_process, found)
+                save_futures = {
+                    executor.submit(run_save, subcategory, owned[subcategory['id']], details, output, not quota_exceeded): subcategory
+                    for subcategory in subcategories_to_process
+                    if subcategory['id'] in owned and (details or not quota_exceeded)
+                }
                 
-                # Continue with next subcategory (might be transient error)
-                print(f"   ⚠ Attempt {consecutive_errors}/{MAX_CONSECUTIVE_ERRORS} - continuing...")
-                continue
+                for future in as_completed(save_futures):
+                    subcategory = save_futures[future]
+                    try:
+                        total_videos_saved += future.result()
+                    except Exception as e:
+                        print(f"   ✗ ERROR saving {subcategory['main_category']} → {subcategory['name']}: {e}")
+                    
+        except KeyboardInterrupt:
+            throttle.abort()
+            raise
+            
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+        
+        if quota_exceeded:
+            if total_videos_saved:
+                bump_data_version()
+            print(f"\n\n{'='*80}")
+            print(f"⚠️  QUOTA EXCEEDED - Ingestion Aborted")
+            print(f"   • Processed: {processed} of {len(subcategories_to_process)} subcategories")
+            print(f"   • Videos saved so far: {total_videos_saved}")
+            print(f"   • Quota used this run: {quota_units(youtube_calls):,} units (planned {plan['projected_cost']:,})")
+            print(f"   • Quota resets at midnight Pacific Time")
+            print(f"   • OR request quota increase at: https://console.cloud.google.com/")
+            print(f"{'='*80}")
+            sys.exit(0)  # Exit gracefully
+        
+        if systemic_error:
+            print(f"\n\n{'='*80}")
+            print(f"⚠️  SYSTEMIC ERROR DETECTED - Ingestion Aborted")
+            print(f"   • {consecutive_errors} consecutive failures detected")
+            print(f"   • Likely cause: Database schema issue, network problem, or code bug")
+            print(f"   • Processed: {processed} of {len(subcategories_to_process)} subcategories")
+            print(f"   • Videos saved so far: {total_videos_saved}")
+            print(f"   • Last error: {systemic_error}")
+            print(f"\n   💡 Fix the issue and run the script again to save YouTube API quota.")
+            print(f"{'='*80}")
+            if total_videos_saved:
+                bump_data_version()
+            sys.exit(1)  # Exit with error code
+        
+        # Let API workers know there is new data to serve
+        if total_videos_saved:
+            update_related_videos()
+            bump_data_version()
         
         # Summary
         elapsed_time = time.time() - start_time
         print("\n" + "="*80)
         print(f"✅ Ingestion Complete!")
-        print(f"   • Processed: {len(subcategories)} subcategories")
+        print(f"   • Processed: {len(subcategories_to_process)} of {len(subcategories)} subcategories")
         print(f"   • Total videos saved/updated: {total_videos_saved}")
+        print(f"   • YouTube API calls: {throttle.calls} ({throttle.throttled} throttled)")
+        print(f"   • Quota used: {quota_units(youtube_calls):,} of {plan['projected_cost']:,} planned units")
+        if response_cache is not None:
+            print(f"   • Cached YouTube responses: {response_cache.hits} reused, "
+                  f"{response_cache.revalidated} revalidated (304 Not Modified)")
         print(f"   • Time elapsed: {elapsed_time:.2f} seconds")
         print("="*80)
         
@@ -574,6 +1430,10 @@ def main():
     except Exception as e:
         print(f"\n\n✗ FATAL ERROR: {e}")
         sys.exit(1)
+        
+    finally:
+        # Count this run's spend against the quota day, however it ended
+        record_quota_used(quota_units(youtube_calls))
 
 
 if __name__ == '__main__':
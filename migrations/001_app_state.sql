@@ -0,0 +1,8 @@
+-- Key/value table for small pieces of shared application state.
+-- ingest.py writes key 'data_version' after every run that saved videos;
+-- the API polls it to invalidate its in-process response cache.
+create table if not exists app_state (
+    key text primary key,
+    value text not null,
+    updated_at timestamptz not null default now()
+);
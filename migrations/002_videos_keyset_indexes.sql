@@ -0,0 +1,7 @@
+-- Indexes matching the API's keyset pagination order:
+-- sort key descending (nulls last), then video_id as tiebreaker.
+create index if not exists videos_keyset_view_count_idx
+    on videos (category, sub_category, view_count desc nulls last, video_id desc);
+
+create index if not exists videos_keyset_published_at_idx
+    on videos (category, sub_category, published_at desc nulls last, video_id desc);
@@ -0,0 +1,5 @@
+-- Change stamp for every video row. ingest.py sets it on each upsert; the API's
+-- local read mirror syncs incrementally by pulling rows with a newer stamp.
+alter table videos add column if not exists updated_at timestamptz not null default now();
+
+create index if not exists videos_updated_at_idx on videos (updated_at, video_id);
@@ -0,0 +1,11 @@
+-- Precomputed ranking score (see ranking.py). ingest.py writes it with every
+-- video it saves and scores older rows on its next run; the API orders every
+-- subcategory by it with the same keyset pagination as before.
+alter table videos add column if not exists rank_score double precision;
+
+create index if not exists videos_keyset_rank_score_idx
+    on videos (category, sub_category, rank_score desc nulls last, video_id desc);
+
+-- The API no longer sorts by view_count or published_at
+drop index if exists videos_keyset_view_count_idx;
+drop index if exists videos_keyset_published_at_idx;
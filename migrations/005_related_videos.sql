@@ -0,0 +1,11 @@
+-- Precomputed "more like this" neighbors (see similarity.py). ingest.py rebuilds
+-- the whole table after every run that saved videos; the API's type=related
+-- reads one row by primary key.
+create table if not exists related_videos (
+    video_id text primary key references videos (video_id) on delete cascade,
+    related jsonb not null default '[]'::jsonb,  -- [{"video_id": ..., "score": ...}, ...] most similar first
+    updated_at timestamptz not null default now()
+);
+
+-- Incremental sync for the API's read mirror
+create index if not exists related_videos_updated_at_idx on related_videos (updated_at, video_id);
@@ -0,0 +1,4 @@
+-- When ingest.py last refreshed each subcategory. The quota planner (see
+-- quota_planner.py) spends each run's YouTube quota on the stalest,
+-- highest-priority subcategories first; null means never ingested.
+alter table subcategories add column if not exists last_ingested_at timestamptz;
@@ -0,0 +1,21 @@
+-- First pages of several subcategories in one call, for the API's type=bundle.
+-- Every subcategory gets its own p_per_subcategory rows in keyset order
+-- (rank_score desc nulls last, video_id desc), so a category page is one
+-- query no matter how the scores of its subcategories compare. Each lateral
+-- subquery reads only the first rows of videos_keyset_rank_score_idx.
+create or replace function videos_bundle(p_category text, p_sub_categories text[], p_per_subcategory int)
+returns setof videos
+language sql
+stable
+as $$
+    select page.*
+    from unnest(p_sub_categories) as names (name)
+    cross join lateral (
+        select *
+        from videos
+        where videos.category = p_category
+          and videos.sub_category = names.name
+        order by videos.rank_score desc nulls last, videos.video_id desc
+        limit p_per_subcategory
+    ) as page;
+$$;
@@ -0,0 +1,19 @@
+-- Stamp updated_at with the database clock on every insert and update, so
+-- every change stamp comes from one clock instead of each ingest worker's.
+-- The API's delta feed (type=changes) only serves changes older than
+-- CHANGES_SETTLE_SECONDS against these stamps, so rows that commit out of
+-- stamp order are never skipped.
+create or replace function videos_set_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.updated_at := now();
+    return new;
+end;
+$$;
+
+drop trigger if exists videos_set_updated_at on videos;
+create trigger videos_set_updated_at
+    before insert or update on videos
+    for each row execute function videos_set_updated_at();
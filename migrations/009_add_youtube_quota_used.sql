@@ -0,0 +1,21 @@
+-- Add quota units to app_state.youtube_quota_used ({"day": ..., "units": ...})
+-- in one statement, so overlapping ingest.py runs (e.g. a cron run and a
+-- --stats-only run) never lose each other's spend. A record from an earlier
+-- quota day starts over at p_units. Returns the day's new total.
+create or replace function add_youtube_quota_used(p_day text, p_units int)
+returns int
+language sql
+as $$
+    insert into app_state (key, value, updated_at)
+    values ('youtube_quota_used', jsonb_build_object('day', p_day, 'units', p_units)::text, now())
+    on conflict (key) do update set
+        value = jsonb_build_object(
+            'day', p_day,
+            'units', p_units + case
+                when app_state.value::jsonb ->> 'day' = p_day then (app_state.value::jsonb ->> 'units')::int
+                else 0
+            end
+        )::text,
+        updated_at = now()
+    returning (value::jsonb ->> 'units')::int;
+$$;
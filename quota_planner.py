@@ -0,0 +1,193 @@
+"""
+BracketsTV Ingestion Quota Planner
+==================================
+
+Decides which subcategories an ingestion run refreshes so that the run stays
+within a YouTube Data API quota budget instead of spending quota until the
+API refuses and the run aborts partway through the list.
+
+The budget is daily, like YouTube's quota: ingest.py records the units every
+run spends per quota day (midnight to midnight Pacific Time, see quota_day)
+and plans each run against what is left of the day's budget.
+
+Every subcategory's cost is estimated from its fetching strategy: one
+search.list call (SEARCH_COST units) per search, and its share of the
+videos.list calls (VIDEOS_LIST_COST units per 50 results), which ingest.py
+makes once for the pooled results of all searches. Subcategories are then
+ranked by value, how overdue they are for a refresh weighted by their
+priority, and picked greedily in that order as long as the run's projected
+cost fits in the budget; the rest are skipped until a later run.
+
+    - Overdue: hours since last_ingested_at over the strategy's refresh
+      interval (REFRESH_HOURS), so a RECENCY row a day old is as overdue as a
+      topic row a week old. Never-ingested subcategories come first.
+    - Priority: rows near the top of a category page (low display_order)
+      count up to twice as much as rows further down.
+"""
+
+import math
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+# Quota units per call (https://developers.google.com/youtube/v3/determine_quota_cost)
+SEARCH_COST = 100
+VIDEOS_LIST_COST = 1
+QUOTA_COSTS = {'search': SEARCH_COST, 'videos': VIDEOS_LIST_COST}
+
+# Default daily quota of a YouTube Data API project
+DAILY_QUOTA = 10000
+
+# The daily quota resets at midnight Pacific Time
+QUOTA_TIMEZONE = ZoneInfo('America/Los_Angeles')
+
+# IDs videos.list accepts per call
+VIDEOS_PER_DETAILS_CALL = 50
+
+# search.list calls each strategy in ingest.search_subcategory makes
+# (curated strategies read their channels from the database, which is free)
+STRATEGY_SEARCHES = {
+    'TOPIC_CURATED': 1,
+    'POPULARITY': 1,
+    'RECENCY': 1,
+    'FORMAT_DURATION': 1,
+    'RECENCY_CURATED': 1,
+    'FORMAT_KEYWORD': 1,
+    'POPULARITY_CURATED': 1,
+}
+
+# Hours after which a subcategory is due for a refresh
+REFRESH_HOURS = {
+    'RECENCY': 24.0,
+    'RECENCY_CURATED': 24.0,
+}
+DEFAULT_REFRESH_HOURS = 7 * 24.0
+
+# display_order of subcategories seeded without one
+DEFAULT_DISPLAY_ORDER = 999
+
+
+def estimate_searches(subcategory: Dict[str, Any]) -> int:
+    """search.list calls a subcategory makes; 0 for strategies ingest.py skips."""
+    return STRATEGY_SEARCHES.get(subcategory.get('strategy'), 0)
+
+
+def estimate_results(subcategory: Dict[str, Any]) -> int:
+    """Video IDs a subcategory's searches return at most."""
+    return estimate_searches(subcategory) * (subcategory.get('max_results') or 20)
+
+
+def run_cost(searches: int, results: int) -> int:
+    """Quota units of a run's searches plus the pooled videos.list calls for their results."""
+    details_calls = math.ceil(results / VIDEOS_PER_DETAILS_CALL)
+    return searches * SEARCH_COST + details_calls * VIDEOS_LIST_COST
+
+
+def estimate_cost(subcategory: Dict[str, Any]) -> int:
+    """
+    Quota units refreshing a subcategory on its own would spend at most.
+
+    Args:
+        subcategory: Subcategory row (strategy, max_results)
+
+    Returns:
+        Estimated units; 0 for strategies ingest.py skips
+    """
+    return run_cost(estimate_searches(subcategory), estimate_results(subcategory))
+
+
+def quota_units(calls: Counter) -> int:
+    """Quota units spent by API calls counted per resource (e.g. {'search': 3, 'videos': 5})."""
+    return sum(QUOTA_COSTS.get(resource, 1) * count for resource, count in calls.items())
+
+
+def quota_day(now: Optional[datetime] = None) -> str:
+    """The quota day containing now (default: current time), as a Pacific Time date like '2024-05-01'."""
+    now = now or datetime.now(timezone.utc)
+    return now.astimezone(QUOTA_TIMEZONE).date().isoformat()
+
+
+def hours_since_ingested(subcategory: Dict[str, Any], now: datetime) -> Optional[float]:
+    """Hours since the subcategory was last refreshed, or None if it never was."""
+    last_ingested_at = subcategory.get('last_ingested_at')
+    if not last_ingested_at:
+        return None
+
+    last = datetime.fromisoformat(last_ingested_at.replace('Z', '+00:00'))
+    if last.tzinfo is None:
+        last = last.replace(tzinfo=timezone.utc)
+    return max(0.0, (now - last).total_seconds() / 3600)
+
+
+def priority_weight(subcategory: Dict[str, Any]) -> float:
+    """Between 1 and 2: 1.9 for the first row of a category page, 1.5 at display_order 10."""
+    display_order = subcategory.get('display_order')
+    if display_order is None:
+        display_order = DEFAULT_DISPLAY_ORDER
+    return 1 + 10 / (10 + max(0, display_order))
+
+
+def refresh_value(subcategory: Dict[str, Any], now: datetime) -> float:
+    """
+    How much refreshing the subcategory is worth now: overdue fraction times priority.
+
+    Never-ingested subcategories are worth infinitely much.
+    """
+    hours = hours_since_ingested(subcategory, now)
+    if hours is None:
+        return math.inf
+
+    refresh_hours = REFRESH_HOURS.get(subcategory.get('strategy'), DEFAULT_REFRESH_HOURS)
+    return hours / refresh_hours * priority_weight(subcategory)
+
+
+def plan_ingestion(subcategories: List[Dict[str, Any]], budget: int = DAILY_QUOTA,
+                   now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Choose the subcategories to refresh within a quota budget.
+
+    Args:
+        subcategories: Active subcategory rows
+        budget: Quota units the run may spend
+        now: Planning time (default: current time)
+
+    Returns:
+        {'selected': [...], 'skipped': [...], 'budget': ..., 'projected_cost': ...}
+        where selected and skipped hold {'subcategory', 'cost', 'value',
+        'hours_since_ingested'} entries, most valuable first, with each
+        subcategory's standalone cost. projected_cost is the cost of the
+        selected subcategories with their videos.list calls pooled.
+        Selected subcategories should be processed in that order.
+    """
+    now = now or datetime.now(timezone.utc)
+
+    entries = [
+        {
+            'subcategory': subcategory,
+            'cost': estimate_cost(subcategory),
+            'value': refresh_value(subcategory, now),
+            'hours_since_ingested': hours_since_ingested(subcategory, now),
+        }
+        for subcategory in subcategories
+    ]
+    entries.sort(key=lambda entry: (-entry['value'], -priority_weight(entry['subcategory']), entry['cost']))
+
+    selected, skipped = [], []
+    searches = results = 0
+    for entry in entries:
+        subcategory = entry['subcategory']
+        more_searches = searches + estimate_searches(subcategory)
+        more_results = results + estimate_results(subcategory)
+        if run_cost(more_searches, more_results) <= budget:
+            selected.append(entry)
+            searches, results = more_searches, more_results
+        else:
+            skipped.append(entry)
+
+    return {
+        'selected': selected,
+        'skipped': skipped,
+        'budget': budget,
+        'projected_cost': run_cost(searches, results),
+    }
@@ -0,0 +1,165 @@
+"""
+BracketsTV Video Ranking
+========================
+
+Computes the rank_score stored with every video. ingest.py scores videos as it
+saves them and the API simply orders each subcategory by rank_score
+(descending), so better rankings cost nothing at query time.
+
+A score is a weighted sum of signals, each measured in roughly "orders of
+magnitude":
+
+    - views: log10(1 + view_count)
+    - likes: log10(1 + like_count)
+    - like_ratio: log10 of the like/view ratio relative to a typical ratio,
+      smoothed towards that typical ratio for videos with few views
+    - recency: age of the publish date since RECENCY_EPOCH, in units of
+      RECENCY_SCALE_DAYS
+    - duration_fit: 0 inside the subcategory's target duration range, minus
+      the log10 distance to the range outside it
+
+Recency grows with the publish date instead of decaying with the video's age,
+so scores never go stale: the order of two videos does not change as time
+passes, and a score computed at ingest time stays valid until the video's
+statistics change. The weight of each signal depends on the subcategory's
+fetching strategy (STRATEGY_WEIGHTS); e.g. RECENCY subcategories are dominated
+by the publish date, POPULARITY ones by views.
+"""
+
+import math
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+# Publish dates are measured from here; only differences between videos matter
+RECENCY_EPOCH = datetime(2005, 1, 1, tzinfo=timezone.utc)
+
+# A video published this many days later gains one unit of recency; with a
+# recency weight of w, a year newer is worth as much as w orders of magnitude
+# more views at a views weight of 1
+RECENCY_SCALE_DAYS = 365.0
+
+# Like/view ratio of an average video, and the view count at which a video's
+# own ratio counts as much as that prior
+TYPICAL_LIKE_RATIO = 0.02
+LIKE_RATIO_PRIOR_VIEWS = 1000
+
+# Signal weights per subcategory strategy
+STRATEGY_WEIGHTS: Dict[str, Dict[str, float]] = {
+    'POPULARITY': {'views': 1.0, 'likes': 0.3, 'like_ratio': 0.5, 'recency': 0.3, 'duration_fit': 0.5},
+    'RECENCY': {'views': 0.3, 'likes': 0.1, 'like_ratio': 0.5, 'recency': 15.0, 'duration_fit': 0.5},
+    'TOPIC': {'views': 0.7, 'likes': 0.3, 'like_ratio': 1.0, 'recency': 0.5, 'duration_fit': 1.0},
+    'FORMAT_DURATION': {'views': 0.6, 'likes': 0.2, 'like_ratio': 0.8, 'recency': 0.3, 'duration_fit': 3.0},
+    'FORMAT_KEYWORD': {'views': 0.7, 'likes': 0.2, 'like_ratio': 0.8, 'recency': 0.3, 'duration_fit': 2.0},
+}
+
+# Curated variants rank like their uncurated counterparts
+STRATEGY_WEIGHTS['POPULARITY_CURATED'] = STRATEGY_WEIGHTS['POPULARITY']
+STRATEGY_WEIGHTS['RECENCY_CURATED'] = STRATEGY_WEIGHTS['RECENCY']
+STRATEGY_WEIGHTS['TOPIC_CURATED'] = STRATEGY_WEIGHTS['TOPIC']
+
+DEFAULT_WEIGHTS = STRATEGY_WEIGHTS['TOPIC']
+
+# Target durations in seconds, keyed by the YouTube videoDuration filter
+# (short: under 4 minutes, medium: 4-20 minutes, long: over 20 minutes)
+DURATION_TARGETS: Dict[str, Tuple[float, float]] = {
+    'short': (60, 4 * 60),
+    'medium': (4 * 60, 20 * 60),
+    'long': (20 * 60, 6 * 3600),
+}
+DEFAULT_DURATION_TARGET = (3 * 60, 60 * 60)
+
+# duration_fit for videos whose duration is unknown
+UNKNOWN_DURATION_FIT = -0.5
+
+
+def duration_target(subcategory: Dict[str, Any]) -> Tuple[float, float]:
+    """
+    Preferred duration range (seconds) for a subcategory's videos.
+
+    Uses the subcategory's video_duration filter when it has one. Masterclass
+    subcategories prefer long videos, matching the filter ingest.py applies
+    when searching for them.
+    """
+    video_duration = subcategory.get('video_duration')
+    if video_duration in DURATION_TARGETS:
+        return DURATION_TARGETS[video_duration]
+
+    if 'Masterclasses' in (subcategory.get('name') or ''):
+        return DURATION_TARGETS['long']
+
+    if subcategory.get('strategy') == 'FORMAT_DURATION':
+        # "Quick Concepts" subcategories: anything up to 20 minutes
+        return (DURATION_TARGETS['short'][0], DURATION_TARGETS['medium'][1])
+
+    return DEFAULT_DURATION_TARGET
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def rank_signals(video: Dict[str, Any], target: Tuple[float, float] = DEFAULT_DURATION_TARGET) -> Dict[str, float]:
+    """
+    Compute the individual ranking signals for a video.
+
+    Args:
+        video: Video row with view_count, like_count, published_at and duration
+            (missing or None values are tolerated)
+        target: Preferred (min, max) duration in seconds
+
+    Returns:
+        Signal name -> value
+    """
+    views = video.get('view_count') or 0
+    likes = video.get('like_count') or 0
+
+    signals = {
+        'views': math.log10(1 + views),
+        'likes': math.log10(1 + likes),
+        'like_ratio': 0.0,
+        'recency': 0.0,
+        'duration_fit': UNKNOWN_DURATION_FIT,
+    }
+
+    if video.get('view_count') is not None and video.get('like_count') is not None:
+        smoothed = (likes + TYPICAL_LIKE_RATIO * LIKE_RATIO_PRIOR_VIEWS) / (views + LIKE_RATIO_PRIOR_VIEWS)
+        signals['like_ratio'] = math.log10(smoothed / TYPICAL_LIKE_RATIO)
+
+    published_at = _parse_timestamp(video.get('published_at'))
+    if published_at is not None:
+        signals['recency'] = (published_at - RECENCY_EPOCH).total_seconds() / (RECENCY_SCALE_DAYS * 86400)
+
+    duration = video.get('duration')
+    if duration:
+        low, high = target
+        if duration < low:
+            signals['duration_fit'] = -math.log10(low / duration)
+        elif duration > high:
+            signals['duration_fit'] = -math.log10(duration / high)
+        else:
+            signals['duration_fit'] = 0.0
+
+    return signals
+
+
+def rank_score(video: Dict[str, Any], subcategory: Dict[str, Any]) -> float:
+    """
+    Rank score for a video within a subcategory (higher ranks first).
+
+    Args:
+        video: Video row (see rank_signals)
+        subcategory: Subcategory row; its strategy picks the weights and its
+            video_duration/name the target duration
+
+    Returns:
+        The score, rounded to 6 decimal places
+    """
+    weights = STRATEGY_WEIGHTS.get(subcategory.get('strategy'), DEFAULT_WEIGHTS)
+    signals = rank_signals(video, duration_target(subcategory))
+    return round(sum(weights[name] * value for name, value in signals.items()), 6)
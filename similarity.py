@@ -0,0 +1,131 @@
+"""
+BracketsTV Related Videos
+=========================
+
+Builds the "more like this" index: for every video, the k most similar other
+videos by TF-IDF cosine similarity over its title and tags. ingest.py rebuilds
+it after each run that changed the catalog and stores it in the
+related_videos table, so the API answers type=related with a primary key
+lookup instead of comparing videos per request.
+
+Every video becomes a sparse vector of (1 + log tf) * idf term weights, with
+tag terms counted TAG_WEIGHT times. Terms that occur in a single video cannot
+relate two videos and are dropped, as are terms in more than MAX_DF_RATIO of
+all videos.
+
+Similarities are accumulated through an inverted index, with each term's
+posting list cut to its MAX_POSTINGS highest-weighted videos (impact
+ordering), so a video that uses a very common term only weakly does not
+collect a contribution from it. This makes the scores of weakly related pairs
+approximate; the strongest neighbors are not affected in practice.
+
+The cut bounds the work per video at MAX_POSTINGS per term. Until posting
+lists reach that size, the cost per video still grows with the catalog, so
+the build is superlinear for small catalogs. Once common terms hit the cap it
+is linear, at a higher cost per video (benchmarks/similarity_build.py: about
+0.5 ms per video at 1,000 videos, levelling off around 1.1-1.2 ms from 8,000).
+"""
+
+import heapq
+import math
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Tuple
+
+from tokenizer import tokenize
+
+# Neighbors stored per video
+DEFAULT_NEIGHBORS = 10
+
+# Weight of tag terms relative to title terms
+TAG_WEIGHT = 2.0
+
+# Terms in more than this fraction of videos carry no signal
+MAX_DF_RATIO = 0.2
+
+# Entries kept per posting list (see module docstring)
+MAX_POSTINGS = 200
+
+# Pairs less similar than this are never stored
+MIN_SIMILARITY = 0.05
+
+Neighbors = List[Tuple[str, float]]
+
+
+def video_terms(video: Dict[str, Any]) -> Counter:
+    """
+    Weighted term frequencies of a video's title and tags.
+
+    Args:
+        video: Video row with title and tags, as built by format_video_for_database
+    """
+    terms: Counter = Counter(tokenize(video.get('title') or ''))
+    for tag in video.get('tags') or []:
+        for term in tokenize(tag):
+            terms[term] += TAG_WEIGHT
+    return terms
+
+
+def build_similarity_index(videos: Iterable[Dict[str, Any]], k: int = DEFAULT_NEIGHBORS) -> Dict[str, Neighbors]:
+    """
+    Find the k most similar videos for every video.
+
+    Args:
+        videos: Video rows with video_id, title and tags
+        k: Neighbors to keep per video
+
+    Returns:
+        video_id -> [(neighbor video_id, cosine similarity), ...], most similar
+        first. Videos without any related video map to an empty list.
+    """
+    ids: List[str] = []
+    term_counts: List[Counter] = []
+    for video in videos:
+        ids.append(video['video_id'])
+        term_counts.append(video_terms(video))
+
+    total = len(ids)
+    document_frequency: Counter = Counter()
+    for terms in term_counts:
+        document_frequency.update(terms.keys())
+
+    max_df = max(2, int(total * MAX_DF_RATIO))
+    idf = {
+        term: math.log(total / df)
+        for term, df in document_frequency.items()
+        if 1 < df <= max_df
+    }
+
+    # Unit-length sparse vectors, and posting lists of (weight, document)
+    vectors: List[Dict[str, float]] = []
+    postings: Dict[str, List[Tuple[float, int]]] = defaultdict(list)
+    for doc, terms in enumerate(term_counts):
+        vector = {
+            term: (1 + math.log(count)) * idf[term]
+            for term, count in terms.items()
+            if term in idf and count > 0
+        }
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        if norm:
+            vector = {term: weight / norm for term, weight in vector.items()}
+        vectors.append(vector)
+        for term, weight in vector.items():
+            postings[term].append((weight, doc))
+
+    for term, entries in postings.items():
+        if len(entries) > MAX_POSTINGS:
+            postings[term] = heapq.nlargest(MAX_POSTINGS, entries)
+
+    index: Dict[str, Neighbors] = {}
+    for doc, vector in enumerate(vectors):
+        scores: Dict[int, float] = defaultdict(float)
+        for term, weight in vector.items():
+            for other_weight, other in postings[term]:
+                scores[other] += weight * other_weight
+        scores.pop(doc, None)
+
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        index[ids[doc]] = [
+            (ids[other], round(score, 4)) for other, score in best if score >= MIN_SIMILARITY
+        ]
+
+    return index
@@ -0,0 +1,51 @@
+"""
+Shared fixtures: the API app backed by the in-process fake Supabase from
+benchmarks/fake_supabase.py, and a helper to drive it without a server.
+"""
+
+import asyncio
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+for path in (ROOT, os.path.join(ROOT, 'api'), os.path.join(ROOT, 'benchmarks')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# index.py reads its configuration at import time
+os.environ.setdefault('SUPABASE_URL', 'https://example.supabase.co')
+os.environ.setdefault('SUPABASE_KEY', 'test-key')
+os.environ.setdefault('LOG_LEVEL', 'OFF')
+os.environ.setdefault('RATE_LIMIT_PER_SECOND', '0')
+os.environ.pop('MIRROR_PATH', None)
+
+import httpx
+import pytest
+
+import db
+import index
+from fake_supabase import FakeSupabase
+
+
+@pytest.fixture
+def fake():
+    """A seeded fake Supabase installed as the API's client, with empty caches."""
+    client = FakeSupabase.seeded(videos_per_subcategory=30)
+    db.set_client(client)
+    index.response_cache.clear()
+    index.search_cache.clear()
+    yield client
+    index.response_cache.clear()
+    index.search_cache.clear()
+
+
+@pytest.fixture
+def get(fake):
+    """Send GET / requests to the app: get(params, headers=None) -> httpx.Response."""
+    def send(params, headers=None):
+        async def request():
+            transport = httpx.ASGITransport(app=index.app)
+            async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+                return await client.get('/', params=params, headers=headers)
+        return asyncio.run(request())
+    return send
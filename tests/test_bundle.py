@@ -0,0 +1,17 @@
+import index
+
+
+def test_bundle_pages_match_videos_pages(fake, get):
+    """A first page cached by type=bundle is served byte for byte like one get_videos loaded."""
+    bundle = get({'type': 'bundle', 'category': 'dsa', 'limit': '5'})
+    assert bundle.status_code == 200
+    names = [subcategory['name'] for subcategory in bundle.json()['subcategories']]
+    assert names
+
+    from_bundle = {name: get({'type': 'videos', 'category': 'dsa', 'subcategory': name, 'limit': '5'}) for name in names}
+
+    index.response_cache.clear()
+    for name in names:
+        direct = get({'type': 'videos', 'category': 'dsa', 'subcategory': name, 'limit': '5'})
+        assert from_bundle[name].content == direct.content
+        assert from_bundle[name].headers['etag'] == direct.headers['etag']
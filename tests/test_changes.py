@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta, timezone
+
+import db
+import index
+from fake_supabase import FakeSupabase
+
+
+def stamp(seconds_ago):
+    return (datetime.now(timezone.utc) - timedelta(seconds=seconds_ago)).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+def poll(get, since):
+    index.response_cache.clear()
+    body = get({'type': 'changes', 'since': since, 'limit': '10', 'fields': 'title'}).json()
+    return [video['video_id'] for video in body['videos']], body['watermark']
+
+
+def test_changes_committed_out_of_stamp_order_are_delivered(fake, get, monkeypatch):
+    """A write stamped earlier but committed later than another is still delivered."""
+    client = FakeSupabase({'videos': []})
+    db.set_client(client)
+    monkeypatch.setattr(index, 'CHANGES_SETTLE_SECONDS', 15)
+    since = stamp(3600)
+
+    # Worker A stamps its row first, worker B second, but B commits first
+    row_a = {'video_id': 'aaaaaaaaaaa', 'title': 'A', 'updated_at': stamp(20)}
+    row_b = {'video_id': 'bbbbbbbbbbb', 'title': 'B', 'updated_at': stamp(10)}
+    client.upsert('videos', [row_b], 'video_id')
+
+    # B is too recent to hand out, so the watermark cannot move past A's stamp
+    videos, watermark = poll(get, since)
+    assert videos == []
+
+    client.upsert('videos', [row_a], 'video_id')
+    videos, watermark = poll(get, watermark)
+    assert videos == ['aaaaaaaaaaa']
+
+    # Once B has settled too, it follows
+    monkeypatch.setattr(index, 'CHANGES_SETTLE_SECONDS', 0)
+    videos, watermark = poll(get, watermark)
+    assert videos == ['bbbbbbbbbbb']
@@ -0,0 +1,27 @@
+def test_videos_return_only_requested_fields(get):
+    params = {'type': 'videos', 'category': 'dsa', 'subcategory': 'Most Watched', 'limit': '5', 'fields': 'title'}
+    first = get(params).json()
+    assert first['next_cursor']
+    assert all(set(video) == {'video_id', 'title'} for video in first['videos'])
+
+    # The cursor still carries the rank_score the page was sorted by
+    second = get({**params, 'cursor': first['next_cursor']}).json()
+    assert all(set(video) == {'video_id', 'title'} for video in second['videos'])
+    assert not {video['video_id'] for video in first['videos']} & {video['video_id'] for video in second['videos']}
+
+
+def test_bundle_returns_only_requested_fields(get):
+    bundle = get({'type': 'bundle', 'category': 'dsa', 'limit': '3', 'fields': 'title'}).json()
+    videos = [video for subcategory in bundle['subcategories'] for video in subcategory['videos']]
+    assert videos
+    assert all(set(video) == {'video_id', 'title'} for video in videos)
+
+
+def test_changes_return_only_requested_fields(get):
+    params = {'type': 'changes', 'since': '2000-01-01T00:00:00Z', 'limit': '5', 'fields': 'title'}
+    first = get(params).json()
+    assert all(set(video) == {'video_id', 'title'} for video in first['videos'])
+
+    second = get({**params, 'since': first['watermark']}).json()
+    assert len(second['videos']) == 5
+    assert not {video['video_id'] for video in first['videos']} & {video['video_id'] for video in second['videos']}
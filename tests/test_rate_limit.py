@@ -0,0 +1,12 @@
+from rate_limit import client_identity
+
+
+def test_client_identity_never_contains_the_api_key():
+    identity = client_identity({'x-api-key': 'secret-key-123'}, '10.0.0.1', api_keys={'secret-key-123'})
+    assert identity.startswith('key:')
+    assert 'secret-key-123' not in identity
+    assert identity == client_identity({'x-api-key': 'secret-key-123'}, '10.0.0.2', api_keys={'secret-key-123'})
+
+
+def test_unknown_api_keys_are_limited_by_address():
+    assert client_identity({'x-api-key': 'made-up'}, '10.0.0.1', api_keys={'secret-key-123'}) == 'ip:10.0.0.1'
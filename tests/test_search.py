@@ -0,0 +1,8 @@
+import index
+
+
+def test_search_defaults_to_the_page_size(get):
+    body = get({'type': 'search', 'q': 'python'}).json()
+    assert len(body['results']) == index.VIDEOS_PAGE_SIZE
+    assert len(index.search_cache) == 1
+    assert len(index.response_cache) == 0
@@ -0,0 +1,27 @@
+"""
+BracketsTV Text Tokenizer
+=========================
+
+The one tokenizer for video text, shared by the API's search index
+(api/search_index.py) and the related-videos build in ingest.py
+(similarity.py), so a term means the same thing to both.
+"""
+
+import re
+from typing import List
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*")
+
+STOPWORDS = frozenset({
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'how', 'in', 'is',
+    'it', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'with', 'you', 'your'
+})
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase terms, dropping stopwords.
+
+    '+' and '#' are kept inside terms so "c++" and "c#" stay searchable.
+    """
+    return [token for token in _TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
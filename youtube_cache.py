@@ -0,0 +1,188 @@
+"""
+BracketsTV YouTube Response Cache
+=================================
+
+A persistent SQLite cache of YouTube Data API list responses, so re-running
+ingest.py after a crash or later the same day does not spend quota again on
+data it already fetched.
+
+Responses are keyed on the resource and its normalized request parameters
+(in any order, with the comma-separated id and part lists sorted) and are
+fresh for a per-resource TTL (DEFAULT_TTLS). A stale response that carries an
+ETag is revalidated with If-None-Match instead of being dropped: if YouTube
+answers 304 Not Modified, the stored body is reused and its TTL starts over.
+Bodies are stored zlib-compressed, and the least recently used responses are
+evicted once the file holds more than max_bytes of them.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional
+
+# Seconds a cached response is served without asking YouTube, per resource
+DEFAULT_TTLS = {
+    'search': 12 * 3600,  # search results drift slowly
+    'videos': 6 * 3600,   # statistics feed rank_score
+}
+DEFAULT_TTL = 6 * 3600
+
+# Size of the stored response bodies (compressed) before the oldest are evicted
+DEFAULT_MAX_BYTES = 200 * 2**20
+
+# Parameters holding comma-separated lists whose order does not matter
+LIST_PARAMS = ('id', 'part')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    resource TEXT NOT NULL,
+    etag TEXT,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_used_at_idx ON responses (used_at);
+"""
+
+
+def _normalize(name: str, value: Any) -> Any:
+    if not isinstance(value, str):
+        return value
+    if name in LIST_PARAMS:
+        return ','.join(sorted(part.strip() for part in value.split(',')))
+    return value.strip()
+
+
+def cache_key(resource: str, params: Dict[str, Any]) -> str:
+    """
+    Key of a request: the resource and its parameters, independent of their order.
+
+    Args:
+        resource: API resource, e.g. 'search' or 'videos'
+        params: Parameters of <resource>.list()
+    """
+    normalized = {name: _normalize(name, value) for name, value in params.items() if value is not None}
+    payload = json.dumps([resource, normalized], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class YouTubeResponseCache:
+    """
+    Thread-safe on-disk cache of YouTube API responses.
+
+    Args:
+        path: Path of the SQLite database file
+        ttls: Seconds a response stays fresh, per resource
+        max_bytes: Stored body size above which the least recently used responses are evicted
+    """
+
+    def __init__(self, path: str, ttls: Optional[Dict[str, float]] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.evicted = 0
+        self._lock = threading.Lock()
+
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        with self._db:
+            self._db.executescript(_SCHEMA)
+
+    def lookup(self, resource: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Find the cached response for a request.
+
+        Args:
+            resource: API resource, e.g. 'search' or 'videos'
+            params: Parameters of <resource>.list()
+
+        Returns:
+            None if nothing usable is cached, otherwise {'key', 'response',
+            'etag', 'fresh'}. A stale entry is only returned when it has an
+            ETag to revalidate with.
+        """
+        key = cache_key(resource, params)
+        now = time.time()
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT etag, body, fetched_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            etag, body, fetched_at = row
+            fresh = now - fetched_at < self.ttls.get(resource, DEFAULT_TTL)
+
+            if not fresh and not etag:
+                with self._db:
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+
+            with self._db:
+                self._db.execute("UPDATE responses SET used_at = ? WHERE key = ?", (now, key))
+            if fresh:
+                self.hits += 1
+
+        return {'key': key, 'response': json.loads(zlib.decompress(body)), 'etag': etag, 'fresh': fresh}
+
+    def store(self, resource: str, params: Dict[str, Any], response: Dict[str, Any]) -> None:
+        """
+        Cache a response YouTube just returned, then evict old responses if over size.
+
+        Args:
+            resource: API resource, e.g. 'search' or 'videos'
+            params: Parameters of <resource>.list()
+            response: The response body
+        """
+        key = cache_key(resource, params)
+        body = zlib.compress(json.dumps(response, separators=(',', ':')).encode('utf-8'))
+        now = time.time()
+
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, resource, etag, body, size, fetched_at, used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, resource, response.get('etag'), body, len(body), now, now)
+            )
+            self._evict()
+
+    def mark_revalidated(self, key: str) -> None:
+        """YouTube answered 304 Not Modified: the stored response is fresh again."""
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute("UPDATE responses SET fetched_at = ?, used_at = ? WHERE key = ?", (now, now, key))
+            self.revalidated += 1
+
+    def _evict(self) -> None:
+        # Called with the lock held, inside a transaction
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY used_at").fetchall():
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.evicted += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
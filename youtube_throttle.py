@@ -0,0 +1,76 @@
+"""
+BracketsTV YouTube API Throttle
+===============================
+
+A request pacer shared by every ingestion worker thread. It replaces fixed
+sleeps between calls with an adaptive rate: calls are spaced evenly at the
+current rate, which grows a little after every successful call and is halved
+whenever YouTube answers with a rate-limit or server error (additive increase,
+multiplicative decrease). Concurrent workers therefore run as fast as the API
+allows and back off together as soon as it pushes back.
+
+The throttle also carries the run-wide abort flag: once one worker hits the
+daily quota, every other worker stops at its next call.
+"""
+
+import threading
+import time
+
+
+class AdaptiveRateLimiter:
+    """
+    Thread-safe AIMD request pacer.
+
+    Args:
+        rate: Initial requests per second
+        max_rate: Upper bound for the rate
+        min_rate: Lower bound for the rate
+        increase: Requests per second added after each successful call
+        decrease: Factor the rate is multiplied by when the API pushes back
+    """
+
+    def __init__(self, rate: float = 5.0, max_rate: float = 20.0, min_rate: float = 0.5,
+                 increase: float = 0.5, decrease: float = 0.5):
+        self.rate = min(rate, max_rate)
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.calls = 0
+        self.throttled = 0
+        self.aborted = threading.Event()
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until the caller may send its next request."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + 1.0 / self.rate
+            self.calls += 1
+
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def record_success(self) -> None:
+        """A call went through: speed up a little."""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def record_throttle(self, retry_after: float = 0.0) -> None:
+        """
+        The API pushed back (rate limit or server error): slow down.
+
+        Args:
+            retry_after: Seconds to pause every worker for, if the API asked for a pause
+        """
+        with self._lock:
+            self.throttled += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self._next_slot = max(self._next_slot, time.monotonic() + max(retry_after, 1.0 / self.rate))
+
+    def abort(self) -> None:
+        """Stop every worker at its next call (e.g. the daily quota is exhausted)."""
+        self.aborted.set()